@@ -0,0 +1,95 @@
+"""Benchmark: event registry dispatch vs the Transfer-only extraction path.
+
+Run from the repo root (no node needed):
+    python benchmarks/bench_events.py [n_receipts]
+
+Both paths decode the same synthetic receipts (4 logs each: 2 ERC-20
+Transfers, 1 Approval, 1 unknown event). Tokens and accounts are drawn from
+fixed pools, as addresses recur within real block ranges. Reports logs/second and the
+registry's slowdown factor relative to core._extract_erc20_transfers.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from hexbytes import HexBytes  # noqa: E402
+from web3 import Web3  # noqa: E402
+
+from eth_tx_explorer.addresses import AddressTable  # noqa: E402
+from eth_tx_explorer.core import TRANSFER_SIG, _extract_erc20_transfers  # noqa: E402
+from eth_tx_explorer.events import EventDecoder, EventRegistry  # noqa: E402
+
+
+APPROVAL = EventDecoder.from_signature(
+    "Approval(address indexed owner, address indexed spender, uint256 value)"
+).topic0
+
+
+def make_receipts(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    tokens = [Web3.to_checksum_address(rng.randbytes(20)) for _ in range(100)]
+    accounts = [HexBytes(b"\x00" * 12 + rng.randbytes(20)) for _ in range(5000)]
+
+    def _addr_topic(rng: random.Random) -> HexBytes:
+        return rng.choice(accounts)
+
+    receipts = []
+    for i in range(n):
+        token = rng.choice(tokens)
+        amount = HexBytes(rng.getrandbits(96).to_bytes(32, "big"))
+        logs = [
+            SimpleNamespace(address=token, topics=[TRANSFER_SIG, _addr_topic(rng), _addr_topic(rng)],
+                            data=amount, logIndex=0),
+            SimpleNamespace(address=token, topics=[HexBytes(APPROVAL), _addr_topic(rng), _addr_topic(rng)],
+                            data=amount, logIndex=1),
+            SimpleNamespace(address=token, topics=[TRANSFER_SIG, _addr_topic(rng), _addr_topic(rng)],
+                            data=amount, logIndex=2),
+            SimpleNamespace(address=token, topics=[HexBytes(rng.randbytes(32))], data=HexBytes(b""), logIndex=3),
+        ]
+        receipts.append(SimpleNamespace(transactionHash=HexBytes(rng.randbytes(32)), logs=logs))
+    return receipts
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    receipts = make_receipts(n)
+    n_logs = 4 * n
+    tx = SimpleNamespace(hash=HexBytes(b"\x01" * 32))
+    gas = {"gas": 0, "gasPrice": 0, "maxFeePerGas": None, "maxPriorityFeePerGas": None,
+           "gasUsed": 0, "effectiveGasPrice": 0, "tx_type": 0}
+
+    addresses = AddressTable()
+
+    def transfer_only():
+        for r in receipts:
+            _extract_erc20_transfers(tx, r, 0, "Legacy", gas, None, addresses)
+
+    registry = EventRegistry.with_builtins()
+
+    def dispatch():
+        registry.decode_receipts(receipts)
+
+    baseline = _time(transfer_only)
+    table = _time(dispatch)
+    print(f"receipts={n} logs={n_logs}")
+    print(f"transfer-only path : {n_logs / baseline:12,.0f} logs/s ({baseline:.3f}s)")
+    print(f"registry dispatch  : {n_logs / table:12,.0f} logs/s ({table:.3f}s)  [{len(registry)} events]")
+    print(f"registry / transfer-only time: {table / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark: transfer graph ingest, CSR index build, k-hop and top-flow queries.
+
+Run from the repo root (no node needed):
+    python benchmarks/bench_graph.py [n_edges]
+
+Synthetic transfers between 200k accounts with skewed activity (a few hot
+accounts, e.g. exchanges and routers, take a large share of the edges),
+over 100 tokens plus ETH, spread over 50k blocks in block order. Reports
+ingest rate, index build time, memory per edge, and query latencies from a
+typical (cold) and a hot account.
+"""
+
+import gc
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from eth_tx_explorer.graph import TransferGraph  # noqa: E402
+
+N_ACCOUNTS = 200_000
+N_BLOCKS = 50_000
+
+
+def make_edges(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    accounts = [rng.randbytes(20) for _ in range(N_ACCOUNTS)]
+    tokens = [rng.randbytes(20) for _ in range(100)] + [None]
+
+    def account():
+        # Pareto-ish: index ~ N * u^3 concentrates activity on low indexes.
+        return accounts[int(N_ACCOUNTS * rng.random() ** 3)]
+
+    return [
+        (account(), account(), rng.choice(tokens), rng.getrandbits(rng.choice((40, 80, 100))), i * N_BLOCKS // n)
+        for i in range(n)
+    ], accounts
+
+
+def _ms(fn, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e3, result
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    edges, accounts = make_edges(n)
+    graph = TransferGraph()
+
+    started = time.perf_counter()
+    for e in edges:
+        graph.add_transfer(*e)
+    ingest = time.perf_counter() - started
+    # The graph holds no per-edge objects; drop the input tuples so the
+    # collector does not rescan them during the queries below.
+    more = edges[: n // 100]
+    del edges
+    gc.collect()
+
+    started = time.perf_counter()
+    graph.reach(accounts[0], hops=1)
+    graph.reach(accounts[0], hops=1, direction="in")
+    index = time.perf_counter() - started
+
+    print(f"edges={n:,} addresses={len(graph.addresses):,}")
+    print(f"ingest        : {n / ingest:12,.0f} edges/s ({ingest:.2f}s)")
+    print(f"index (both)  : {index * 1e3:10.0f} ms")
+    print(f"memory        : {graph.nbytes / n:10.1f} bytes/edge incl. both CSR indexes ({graph.nbytes / 2**20:.0f} MiB)")
+
+    cold, hot = accounts[N_ACCOUNTS - 1], accounts[0]
+    for name, address in (("typical", cold), ("hot", hot)):
+        degree = sum(1 for _ in graph.edges(graph.addresses.intern(address)))
+        print(f"{name} account (out-degree {degree:,}):")
+        for hops in (1, 2, 3):
+            ms, reached = _ms(lambda: graph.reach(address, hops=hops, start_block=N_BLOCKS // 2))
+            print(f"  reach hops={hops}   : {ms:9.2f} ms  {len(reached) - 1:>9,} addresses")
+        ms, flows = _ms(lambda: graph.top_flows(address, limit=10))
+        print(f"  top_flows      : {ms:9.2f} ms  {len(flows)} rows")
+
+    started = time.perf_counter()
+    for e in more:
+        graph.add_transfer(*e)
+    ms, _ = _ms(lambda: graph.reach(cold, hops=2), repeat=1)
+    append = time.perf_counter() - started
+    print(f"append {len(more):,} edges + first query (tail, no rebuild): {append * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Benchmark: block-transfers text output vs per-record click.echo + from_wei.
+
+Run from the repo root (no node needed):
+    python benchmarks/bench_render.py [n_records]
+
+The legacy path is the pre-renderer block-transfers loop (Decimal from_wei
+per amount, one echo per record and separator). The new path runs the
+block-transfers command itself, with record extraction stubbed out, so the
+timing covers its real write (click.echo to stdout). Both write to a
+buffered text stream on os.devnull, where every flush is a real write().
+Outputs are checked to be byte-identical before timing.
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import click  # noqa: E402
+from web3 import Web3  # noqa: E402
+
+from eth_tx_explorer import cli  # noqa: E402
+from eth_tx_explorer.formatters import TransferRenderer  # noqa: E402
+
+
+def legacy_summary(w3, record: dict) -> str:
+    lines = [
+        f"TransferType: {record['transfer_type']}",
+        f"Transaction: {record['tx_hash']}",
+        f"TransactionIndex: {record['transaction_index']}",
+        f"EnvelopeType: {record['envelope_type']}",
+    ]
+    from_addr = record.get("from_addr") or ""
+    to_addr = record.get("to_addr") or "(contract creation)"
+    lines.append(f"From: {from_addr} → To: {to_addr}")
+    if record["transfer_type"] == "ERC20_TRANSFER":
+        lines.append(f"Token Contract: {record['token_contract']}")
+        lines.append(f"Token Amount: {record['token_value']} (raw uint256)")
+    else:
+        lines.append(f"Value: {w3.from_wei(record.get('eth_value_wei') or 0, 'ether')} ETH")
+    lines.append(f"Gas: {record.get('gas') or 0} limit | {record.get('gasUsed') or 0} used")
+    t = record.get("tx_type", 0)
+    if t == 2:
+        lines.append("Type: EIP-1559")
+        if record.get("maxFeePerGas") is not None:
+            lines.append(f"Max Fee: {w3.from_wei(record['maxFeePerGas'], 'gwei')} gwei")
+        if record.get("maxPriorityFeePerGas") is not None:
+            lines.append(f"Max Priority: {w3.from_wei(record['maxPriorityFeePerGas'], 'gwei')} gwei")
+    else:
+        lines.append("Type: Legacy" if t == 0 else "Type: EIP-2930")
+        if record.get("gasPrice") is not None:
+            lines.append(f"Gas Price: {w3.from_wei(record['gasPrice'], 'gwei')} gwei")
+    if record.get("effectiveGasPrice") is not None:
+        lines.append(f"Effective Price: {w3.from_wei(record['effectiveGasPrice'], 'gwei')} gwei")
+    return "\n".join(lines)
+
+
+def legacy_render(block_number: int, records, out) -> None:
+    click.echo(f"Block {block_number} — {len(records)} transfer(s) found", file=out)
+    click.echo("=" * 60, file=out)
+    for r in records:
+        click.echo(legacy_summary(Web3, r), file=out)
+        click.echo("-" * 60, file=out)
+
+
+def make_records(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    addresses = [Web3.to_checksum_address("0x" + rng.randbytes(20).hex()) for _ in range(200)]
+    base_fee = 23_417_902_114
+    records = []
+    for i in range(n):
+        erc20 = rng.random() < 0.6
+        tip = rng.choice((10**8, 10**9, 2 * 10**9, 1_500_000_000))
+        records.append({
+            "transfer_type": "ERC20_TRANSFER" if erc20 else "ETH_SIMPLE_TRANSFER",
+            "tx_hash": "0x" + rng.randbytes(32).hex(),
+            "transaction_index": i,
+            "envelope_type": "EIP-1559",
+            "from_addr": rng.choice(addresses),
+            "to_addr": rng.choice(addresses),
+            "eth_value_wei": None if erc20 else rng.getrandbits(64),
+            "token_contract": rng.choice(addresses[:20]) if erc20 else None,
+            "token_value": rng.getrandbits(80) if erc20 else None,
+            "gas": 120_000,
+            "gasUsed": rng.randint(21_000, 120_000),
+            "gasPrice": None,
+            "maxFeePerGas": 2 * base_fee + tip,
+            "maxPriorityFeePerGas": tip,
+            "effectiveGasPrice": base_fee + tip,
+            "tx_type": 2,
+        })
+    return records
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def cli_render(block_number: int, records, out, layout: str = "blocks") -> None:
+    """The block-transfers command writing records for block_number to out."""
+    with contextlib.redirect_stdout(out):
+        cli.block_transfers.main([str(block_number), "--layout", layout], standalone_mode=False)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    records = make_records(n)
+    cli.get_web3 = lambda: None
+    cli.process_block_transfers = lambda w3, block_number, **options: records
+
+    expected, actual = io.StringIO(), io.StringIO()
+    legacy_render(19_000_000, records, expected)
+    cli_render(19_000_000, records, actual)
+    assert actual.getvalue() == expected.getvalue()
+    assert TransferRenderer().render_block(19_000_000, records) == expected.getvalue()
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        legacy = _time(lambda: legacy_render(19_000_000, records, devnull))
+        blocks = _time(lambda: cli_render(19_000_000, records, devnull))
+        table = _time(lambda: cli_render(19_000_000, records, devnull, "table"))
+    print(f"records={n} (output byte-identical)")
+    print(f"legacy echo + from_wei    : {n / legacy:12,.0f} records/s ({legacy:.3f}s)")
+    print(f"block-transfers, blocks   : {n / blocks:12,.0f} records/s ({blocks:.3f}s)  {legacy / blocks:.1f}x")
+    print(f"block-transfers, table    : {n / table:12,.0f} records/s ({table:.3f}s)  {legacy / table:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark: result-cache reads vs reprocessing blocks, and encoded size.
+
+Run from the repo root (no node needed):
+    python benchmarks/bench_resultcache.py [n_blocks]
+
+Synthetic blocks of 150 txs (1/3 plain ETH sends, 2/3 token calls with two
+Transfer logs each) are served from memory, so the "reprocess" column is the
+CPU cost of process_block_transfers alone; the RPC calls it makes are
+counted, and against a real node each is a round trip on top. The cached
+column is one sqlite read + decode per finalized block. Also compares the encoded size with JSON.
+"""
+
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from hexbytes import HexBytes  # noqa: E402
+from web3 import Web3  # noqa: E402
+from web3.datastructures import AttributeDict  # noqa: E402
+
+from eth_tx_explorer.addresses import AddressTable  # noqa: E402
+from eth_tx_explorer.bloom import bloom_for_logs  # noqa: E402
+from eth_tx_explorer.core import TRANSFER_SIG, process_block_transfers  # noqa: E402
+from eth_tx_explorer.formatters import transfer_record_to_json  # noqa: E402
+from eth_tx_explorer.resultcache import TransferCache, cached_block_transfers, encode_records  # noqa: E402
+
+FIRST_BLOCK = 19_000_000
+
+
+class _MemoryEth:
+    def __init__(self, n_blocks: int, seed: int = 1):
+        rng = random.Random(seed)
+        tokens = [Web3.to_checksum_address(rng.randbytes(20)) for _ in range(100)]
+        accounts = [Web3.to_checksum_address(rng.randbytes(20)) for _ in range(5000)]
+        self.blocks, self.receipts, self.contracts = {}, {}, set(t.lower() for t in tokens)
+        self.calls = 0
+        for n in range(FIRST_BLOCK, FIRST_BLOCK + n_blocks):
+            txs, block_logs = [], []
+            for i in range(150):
+                h = HexBytes(rng.randbytes(32))
+                token_call = i % 3 != 0
+                to = rng.choice(tokens) if token_call else rng.choice(accounts)
+                txs.append(AttributeDict({
+                    "hash": h, "from": rng.choice(accounts), "to": to, "value": 0 if token_call else 10**17,
+                    "type": 2, "gas": 90_000, "maxFeePerGas": 3 * 10**10, "maxPriorityFeePerGas": 10**9,
+                }))
+                logs = [
+                    AttributeDict({
+                        "address": to,
+                        "topics": [TRANSFER_SIG, HexBytes(b"\x00" * 12 + bytes.fromhex(rng.choice(accounts)[2:])),
+                                   HexBytes(b"\x00" * 12 + bytes.fromhex(rng.choice(accounts)[2:]))],
+                        "data": HexBytes(rng.getrandbits(80).to_bytes(32, "big")),
+                    })
+                    for _ in range(2 if token_call else 0)
+                ]
+                block_logs += logs
+                self.receipts[Web3.to_hex(h)] = AttributeDict({
+                    "logs": logs, "gasUsed": 51_000, "effectiveGasPrice": 2 * 10**10,
+                    "logsBloom": bloom_for_logs(logs),
+                })
+            self.blocks[n] = AttributeDict({
+                "number": n, "hash": HexBytes(rng.randbytes(32)), "timestamp": 0,
+                "logsBloom": bloom_for_logs(block_logs), "transactions": txs,
+            })
+
+    def get_block(self, number, full_transactions=False):
+        self.calls += 1
+        return self.blocks[number]
+
+    def get_transaction_receipt(self, tx_hash):
+        self.calls += 1
+        return self.receipts[tx_hash if isinstance(tx_hash, str) else Web3.to_hex(tx_hash)]
+
+    def get_code(self, address, block_identifier=None):
+        self.calls += 1
+        return HexBytes(b"\x60\x80\x60\x40" if address.lower() in self.contracts else b"")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    w3 = AttributeDict({"eth": _MemoryEth(n)})
+    numbers = range(FIRST_BLOCK, FIRST_BLOCK + n)
+
+    started = time.perf_counter()
+    addresses = AddressTable()
+    records = [process_block_transfers(w3, b, addresses=addresses) for b in numbers]
+    reprocess = time.perf_counter() - started
+    reprocess_calls = w3.eth.calls
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "transfers.sqlite"
+        with TransferCache(path, final_through=FIRST_BLOCK + n) as cache:
+            for b in numbers:
+                cached_block_transfers(w3, b, cache)
+        w3.eth.calls = 0
+        started = time.perf_counter()
+        with TransferCache(path, final_through=FIRST_BLOCK + n) as cache:
+            addresses = AddressTable()
+            cached = [cached_block_transfers(w3, b, cache, addresses=addresses) for b in numbers]
+            assert cache.hits == n
+        read = time.perf_counter() - started
+        cached_calls = w3.eth.calls
+    assert cached == records
+
+    encoded = sum(len(encode_records(r)) for r in records)
+    as_json = sum(len(json.dumps([transfer_record_to_json(x) for x in r], default=str)) for r in records)
+    n_records = sum(len(r) for r in records)
+    print(f"blocks={n} records={n_records} ({n_records / n:.0f}/block)")
+    print(f"reprocess (in-memory RPC): {reprocess / n * 1e3:8.2f} ms/block  {reprocess_calls / n:6.1f} RPC calls/block")
+    print(f"cache read + decode      : {read / n * 1e3:8.2f} ms/block  {cached_calls / n:6.1f} RPC calls/block "
+          f"({reprocess / read:.1f}x less CPU)")
+    print(f"encoded size             : {encoded / n / 1024:8.1f} KiB/block  (JSON {as_json / n / 1024:.1f} KiB, "
+          f"{as_json / encoded:.1f}x larger)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Benchmark: per-call latency and pipelined throughput across RPC transports.
+
+Run from the repo root (no node needed):
+    python benchmarks/bench_transports.py [n_calls] [service_ms]
+
+Starts local stand-in JSON-RPC servers (HTTP, WebSocket, Unix socket IPC)
+that answer eth_getTransactionReceipt with a fixed receipt after service_ms
+(default 0; replies are produced concurrently, as a node does). Reports
+sequential per-call latency for each transport, then the time to fetch
+n_calls receipts with PIPELINE_DEPTH requests in flight.
+"""
+
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from web3 import Web3  # noqa: E402
+from websockets.sync.server import serve as ws_serve  # noqa: E402
+
+from eth_tx_explorer.transports import PIPELINE_DEPTH, provider_for_url  # noqa: E402
+
+SERVICE_S = 0.0
+
+RECEIPT = {
+    "blockHash": "0x" + "ab" * 32, "blockNumber": "0x121eac0", "contractAddress": None,
+    "cumulativeGasUsed": "0x1c9c380", "effectiveGasPrice": "0x5d21dba00", "from": "0x" + "11" * 20,
+    "gasUsed": "0xb411", "logs": [{
+        "address": "0x" + "22" * 20, "topics": ["0x" + "33" * 32, "0x" + "00" * 12 + "44" * 20,
+                                               "0x" + "00" * 12 + "55" * 20],
+        "data": "0x" + "00" * 31 + "01", "logIndex": "0x1", "removed": False,
+    }],
+    "logsBloom": "0x" + "00" * 256, "status": "0x1", "to": "0x" + "22" * 20, "transactionIndex": "0x7",
+    "type": "0x2",
+}
+
+
+def _reply(raw: str) -> str:
+    if SERVICE_S:
+        time.sleep(SERVICE_S)
+    request = json.loads(raw)
+    result = dict(RECEIPT, transactionHash=(request.get("params") or ["0x"])[0])
+    return json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": result})
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle + delayed
+    # ACK add ~40ms to every keep-alive request.
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = _reply(self.rfile.read(int(self.headers["Content-Length"])).decode()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _HTTPHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def start_ws() -> str:
+    workers = ThreadPoolExecutor(64)
+
+    def handler(ws):
+        lock = threading.Lock()
+
+        def answer(message):
+            text = _reply(message)
+            with lock:
+                ws.send(text)
+
+        for message in ws:
+            workers.submit(answer, message)
+
+    server = ws_serve(handler, "127.0.0.1", 0, compression=None)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"ws://127.0.0.1:{server.socket.getsockname()[1]}"
+
+
+def start_ipc() -> str:
+    path = os.path.join(tempfile.mkdtemp(), "node.ipc")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    workers = ThreadPoolExecutor(64)
+
+    def connection(conn):
+        lock, decoder, buf = threading.Lock(), json.JSONDecoder(), ""
+
+        def answer(message):
+            data = (_reply(message) + "\n").encode()
+            with lock:
+                conn.sendall(data)
+
+        while True:
+            chunk = conn.recv(1 << 16)
+            if not chunk:
+                return
+            buf += chunk.decode()
+            while True:
+                buf = buf.lstrip()
+                try:
+                    value, end = decoder.raw_decode(buf)
+                except ValueError:
+                    break
+                buf = buf[end:]
+                workers.submit(answer, json.dumps(value))
+
+    def accept():
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=connection, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return path
+
+
+def _hash(i: int) -> str:
+    return f"0x{i:064x}"
+
+
+def sequential(provider, n: int):
+    latencies = []
+    for i in range(n):
+        started = time.perf_counter()
+        provider.make_request("eth_getTransactionReceipt", [_hash(i)])
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies) * 1e6, statistics.mean(latencies) * 1e6
+
+
+def pipelined(w3: Web3, n: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(PIPELINE_DEPTH) as pool:
+        list(pool.map(w3.eth.get_transaction_receipt, (_hash(i) for i in range(n))))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    global SERVICE_S
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    SERVICE_S = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+    urls = {"http": start_http(), "ws": start_ws(), "ipc": start_ipc()}
+    providers = {name: provider_for_url(url) for name, url in urls.items()}
+    providers["ipc (web3 IPCProvider)"] = Web3.IPCProvider(urls["ipc"])
+    for p in providers.values():
+        p.make_request("eth_getTransactionReceipt", [_hash(0)])  # connect / warm up
+
+    print(f"calls={n} service={SERVICE_S * 1000:.1f}ms")
+    print("sequential make_request latency (us):")
+    for name, p in providers.items():
+        p50, mean = sequential(p, n)
+        print(f"  {name:24s} p50 {p50:8.1f}  mean {mean:8.1f}")
+    print(f"w3.eth.get_transaction_receipt x{n}, {PIPELINE_DEPTH} threads:")
+    for name, p in providers.items():
+        elapsed = pipelined(Web3(p), n)
+        print(f"  {name:24s} {elapsed:7.3f}s  {n / elapsed:10,.0f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Address interning.
+
+Long scans see the same routers, tokens and EOAs thousands of times. An
+AddressTable maps each distinct 20-byte address to a dense integer ID once and
+memoizes its lowercase and EIP-55 checksum renderings, so the keccak behind a
+checksum runs once per address rather than once per record, and every record
+mentioning an address shares one string object.
+"""
+
+from typing import Dict, List, Optional
+
+from web3 import Web3
+
+from eth_tx_explorer.watchlist import AddressLike, address_key
+
+
+class AddressTable:
+    """
+    Interned addresses: 20-byte value <-> integer ID, with cached renderings.
+
+    IDs are assigned in first-seen order and never change, so they can key
+    caches (e.g. contract code lookups) in place of address strings.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[bytes, int] = {}
+        # Exact input text -> ID, so repeated strings skip hex decoding.
+        self._text_ids: Dict[str, int] = {}
+        self._raw: List[bytes] = []
+        self._lower: List[Optional[str]] = []
+        self._checksum: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __contains__(self, address: AddressLike) -> bool:
+        if isinstance(address, str) and address in self._text_ids:
+            return True
+        try:
+            return address_key(address) in self._ids
+        except ValueError:
+            return False
+
+    def _intern_raw(self, raw: bytes) -> int:
+        i = self._ids.get(raw)
+        if i is None:
+            i = self._ids[raw] = len(self._raw)
+            self._raw.append(raw)
+            self._lower.append(None)
+            self._checksum.append(None)
+        return i
+
+    def intern(self, address: AddressLike) -> int:
+        """ID for a hex address string (any case) or 20 address bytes."""
+        if isinstance(address, str):
+            i = self._text_ids.get(address)
+            if i is None:
+                i = self._text_ids[address] = self._intern_raw(address_key(address))
+            return i
+        return self._intern_raw(address_key(address))
+
+    def intern_topic(self, topic: AddressLike) -> int:
+        """ID for the address held in a 32-byte indexed topic (bytes or hex)."""
+        if isinstance(topic, str):
+            return self.intern(topic[-40:])
+        # bytes() first: slicing a HexBytes topic goes through Python-level __getitem__.
+        return self._intern_raw(bytes(topic)[12:32])
+
+    def raw(self, address_id: int) -> bytes:
+        return self._raw[address_id]
+
+    def lower(self, address_id: int) -> str:
+        """0x-prefixed lowercase hex, computed once per address."""
+        s = self._lower[address_id]
+        if s is None:
+            s = self._lower[address_id] = "0x" + self._raw[address_id].hex()
+        return s
+
+    def checksum(self, address_id: int) -> str:
+        """EIP-55 checksum address, computed once per address."""
+        s = self._checksum[address_id]
+        if s is None:
+            s = self._checksum[address_id] = Web3.to_checksum_address(self._raw[address_id])
+        return s
@@ -0,0 +1,530 @@
+"""Append-only binary block archive for offline reprocessing.
+
+Layout of ``PATH`` (little-endian):
+
+    header   b"ETXA" u16 version
+    record*  u32 length, then one block:
+               block   u64 number, u64 timestamp, u32 tx_count, 32s hash, 256s logsBloom
+               tx*     u32 entry length, fixed fields (_TX), then log*
+               log     20s address, u32 logIndex, u8 topic count, u32 data length,
+                       32s topic * count, data
+
+``PATH.idx`` is an append-only array of (u64 block number, u64 record offset).
+
+Hashes and addresses are stored as raw fixed-width bytes. Reading maps the
+file with mmap and hands out lazy views (memoryview slices + struct offsets):
+a field is only decoded when accessed. ArchiveWeb3 serves the subset of
+``w3.eth`` that process_block_transfers uses, so reprocessing runs entirely
+offline at disk speed.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from web3 import Web3
+from web3.types import HexBytes
+
+from eth_tx_explorer.addresses import AddressTable
+from eth_tx_explorer.core import fetch_transfer_receipts, is_contract
+
+
+MAGIC = b"ETXA"
+VERSION = 1
+
+_FILE_HEADER = struct.Struct("<4sH")
+_LEN = struct.Struct("<I")
+_BLOCK = struct.Struct("<QQI32s256s")
+_INDEX_ENTRY = struct.Struct("<QQ")
+# hash, from, to, flags, type, value(u256), gas, gasPrice, maxFeePerGas,
+# maxPriorityFeePerGas (u128 each), gasUsed, effectiveGasPrice (u128),
+# transactionIndex, log count
+_TX = struct.Struct("<32s20s20sBB32sQ16s16s16sQ16sII")
+_LOG = struct.Struct("<20sIBI")
+
+# _TX flags
+_HAS_TO = 1
+_TO_IS_CONTRACT = 2
+_STATUS_OK = 4
+_HAS_GAS_PRICE = 8
+_HAS_MAX_FEE = 16
+_HAS_MAX_PRIORITY = 32
+_HAS_EFFECTIVE = 64
+
+# get_code() only knows whether an address had code; any non-empty value works
+# for is_contract(), so a fixed placeholder is returned for contracts.
+CODE_PRESENT = HexBytes(b"\xfe" * 3)
+
+# Byte offsets of the fixed tx fields inside an entry (after the u32 length).
+_TX_OFF = 4
+_OFF_HASH = _TX_OFF
+_OFF_FROM = _OFF_HASH + 32
+_OFF_TO = _OFF_FROM + 20
+_OFF_FLAGS = _OFF_TO + 20
+_OFF_TYPE = _OFF_FLAGS + 1
+_OFF_VALUE = _OFF_TYPE + 1
+_OFF_GAS = _OFF_VALUE + 32
+_OFF_GAS_PRICE = _OFF_GAS + 8
+_OFF_MAX_FEE = _OFF_GAS_PRICE + 16
+_OFF_MAX_PRIORITY = _OFF_MAX_FEE + 16
+_OFF_GAS_USED = _OFF_MAX_PRIORITY + 16
+_OFF_EFFECTIVE = _OFF_GAS_USED + 8
+_OFF_TX_INDEX = _OFF_EFFECTIVE + 16
+_OFF_LOG_COUNT = _OFF_TX_INDEX + 4
+_OFF_LOGS = _TX_OFF + _TX.size
+
+_U64 = struct.Struct("<Q")
+_U32 = struct.Struct("<I")
+
+
+def _uint(value: Optional[int], width: int) -> bytes:
+    return (value or 0).to_bytes(width, "big")
+
+
+def _addr_bytes(address: Optional[str]) -> bytes:
+    return bytes.fromhex(address[2:]) if address else b"\x00" * 20
+
+
+def encode_block(
+    block: Any,
+    receipts: Dict[str, Any],
+    contracts: Dict[str, bool],
+) -> bytes:
+    """
+    Serialize one block (full transactions) with its receipts.
+
+    receipts maps lowercase tx hash -> receipt; txs without a receipt are
+    skipped. contracts maps lowercase address -> has code at this block.
+    """
+    entries: List[bytes] = []
+    for tx in block.transactions:
+        tx_hash = Web3.to_hex(tx["hash"]).lower()
+        receipt = receipts.get(tx_hash)
+        if receipt is None:
+            continue
+        to_addr = tx.get("to")
+        flags = 0
+        if to_addr:
+            flags |= _HAS_TO
+            if contracts.get(to_addr.lower()):
+                flags |= _TO_IS_CONTRACT
+        if receipt.get("status", 1) == 1:
+            flags |= _STATUS_OK
+        gas_price = tx.get("gasPrice") if tx.get("type", 0) != 2 else None
+        max_fee = tx.get("maxFeePerGas")
+        max_priority = tx.get("maxPriorityFeePerGas")
+        effective = receipt.get("effectiveGasPrice")
+        flags |= (_HAS_GAS_PRICE if gas_price is not None else 0)
+        flags |= (_HAS_MAX_FEE if max_fee is not None else 0)
+        flags |= (_HAS_MAX_PRIORITY if max_priority is not None else 0)
+        flags |= (_HAS_EFFECTIVE if effective is not None else 0)
+        logs = list(receipt.get("logs") or [])
+        parts = [_TX.pack(
+            bytes(tx["hash"]),
+            _addr_bytes(tx["from"]),
+            _addr_bytes(to_addr),
+            flags,
+            tx.get("type", 0) or 0,
+            _uint(tx.get("value"), 32),
+            tx.get("gas") or 0,
+            _uint(gas_price, 16),
+            _uint(max_fee, 16),
+            _uint(max_priority, 16),
+            receipt.get("gasUsed") or 0,
+            _uint(effective, 16),
+            receipt.get("transactionIndex") or 0,
+            len(logs),
+        )]
+        for log in logs:
+            topics = list(log["topics"])
+            data = bytes(log["data"])
+            parts.append(_LOG.pack(_addr_bytes(log["address"]), log["logIndex"], len(topics), len(data)))
+            parts.extend(bytes(t) for t in topics)
+            parts.append(data)
+        body = b"".join(parts)
+        entries.append(_LEN.pack(len(body) + 4) + body)
+    header = _BLOCK.pack(
+        block.number,
+        block.timestamp,
+        len(entries),
+        bytes(block.get("hash") or b"\x00" * 32),
+        bytes(block.get("logsBloom") or b"\x00" * 256),
+    )
+    return header + b"".join(entries)
+
+
+def _check_header(header: bytes, path: str) -> None:
+    """Raise ValueError unless header is this version's archive file header."""
+    if len(header) < _FILE_HEADER.size or _FILE_HEADER.unpack(header) != (MAGIC, VERSION):
+        raise ValueError(f"{path} is not an eth-tx-explorer archive (v{VERSION})")
+
+
+class ArchiveWriter:
+    """Append blocks to an archive (creating it if needed); already archived blocks are skipped."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.index_path = path + ".idx"
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            # Never append records to a file that is not an archive of this version.
+            with open(path, "rb") as f:
+                _check_header(f.read(_FILE_HEADER.size), path)
+        self._data = open(path, "ab")
+        self._index = open(self.index_path, "ab")
+        if new:
+            self._data.write(_FILE_HEADER.pack(MAGIC, VERSION))
+        self._known = set(_read_index(self.index_path)[0])
+
+    def __contains__(self, block_number: int) -> bool:
+        return block_number in self._known
+
+    def append(self, block_number: int, payload: bytes) -> None:
+        offset = self._data.tell()
+        self._data.write(_LEN.pack(len(payload)) + payload)
+        self._data.flush()
+        self._index.write(_INDEX_ENTRY.pack(block_number, offset))
+        self._index.flush()
+        self._known.add(block_number)
+
+    def close(self) -> None:
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def archive_block(w3: Web3, writer: ArchiveWriter, block_number: int) -> bool:
+    """Fetch one block + receipts + contract flags and append it. False if already archived."""
+    if block_number in writer:
+        return False
+    block = w3.eth.get_block(block_number, full_transactions=True)
+    if not block:
+        raise ValueError(f"Block {block_number} not found")
+    receipts = {
+        Web3.to_hex(tx["hash"]).lower(): r
+        for tx, r in fetch_transfer_receipts(w3, list(block.transactions))
+    }
+    contract_cache: Dict[str, bool] = {}
+    for tx in block.transactions:
+        if tx.get("value") and tx.get("to"):
+            is_contract(w3, tx["to"], contract_cache, block_number)
+    writer.append(block_number, encode_block(block, receipts, contract_cache))
+    return True
+
+
+def _read_index(index_path: str) -> Tuple[array, array]:
+    numbers, offsets = array("Q"), array("Q")
+    if not os.path.exists(index_path):
+        return numbers, offsets
+    raw = array("Q")
+    with open(index_path, "rb") as f:
+        data = f.read()
+    raw.frombytes(data[: len(data) - len(data) % _INDEX_ENTRY.size])
+    if raw.itemsize != 8:
+        raise RuntimeError("array('Q') is not 64-bit on this platform")
+    if struct.pack("=Q", 1) != struct.pack("<Q", 1):
+        raw.byteswap()
+    pairs = sorted(zip(raw[0::2], raw[1::2]))
+    numbers.extend(p[0] for p in pairs)
+    offsets.extend(p[1] for p in pairs)
+    return numbers, offsets
+
+
+class ArchivedLog:
+    """Lazy view of one log entry."""
+
+    __slots__ = ("_archive", "_off", "transactionHash", "blockNumber")
+
+    def __init__(self, archive: "BlockArchive", off: int, tx_hash: HexBytes, block_number: int) -> None:
+        self._archive = archive
+        self._off = off
+        self.transactionHash = tx_hash
+        self.blockNumber = block_number
+
+    @property
+    def address(self) -> str:
+        return self._archive.checksum(self._archive.view[self._off:self._off + 20])
+
+    @property
+    def logIndex(self) -> int:
+        return _U32.unpack_from(self._archive.view, self._off + 20)[0]
+
+    @property
+    def topics(self) -> List[HexBytes]:
+        n = self._archive.view[self._off + 24]
+        start = self._off + _LOG.size
+        view = self._archive.view
+        return [HexBytes(view[start + 32 * i:start + 32 * (i + 1)]) for i in range(n)]
+
+    @property
+    def data(self) -> HexBytes:
+        view = self._archive.view
+        n = view[self._off + 24]
+        size = _U32.unpack_from(view, self._off + 25)[0]
+        start = self._off + _LOG.size + 32 * n
+        return HexBytes(view[start:start + size])
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+class ArchivedTx:
+    """
+    Lazy view of one transaction entry; also serves as its receipt.
+
+    Fields are decoded on access with the same names and types web3 returns
+    (checksummed address strings, HexBytes hashes, ints).
+    """
+
+    __slots__ = ("_archive", "_off", "blockNumber")
+
+    def __init__(self, archive: "BlockArchive", off: int, block_number: int) -> None:
+        self._archive = archive
+        self._off = off
+        self.blockNumber = block_number
+
+    def _flags(self) -> int:
+        return self._archive.view[self._off + _OFF_FLAGS]
+
+    def _u64(self, off: int) -> int:
+        return _U64.unpack_from(self._archive.view, self._off + off)[0]
+
+    def _u128(self, off: int, flag: int) -> Optional[int]:
+        if not self._flags() & flag:
+            return None
+        return int.from_bytes(self._archive.view[self._off + off:self._off + off + 16], "big")
+
+    def _hash(self) -> HexBytes:
+        return HexBytes(self._archive.view[self._off + _OFF_HASH:self._off + _OFF_HASH + 32])
+
+    def _to(self) -> Optional[str]:
+        if not self._flags() & _HAS_TO:
+            return None
+        return self._archive.checksum(self._archive.view[self._off + _OFF_TO:self._off + _OFF_TO + 20])
+
+    def _value(self) -> int:
+        return int.from_bytes(self._archive.view[self._off + _OFF_VALUE:self._off + _OFF_VALUE + 32], "big")
+
+    def _logs(self) -> List[ArchivedLog]:
+        view = self._archive.view
+        count = _U32.unpack_from(view, self._off + _OFF_LOG_COUNT)[0]
+        tx_hash = self._hash()
+        logs: List[ArchivedLog] = []
+        off = self._off + _OFF_LOGS
+        for _ in range(count):
+            logs.append(ArchivedLog(self._archive, off, tx_hash, self.blockNumber))
+            n_topics = view[off + 24]
+            size = _U32.unpack_from(view, off + 25)[0]
+            off += _LOG.size + 32 * n_topics + size
+        return logs
+
+    def __getattr__(self, key: str) -> Any:
+        decode = _TX_FIELDS.get(key)
+        if decode is None:
+            raise AttributeError(key)
+        return decode(self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        decode = _TX_FIELDS.get(key)
+        return decode(self) if decode is not None else default
+
+    def __getitem__(self, key: str) -> Any:
+        decode = _TX_FIELDS.get(key)
+        if decode is None:
+            raise KeyError(key)
+        return decode(self)
+
+    def contract_to(self) -> Optional[bytes]:
+        """Raw recipient address if it had code at this block, else None."""
+        if not self._flags() & _TO_IS_CONTRACT:
+            return None
+        return bytes(self._archive.view[self._off + _OFF_TO:self._off + _OFF_TO + 20])
+
+
+_TX_FIELDS: Dict[str, Callable[[ArchivedTx], Any]] = {
+    "hash": ArchivedTx._hash,
+    "transactionHash": ArchivedTx._hash,
+    "from": lambda tx: tx._archive.checksum(
+        tx._archive.view[tx._off + _OFF_FROM:tx._off + _OFF_FROM + 20]
+    ),
+    "to": ArchivedTx._to,
+    "value": ArchivedTx._value,
+    "type": lambda tx: tx._archive.view[tx._off + _OFF_TYPE],
+    "gas": lambda tx: tx._u64(_OFF_GAS),
+    "gasPrice": lambda tx: tx._u128(_OFF_GAS_PRICE, _HAS_GAS_PRICE),
+    "maxFeePerGas": lambda tx: tx._u128(_OFF_MAX_FEE, _HAS_MAX_FEE),
+    "maxPriorityFeePerGas": lambda tx: tx._u128(_OFF_MAX_PRIORITY, _HAS_MAX_PRIORITY),
+    "gasUsed": lambda tx: tx._u64(_OFF_GAS_USED),
+    "effectiveGasPrice": lambda tx: tx._u128(_OFF_EFFECTIVE, _HAS_EFFECTIVE),
+    "transactionIndex": lambda tx: _U32.unpack_from(tx._archive.view, tx._off + _OFF_TX_INDEX)[0],
+    "status": lambda tx: 1 if tx._flags() & _STATUS_OK else 0,
+    "logs": ArchivedTx._logs,
+}
+
+
+class ArchivedBlock:
+    """Lazy view of one block record."""
+
+    __slots__ = ("_archive", "_off", "number", "timestamp", "_tx_count")
+
+    def __init__(self, archive: "BlockArchive", off: int) -> None:
+        self._archive = archive
+        self._off = off
+        self.number, self.timestamp, self._tx_count = struct.unpack_from("<QQI", archive.view, off)
+
+    @property
+    def hash(self) -> HexBytes:
+        start = self._off + 20
+        return HexBytes(self._archive.view[start:start + 32])
+
+    @property
+    def logsBloom(self) -> HexBytes:
+        start = self._off + 52
+        return HexBytes(self._archive.view[start:start + 256])
+
+    def iter_transactions(self) -> Iterator[ArchivedTx]:
+        view = self._archive.view
+        off = self._off + _BLOCK.size
+        for _ in range(self._tx_count):
+            yield ArchivedTx(self._archive, off, self.number)
+            off += _U32.unpack_from(view, off)[0]
+
+    @property
+    def transactions(self) -> List[ArchivedTx]:
+        return list(self.iter_transactions())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+class BlockArchive:
+    """Read-only, memory-mapped archive file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            # Checked before mapping: mmap cannot map an empty file.
+            _check_header(self._file.read(_FILE_HEADER.size), path)
+        except ValueError:
+            self._file.close()
+            raise
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self._mmap)
+        self._numbers, self._offsets = _read_index(path + ".idx")
+        self.addresses = AddressTable()
+
+    def close(self) -> None:
+        self.view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "BlockArchive":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def __contains__(self, block_number: int) -> bool:
+        i = bisect_left(self._numbers, block_number)
+        return i < len(self._numbers) and self._numbers[i] == block_number
+
+    def block_numbers(self) -> array:
+        return self._numbers
+
+    def checksum(self, raw: memoryview) -> str:
+        addresses = self.addresses
+        return addresses.checksum(addresses.intern(bytes(raw)))
+
+    def block(self, block_number: int) -> ArchivedBlock:
+        i = bisect_left(self._numbers, block_number)
+        if i == len(self._numbers) or self._numbers[i] != block_number:
+            raise ValueError(f"Block {block_number} not in archive {self.path}")
+        # Skip the u32 record length prefix.
+        return ArchivedBlock(self, self._offsets[i] + _LEN.size)
+
+
+class _ArchiveEth:
+    """The part of ``w3.eth`` used by process_block_transfers, served from an archive."""
+
+    def __init__(self, archive: BlockArchive) -> None:
+        self._archive = archive
+        self._block: Optional[ArchivedBlock] = None
+        self._txs: Dict[str, ArchivedTx] = {}
+        self._contracts: set = set()
+
+    def _load(self, block_number: int) -> ArchivedBlock:
+        if self._block is None or self._block.number != block_number:
+            block = self._archive.block(block_number)
+            self._txs = {Web3.to_hex(tx._hash()).lower(): tx for tx in block.iter_transactions()}
+            self._contracts = {c for c in (tx.contract_to() for tx in self._txs.values()) if c}
+            self._block = block
+        return self._block
+
+    def get_block(self, block_identifier: Any, full_transactions: bool = False) -> ArchivedBlock:
+        if not isinstance(block_identifier, int):
+            raise ValueError(f"Archive lookups need a block number, got {block_identifier!r}")
+        return self._load(block_identifier)
+
+    def get_transaction_receipt(self, tx_hash: Any) -> ArchivedTx:
+        key = (tx_hash if isinstance(tx_hash, str) else Web3.to_hex(tx_hash)).lower()
+        tx = self._txs.get(key)
+        if tx is None:
+            raise ValueError(f"Transaction {key} not in the current archived block")
+        return tx
+
+    def get_code(self, address: str, block_identifier: Any = "latest") -> HexBytes:
+        if bytes.fromhex(address[2:]) in self._contracts:
+            return CODE_PRESENT
+        return HexBytes(b"")
+
+    def get_logs(self, log_filter: Dict[str, Any]) -> List[ArchivedLog]:
+        block = self._load(log_filter["fromBlock"])
+        if log_filter.get("toBlock", block.number) != block.number:
+            raise ValueError("Archive get_logs supports a single block")
+        addresses = log_filter.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        wanted_addresses = {a.lower() for a in addresses} if addresses else None
+        wanted_topics = [
+            None if t is None else {(x if isinstance(x, str) else Web3.to_hex(x)).lower()
+                                    for x in (t if isinstance(t, list) else [t])}
+            for t in log_filter.get("topics") or []
+        ]
+        out: List[ArchivedLog] = []
+        for tx in self._txs.values():
+            for log in tx.logs:
+                if wanted_addresses is not None and log.address.lower() not in wanted_addresses:
+                    continue
+                topics = log.topics
+                if len(topics) < len(wanted_topics):
+                    continue
+                if all(w is None or Web3.to_hex(t).lower() in w for t, w in zip(topics, wanted_topics)):
+                    out.append(log)
+        return out
+
+
+class ArchiveWeb3:
+    """Offline stand-in for Web3 backed by a BlockArchive (duck-typed ``.eth``)."""
+
+    def __init__(self, archive: BlockArchive) -> None:
+        self.archive = archive
+        self.eth = _ArchiveEth(archive)
+
+    @staticmethod
+    def from_wei(number: int, unit: str) -> Any:
+        return Web3.from_wei(number, unit)
@@ -0,0 +1,247 @@
+"""Timestamp -> block number resolution.
+
+Block timestamps increase strictly with block number, and post-merge blocks
+land on a 12 s slot grid, so interpolating between two known (number,
+timestamp) points lands within a few blocks of the answer. Each probe is one
+header fetch; when interpolation keeps failing to halve the bracket (uneven
+pre-merge block times) a bisection step is forced, so the worst case stays
+logarithmic.
+
+Finalized headers seen while resolving are appended to a sparse on-disk index
+(pairs of little-endian u64 number / timestamp), so later runs start from a
+tight bracket and often resolve without any RPC.
+"""
+
+import os
+import struct
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+from web3 import Web3
+
+
+# Blocks at least this far below head are treated as final (cached, persisted).
+DEFAULT_FINALITY_DEPTH = 64
+# How long a fetched head number is reused for finality checks (seconds).
+HEAD_TTL = 2.0
+
+_ENTRY = struct.Struct("<QQ")
+# Interpolation steps in a row that may fail to halve the bracket before one
+# bisection step is forced (keeps the worst case logarithmic).
+_MAX_SLOW_STEPS = 3
+
+
+def parse_timestamp(value: str) -> int:
+    """
+    Unix seconds from an integer epoch or an ISO 8601 date/time
+    (``2024-03-01T09:00``, ``2024-03-01 09:00:00Z``, ``2024-03-01``).
+    Times without an offset are UTC.
+    """
+    text = value.strip()
+    if text.isdigit():
+        return int(text)
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid time {value!r}: expected ISO 8601 (UTC) or unix seconds")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+class FinalityTracker:
+    """
+    Whether a block is at least finality_depth below the head. The head is
+    fetched with the fetch_head callable passed in, at most every HEAD_TTL
+    seconds; blocks already known to be final never trigger a fetch.
+    """
+
+    def __init__(self, finality_depth: int = DEFAULT_FINALITY_DEPTH, ttl: float = HEAD_TTL) -> None:
+        self.finality_depth = finality_depth
+        self.ttl = ttl
+        # Highest block known to be final, and when the head was last fetched.
+        self.final_through = -1
+        self._checked = float("-inf")
+
+    def is_final(self, block: Optional[int], fetch_head: Callable[[], Optional[int]]) -> bool:
+        """fetch_head() returns the head number (None if unavailable)."""
+        if block is None:
+            return False
+        if block <= self.final_through:
+            return True
+        if time.monotonic() - self._checked > self.ttl:
+            head = fetch_head()
+            self._checked = time.monotonic()
+            if head is not None:
+                self.final_through = max(self.final_through, head - self.finality_depth)
+        return block <= self.final_through
+
+
+def cache_dir() -> Path:
+    """eth-tx-explorer directory under $XDG_CACHE_HOME (default ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "eth-tx-explorer"
+
+
+def default_index_path(chain_id: int) -> Path:
+    """Per-chain header index under cache_dir()."""
+    return cache_dir() / f"headers-{chain_id}.bin"
+
+
+class HeaderIndex:
+    """
+    Sparse block number -> timestamp map, optionally backed by a file.
+
+    Entries added with persist=True are appended to the file on save();
+    others (unfinalized headers) only live for this process.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self._numbers: List[int] = []
+        self._times: List[int] = []
+        self._known = set()
+        self._pending: List[Tuple[int, int]] = []
+        if self.path is not None and self.path.exists():
+            data = self.path.read_bytes()
+            for number, timestamp in _ENTRY.iter_unpack(data[: len(data) - len(data) % _ENTRY.size]):
+                self._insert(number, timestamp)
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def _insert(self, number: int, timestamp: int) -> bool:
+        if number in self._known:
+            return False
+        self._known.add(number)
+        i = bisect_left(self._numbers, number)
+        self._numbers.insert(i, number)
+        self._times.insert(i, timestamp)
+        return True
+
+    def add(self, number: int, timestamp: int, persist: bool = True) -> None:
+        if self._insert(number, timestamp) and persist:
+            self._pending.append((number, timestamp))
+
+    @property
+    def last_number(self) -> Optional[int]:
+        return self._numbers[-1] if self._numbers else None
+
+    def bracket(self, timestamp: int) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """Nearest known entries with time < timestamp and time >= timestamp."""
+        i = bisect_left(self._times, timestamp)
+        below = (self._numbers[i - 1], self._times[i - 1]) if i > 0 else None
+        above = (self._numbers[i], self._times[i]) if i < len(self._times) else None
+        return below, above
+
+    def save(self) -> None:
+        if self.path is None or not self._pending:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(b"".join(_ENTRY.pack(n, t) for n, t in sorted(self._pending)))
+        self._pending = []
+
+
+class BlockTimeResolver:
+    """
+    Maps timestamps to block numbers with interpolation search over header
+    fetches (``w3.eth.get_block(n)``), seeded and updated by a HeaderIndex.
+    ``rpc_calls`` counts the header fetches made.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        index: Optional[HeaderIndex] = None,
+        finality_depth: int = DEFAULT_FINALITY_DEPTH,
+    ) -> None:
+        self.w3 = w3
+        self.index = index if index is not None else HeaderIndex()
+        self.finality_depth = finality_depth
+        self.rpc_calls = 0
+        self._head: Optional[Tuple[int, int]] = None
+        # Every indexed entry was final when stored.
+        self._final_through = self.index.last_number if self.index.last_number is not None else -1
+
+    def _header(self, block_identifier: Any) -> Tuple[int, int]:
+        block = self.w3.eth.get_block(block_identifier)
+        if not block:
+            raise ValueError(f"Block {block_identifier} not found")
+        self.rpc_calls += 1
+        number, timestamp = block.number, block.timestamp
+        self.index.add(number, timestamp, persist=number <= self._final_through)
+        return number, timestamp
+
+    def head(self) -> Tuple[int, int]:
+        """(number, timestamp) of the latest block, fetched once per resolver."""
+        if self._head is None:
+            self._head = self._header("latest")
+            self._final_through = self._head[0] - self.finality_depth
+        return self._head
+
+    def block_at_or_after(self, timestamp: int) -> Optional[int]:
+        """First block with timestamp >= the given one, or None if it is in the future."""
+        below, above = self.index.bracket(timestamp)
+        if above is None:
+            head = self.head()
+            if head[1] < timestamp:
+                return None
+            below, above = self.index.bracket(timestamp)
+        if below is None:
+            genesis = self._header(0)
+            if genesis[1] >= timestamp:
+                return 0
+            below = genesis
+        lo, t_lo = below
+        hi, t_hi = above
+        slow_steps = 0
+        while hi - lo > 1:
+            if slow_steps >= _MAX_SLOW_STEPS:
+                slow_steps = 0
+                guess = (lo + hi) // 2
+            else:
+                guess = lo + (timestamp - t_lo) * (hi - lo) // (t_hi - t_lo)
+                guess = min(max(guess, lo + 1), hi - 1)
+            width = hi - lo
+            number, t = self._header(guess)
+            if t < timestamp:
+                lo, t_lo = number, t
+            else:
+                hi, t_hi = number, t
+            slow_steps = slow_steps + 1 if (hi - lo) * 2 > width else 0
+        return hi
+
+    def block_range(self, from_timestamp: int, to_timestamp: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Inclusive (start, end) block numbers with from <= timestamp < to.
+        Without to_timestamp the range runs to the latest block.
+        """
+        if to_timestamp is not None and to_timestamp <= from_timestamp:
+            raise ValueError("--to-time must be later than --from-time")
+        start = self.block_at_or_after(from_timestamp)
+        if start is None:
+            raise ValueError("--from-time is after the latest block")
+        if to_timestamp is None:
+            end = self.head()[0]
+        else:
+            after = self.block_at_or_after(to_timestamp)
+            end = (after if after is not None else self.head()[0] + 1) - 1
+        if end < start:
+            raise ValueError("No blocks in the requested time range")
+        return start, end
+
+    def save(self) -> None:
+        self.index.save()
+
+
+def open_resolver(w3: Web3, index_path: Optional[Union[str, Path]] = None) -> BlockTimeResolver:
+    """Resolver with the chain's persistent header index (default under ~/.cache)."""
+    if index_path is None:
+        index_path = default_index_path(w3.eth.chain_id)
+    return BlockTimeResolver(w3, HeaderIndex(index_path))
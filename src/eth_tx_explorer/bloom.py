@@ -0,0 +1,112 @@
+"""logsBloom pre-filtering.
+
+Every block header (and receipt) carries a 2048-bit bloom of its log
+addresses and topics. A bloom has no false negatives, so if the Transfer
+topic (or every watched address) is absent, no receipt in the block can
+contain a matching log and the receipt downloads can be skipped.
+
+Each item sets 3 bits: the low 11 bits of the first three 16-bit words of
+keccak(item). Items are precompiled to a single int mask so a test is one
+``bloom & mask == mask``.
+"""
+
+from typing import Any, Iterable, List, Optional
+
+from eth_utils import keccak
+
+from eth_tx_explorer.watchlist import Watchlist
+
+
+BLOOM_BYTES = 256
+
+
+def bloom_mask(item: bytes) -> int:
+    """Integer mask of the 3 bloom bits set by item (bit 0 = last byte's LSB)."""
+    h = keccak(item)
+    mask = 0
+    for i in (0, 2, 4):
+        mask |= 1 << (((h[i] << 8) | h[i + 1]) & 2047)
+    return mask
+
+
+def bloom_for_logs(logs: Iterable[Any]) -> bytes:
+    """Build the logsBloom a node would report for these logs."""
+    value = 0
+    for log in logs:
+        value |= bloom_mask(bytes.fromhex(log["address"][2:]))
+        for topic in log["topics"]:
+            value |= bloom_mask(bytes(topic))
+    return value.to_bytes(BLOOM_BYTES, "big")
+
+
+def _bloom_int(bloom: Any) -> Optional[int]:
+    if bloom is None:
+        return None
+    if isinstance(bloom, str):
+        bloom = bytes.fromhex(bloom[2:] if bloom.startswith("0x") else bloom)
+    if len(bloom) != BLOOM_BYTES:
+        return None
+    return int.from_bytes(bloom, "big")
+
+
+class BloomStats:
+    """Counters for how much receipt traffic the bloom checks saved."""
+
+    def __init__(self) -> None:
+        self.blocks_checked = 0
+        self.blocks_skipped = 0
+        self.false_positives = 0
+        # Receipts not fetched: ruled out by the bloom, or with a watchlist by the log query.
+        self.receipts_skipped = 0
+
+    @property
+    def skip_rate(self) -> float:
+        return self.blocks_skipped / self.blocks_checked if self.blocks_checked else 0.0
+
+    @property
+    def false_positive_rate(self) -> float:
+        passed = self.blocks_checked - self.blocks_skipped
+        return self.false_positives / passed if passed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Bloom: {self.blocks_skipped}/{self.blocks_checked} block(s) skipped "
+            f"({self.skip_rate:.1%}), {self.false_positives} false positive(s) "
+            f"({self.false_positive_rate:.1%} of fetched), "
+            f"{self.receipts_skipped} receipt fetch(es) avoided"
+        )
+
+
+class LogBloomFilter:
+    """
+    Precompiled bloom query: topic0 must be present and, if addresses are
+    given, at least one of them as log emitter or as an indexed address topic.
+    """
+
+    def __init__(self, topic0: bytes, addresses: Optional[Watchlist] = None) -> None:
+        self._topic_mask = bloom_mask(bytes(topic0))
+        self._address_masks: List[int] = []
+        if addresses is not None:
+            for key in addresses.keys():
+                self._address_masks.append(bloom_mask(key))
+                self._address_masks.append(bloom_mask(b"\x00" * 12 + key))
+        self.stats = BloomStats()
+
+    def may_match(self, bloom: Any) -> bool:
+        """False only when bloom proves no matching log exists (unknown bloom -> True)."""
+        value = _bloom_int(bloom)
+        if value is None:
+            return True
+        if value & self._topic_mask != self._topic_mask:
+            return False
+        if not self._address_masks:
+            return True
+        return any(value & m == m for m in self._address_masks)
+
+    def check_block(self, bloom: Any) -> bool:
+        """may_match() for a block header, counted in stats."""
+        self.stats.blocks_checked += 1
+        if self.may_match(bloom):
+            return True
+        self.stats.blocks_skipped += 1
+        return False
@@ -1,10 +1,19 @@
 # src/eth_tx_explorer/cli.py
 import json
+from collections.abc import Callable
 from datetime import datetime
+from pathlib import Path
 from eth_tx_explorer.rpc import get_web3
 import click
 
+from eth_tx_explorer.addresses import AddressTable
+from eth_tx_explorer.blocktime import DEFAULT_FINALITY_DEPTH, open_resolver, parse_timestamp
+from eth_tx_explorer.bloom import LogBloomFilter
+from eth_tx_explorer.events import EventRegistry
 from eth_tx_explorer.core import (
+    ETH_INTERNAL_TRANSFER,
+    TRANSFER_SIG,
+    fetch_block_events,
     fetch_block_info,
     fetch_tx_info,
     print_erc20_logs,
@@ -12,14 +21,115 @@ from eth_tx_explorer.core import (
     process_block_transfers,
 )
 
+from eth_tx_explorer.archive import ArchiveWeb3, ArchiveWriter, BlockArchive, archive_block
+from eth_tx_explorer.traces import TRACERS, CALL_TRACER
+from eth_tx_explorer.watchlist import load_watchlist
+
+from eth_tx_explorer.graph import DIRECTIONS, ETH, TransferGraph
+from eth_tx_explorer.resultcache import cached_block_transfers, open_transfer_cache
+from eth_tx_explorer.sampling import (
+    DEFAULT_CONFIDENCE,
+    TRANSFER_METRICS,
+    SampleSpec,
+    estimate_range,
+    parse_sample_spec,
+    transfer_metrics,
+)
+
 from eth_tx_explorer.formatters import (
+    LAYOUTS,
+    TransferRenderer,
+    format_ether,
     format_tx_info,
-    format_transfer_summary,
+    transfer_record_to_json,
 )
 
 from eth_tx_explorer import __version__
 
 
+def time_range_options(f):
+    """--from-time / --to-time / --header-cache for commands that scan a block range."""
+    f = click.option(
+        "--header-cache",
+        type=click.Path(dir_okay=False),
+        default=None,
+        help="Header index used to resolve times (default: per-chain file under ~/.cache/eth-tx-explorer)",
+    )(f)
+    f = click.option(
+        "--to-time",
+        default=None,
+        help="End of the time range, exclusive (ISO 8601 UTC or unix seconds; default: latest block)",
+    )(f)
+    f = click.option(
+        "--from-time",
+        default=None,
+        help="Start of the time range (ISO 8601 UTC or unix seconds), instead of block numbers",
+    )(f)
+    return f
+
+
+def result_cache_options(f):
+    """--cache/--no-cache and --result-cache for commands that process block transfers."""
+    f = click.option(
+        "--result-cache",
+        type=click.Path(dir_okay=False),
+        default=None,
+        help="Result cache file (implies --cache)",
+    )(f)
+    f = click.option(
+        "--cache/--no-cache",
+        "use_cache",
+        default=None,
+        help="Read and write processed transfers in the result cache "
+        "(per-chain file under $XDG_CACHE_HOME/eth-tx-explorer; default: off)",
+    )(f)
+    return f
+
+
+def result_cache_enabled(use_cache: bool | None, result_cache: str | None) -> bool:
+    """Whether --cache / --result-cache turned the result cache on."""
+    if use_cache is False and result_cache is not None:
+        raise click.UsageError("--result-cache cannot be combined with --no-cache.")
+    return bool(use_cache) or result_cache is not None
+
+
+def resolve_block_range(
+    w3,
+    block_number: int | None,
+    end_block: int | None,
+    from_time: str | None,
+    to_time: str | None,
+    header_cache: str | None,
+) -> tuple[int, int]:
+    """Inclusive (start, end) blocks from BLOCK_NUMBER [END_BLOCK] or --from-time/--to-time."""
+    if from_time is None:
+        if to_time is not None:
+            raise click.UsageError("--to-time needs --from-time.")
+        if block_number is None:
+            raise click.UsageError("Provide BLOCK_NUMBER or --from-time.")
+        if end_block is not None and end_block < block_number:
+            raise click.UsageError("END_BLOCK must be >= BLOCK_NUMBER.")
+        return block_number, end_block if end_block is not None else block_number
+    if block_number is not None:
+        raise click.UsageError("Provide either BLOCK_NUMBER or --from-time, not both.")
+    try:
+        start_ts = parse_timestamp(from_time)
+        end_ts = parse_timestamp(to_time) if to_time is not None else None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    resolver = open_resolver(w3, header_cache)
+    try:
+        start, end = resolver.block_range(start_ts, end_ts)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    finally:
+        resolver.save()
+    click.echo(
+        f"Time range resolved to blocks {start}..{end} ({resolver.rpc_calls} header fetch(es))", err=True
+    )
+    return start, end
+
+
 @click.group(context_settings={"help_option_names": ["-h", "--help"]})
 @click.version_option(__version__, prog_name="eth-tx-explorer")
 def cli() -> None:
@@ -64,6 +174,7 @@ def inspect(tx_hash: str | None, block: int | None) -> None:
     else:
         # No args: latest block + per-tx summaries
         block = w3.eth.get_block("latest", full_transactions=True)
+        # Echoed per tx: each one costs RPC round trips, so show them as they arrive.
         click.echo(f"Block {block.number} has {len(block.transactions)} txs")
         for tx in block.transactions:
             tx_info = fetch_tx_info(w3, tx.hash.hex())
@@ -91,19 +202,37 @@ def logs(tx_hash: str) -> None:
 
 
 @cli.command(name="erc20-logs")
-@click.argument("block_number", type=int)
-def erc20_logs(block_number: int) -> None:
+@click.argument("block_number", type=int, required=False)
+@click.argument("end_block", type=int, required=False)
+@click.option("--stats", is_flag=True, help="Report logsBloom skip / false-positive rates (stderr)")
+@time_range_options
+def erc20_logs(
+    block_number: int | None,
+    end_block: int | None,
+    stats: bool,
+    from_time: str | None,
+    to_time: str | None,
+    header_cache: str | None,
+) -> None:
     """
     Print raw logs for receipts in a block that contain ERC-20 Transfer events.
 
+    With END_BLOCK, scans BLOCK_NUMBER..END_BLOCK (inclusive); --from-time /
+    --to-time select the blocks by timestamp instead. Blocks whose logsBloom
+    rules out a Transfer log are skipped without fetching receipts.
+
     Example:
       eth-tx-explorer erc20-logs 19000000
+      eth-tx-explorer erc20-logs 19000000 19000099 --stats
+      eth-tx-explorer erc20-logs --from-time 2024-03-01T09:00 --to-time 2024-03-01T10:00
     """
-    if block_number is None:
-        raise click.UsageError("Provide BLOCK_NUMBER.")
-
     w3 = get_web3()
-    print_erc20_logs(w3, block_number)
+    start, end = resolve_block_range(w3, block_number, end_block, from_time, to_time, header_cache)
+    bloom_filter = LogBloomFilter(TRANSFER_SIG)
+    for n in range(start, end + 1):
+        print_erc20_logs(w3, n, bloom_filter)
+    if stats:
+        click.echo(bloom_filter.stats.summary(), err=True)
 
 
 @cli.command()
@@ -130,56 +259,485 @@ def repl() -> None:
 
 
 @cli.command(name="block-transfers")
-@click.argument("block_number", type=int)
+@click.argument("block_number", type=int, required=False)
+@click.argument("end_block", type=int, required=False)
 @click.option("--json", "output_json", is_flag=True, help="Output as JSON")
-def block_transfers(block_number: int, output_json: bool) -> None:
+@click.option("--internal", is_flag=True, help="Include internal ETH transfers from block call traces")
+@click.option(
+    "--tracer",
+    type=click.Choice(TRACERS),
+    default=CALL_TRACER,
+    show_default=True,
+    help="Trace API for --internal: geth callTracer or Erigon-style trace_block",
+)
+@click.option(
+    "--archive",
+    "archive_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Read blocks offline from an archive written by the `archive` command",
+)
+@click.option(
+    "--watch",
+    "watch_file",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Only report transfers touching an address listed in FILE (one per line)",
+)
+@click.option(
+    "--layout",
+    type=click.Choice(LAYOUTS),
+    default="blocks",
+    show_default=True,
+    help="Text layout: one block of lines per transfer, or one table row per transfer",
+)
+@click.option("--stats", is_flag=True, help="Report logsBloom skip / false-positive rates (stderr)")
+@click.option(
+    "--sample",
+    "sample_spec",
+    metavar="RATE|N",
+    default=None,
+    help="Estimate per-block / total transfer counts from a stratified random sample "
+    "of the range (N blocks, or a fraction such as 0.01 or 1%) instead of listing transfers",
+)
+@click.option(
+    "--target-error",
+    type=click.FloatRange(0, 1, min_open=True),
+    default=None,
+    help="With --sample: keep doubling the sample until the transfers/block interval is within "
+    "this relative error (e.g. 0.05 for ±5%)",
+)
+@click.option(
+    "--confidence",
+    type=click.FloatRange(0, 1, min_open=True, max_open=True),
+    default=DEFAULT_CONFIDENCE,
+    show_default=True,
+    help="Confidence level of --sample intervals",
+)
+@click.option("--seed", type=int, default=None, help="Random seed for --sample (reproducible draws)")
+@result_cache_options
+@time_range_options
+def block_transfers(
+    block_number: int | None,
+    end_block: int | None,
+    output_json: bool,
+    internal: bool,
+    tracer: str,
+    archive_path: str | None,
+    watch_file: str | None,
+    layout: str,
+    stats: bool,
+    sample_spec: str | None,
+    target_error: float | None,
+    confidence: float,
+    seed: int | None,
+    use_cache: bool | None,
+    result_cache: str | None,
+    from_time: str | None,
+    to_time: str | None,
+    header_cache: str | None,
+) -> None:
     """
     List all ETH and ERC-20 transfers in a block.
 
+    With END_BLOCK, scans BLOCK_NUMBER..END_BLOCK (inclusive); --from-time /
+    --to-time select the blocks by timestamp instead.
+
+    With --sample, only a stratified random sample of the range is processed
+    and the command reports estimated transfers per block and range totals
+    (by type, plus ETH moved) with confidence intervals.
+
     Transfer types: ETH_SIMPLE_TRANSFER, ETH_CALL_WITH_VALUE,
-    CONTRACT_CREATION_WITH_VALUE, ERC20_TRANSFER.
+    CONTRACT_CREATION_WITH_VALUE, ERC20_TRANSFER, and with --internal
+    ETH_INTERNAL_TRANSFER.
     TransactionIndex from tx/receipt/block order (never from enumeration).
 
+    With --cache, processed blocks are cached by block hash and extractor
+    version, so repeat queries over finalized blocks skip RPC and
+    reprocessing (not available with --archive).
+
     Example:
       eth-tx-explorer block-transfers 19000000
+      eth-tx-explorer block-transfers 19000000 --internal
+      eth-tx-explorer block-transfers 19000000 19000999 --watch addresses.txt --stats
+      eth-tx-explorer block-transfers 19000000 --archive blocks.etxa
+      eth-tx-explorer block-transfers 19000000 --layout table
+      eth-tx-explorer block-transfers --from-time 2024-03-01T09:00 --to-time 2024-03-01T10:00
+      eth-tx-explorer block-transfers --from-time 2024-02-01 --to-time 2024-03-01 --sample 1% --target-error 0.02
     """
-    w3 = get_web3()
     try:
-        records = process_block_transfers(w3, block_number)
-        if not records:
-            click.echo(f"No transfers found in block {block_number}")
+        sample = parse_sample_spec(sample_spec) if sample_spec is not None else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--sample")
+    if target_error is not None and sample is None:
+        raise click.UsageError("--target-error needs --sample.")
+    use_result_cache = result_cache_enabled(use_cache, result_cache)
+    if use_result_cache and archive_path:
+        raise click.UsageError("--cache cannot be combined with --archive.")
+    try:
+        watchlist = load_watchlist(watch_file) if watch_file else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--watch")
+    if archive_path:
+        if internal:
+            raise click.UsageError("--internal needs call traces, which archives do not store.")
+        if from_time is not None:
+            raise click.UsageError("--from-time needs a node; archives hold only the blocks written to them.")
+        try:
+            w3 = ArchiveWeb3(BlockArchive(archive_path))
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--archive")
+    else:
+        w3 = get_web3()
+    start, end = resolve_block_range(w3, block_number, end_block, from_time, to_time, header_cache)
+    # Shared across the range: addresses recur from block to block.
+    addresses = AddressTable()
+    bloom_filter = LogBloomFilter(TRANSFER_SIG, watchlist)
+    renderer = TransferRenderer(layout)
+    cache = None
+
+    def transfers_in(n: int) -> list:
+        options = dict(
+            internal=internal,
+            tracer=tracer,
+            watchlist=watchlist,
+            bloom_filter=bloom_filter,
+            addresses=addresses,
+        )
+        if cache is not None:
+            return cached_block_transfers(w3, n, cache, **options)
+        return process_block_transfers(w3, n, **options)
+
+    by_block = []
+    try:
+        if use_result_cache:
+            cache = open_transfer_cache(w3, result_cache)
+        if sample is not None:
+            _estimate_transfers(
+                lambda n: transfer_metrics(transfers_in(n)),
+                start,
+                end,
+                sample,
+                target_error,
+                confidence,
+                seed,
+                internal,
+                output_json,
+            )
+            if stats:
+                click.echo(bloom_filter.stats.summary(), err=True)
             return
+        for n in range(start, end + 1):
+            records = transfers_in(n)
+            if output_json:
+                by_block.append({"block_number": n, "transfers": [transfer_record_to_json(r) for r in records]})
+            elif not records:
+                click.echo(f"No transfers found in block {n}")
+            else:
+                click.echo(renderer.render_block(n, records), nl=False)
         if output_json:
-            out = []
-            for r in records:
-                tc = r.get("token_contract")
-                o = {
-                    "transfer_type": r["transfer_type"],
-                    "tx_hash": r["tx_hash"],
-                    "transaction_index": r["transaction_index"],
-                    "envelope_type": r["envelope_type"],
-                    "from_addr": str(r["from_addr"]) if r.get("from_addr") is not None else None,
-                    "to_addr": str(r["to_addr"]) if r.get("to_addr") is not None else None,
-                    "eth_value_wei": r.get("eth_value_wei"),
-                    "token_contract": str(tc) if tc is not None else None,
-                    "token_value": r.get("token_value"),
-                    "gas": r.get("gas"),
-                    "gasPrice": r.get("gasPrice"),
-                    "maxFeePerGas": r.get("maxFeePerGas"),
-                    "maxPriorityFeePerGas": r.get("maxPriorityFeePerGas"),
-                    "gasUsed": r.get("gasUsed"),
-                    "effectiveGasPrice": r.get("effectiveGasPrice"),
-                    "tx_type": r.get("tx_type"),
-                }
-                out.append(o)
-            click.echo(json.dumps(out, indent=2, default=str))
-        else:
-            click.echo(f"Block {block_number} — {len(records)} transfer(s) found")
-            click.echo("=" * 60)
-            for r in records:
-                click.echo(format_transfer_summary(w3, r))
-                click.echo("-" * 60)
+            # A single block keeps the flat list of records.
+            out = by_block[0]["transfers"] if start == end else by_block
+            if start == end and not out:
+                click.echo(f"No transfers found in block {start}")
+            else:
+                click.echo(json.dumps(out, indent=2, default=str))
+        if stats:
+            click.echo(bloom_filter.stats.summary(), err=True)
     except ValueError as e:
         raise click.UsageError(str(e))
     except Exception as e:
         raise click.ClickException(f"Error fetching block: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _estimate_transfers(
+    measure: Callable[[int], dict],
+    start: int,
+    end: int,
+    sample: SampleSpec,
+    target_error: float | None,
+    confidence: float,
+    seed: int | None,
+    internal: bool,
+    output_json: bool,
+) -> None:
+    """block-transfers --sample: stratified estimate over start..end, progress on stderr."""
+    metrics = tuple(m for m in TRANSFER_METRICS if internal or m != ETH_INTERNAL_TRANSFER)
+
+    def on_round(round_no, drawn, current) -> None:
+        click.echo(
+            f"Round {round_no}: {drawn.size}/{drawn.population} block(s) sampled, "
+            f"transfers/block {current.mean:.4g} ± {current.half_width:.3g} (±{current.relative_error:.1%})",
+            err=True,
+        )
+
+    result = estimate_range(
+        start,
+        end,
+        measure,
+        sample,
+        metrics=metrics,
+        target_error=target_error,
+        confidence=confidence,
+        seed=seed,
+        on_round=on_round,
+    )
+    if output_json:
+        click.echo(json.dumps(result.to_dict(), indent=2))
+    else:
+        click.echo(result.summary())
+
+
+@cli.command()
+@click.argument("block_number", type=int)
+@click.option(
+    "--abi",
+    "abi_files",
+    multiple=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="ABI JSON file whose events are decoded too (repeatable)",
+)
+@click.option("--event", "signatures", multiple=True, help="Extra event signature, e.g. 'Swap(address indexed sender, uint256 amount)'")
+@click.option("--json", "output_json", is_flag=True, help="Output as JSON")
+def events(block_number: int, abi_files: tuple, signatures: tuple, output_json: bool) -> None:
+    """
+    Decode known events (Transfer, Approval, WETH Deposit/Withdrawal,
+    ERC-1155 TransferSingle/Batch, ...) from every receipt in a block.
+
+    Example:
+      eth-tx-explorer events 19000000
+      eth-tx-explorer events 19000000 --abi pool.json --json
+    """
+    registry = EventRegistry.with_builtins()
+    try:
+        for path in abi_files:
+            registry.register_abi(Path(path))
+        for signature in signatures:
+            registry.register_signature(signature)
+    except (ValueError, KeyError) as e:
+        raise click.BadParameter(str(e))
+    w3 = get_web3()
+    try:
+        decoded = fetch_block_events(w3, block_number, registry)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    except Exception as e:
+        raise click.ClickException(f"Error fetching block: {e}")
+    if output_json:
+        click.echo(json.dumps(decoded, indent=2, default=str))
+        return
+    lines = [f"Block {block_number} — {len(decoded)} event(s) decoded"]
+    for ev in decoded:
+        args = ", ".join(f"{k}={v}" for k, v in ev["args"].items())
+        lines.append(f"{ev['tx_hash']} #{ev['log_index']} {ev['address']} {ev['event']}({args})")
+    click.echo("\n".join(lines))
+
+
+@cli.command(name="trace-funds")
+@click.argument("address")
+@click.argument("block_number", type=int, required=False)
+@click.argument("end_block", type=int, required=False)
+@click.option("--hops", type=click.IntRange(1), default=2, show_default=True, help="Max transfers from ADDRESS")
+@click.option(
+    "--direction",
+    type=click.Choice(DIRECTIONS),
+    default="out",
+    show_default=True,
+    help="out: where funds from ADDRESS went; in: where funds reaching ADDRESS came from",
+)
+@click.option("--token", default=None, help="Only follow this token contract (or ETH)")
+@click.option(
+    "--any-order",
+    is_flag=True,
+    help="Ignore transfer order (by default a hop must not precede the transfer that reached its sender)",
+)
+@click.option("--top", type=click.IntRange(0), default=10, show_default=True, help="Top counterparties of ADDRESS to list")
+@click.option("--limit", type=click.IntRange(0), default=100, show_default=True, help="Max reached addresses to list (0: all)")
+@click.option("--internal", is_flag=True, help="Include internal ETH transfers from block call traces")
+@click.option(
+    "--tracer",
+    type=click.Choice(TRACERS),
+    default=CALL_TRACER,
+    show_default=True,
+    help="Trace API for --internal: geth callTracer or Erigon-style trace_block",
+)
+@click.option("--json", "output_json", is_flag=True, help="Output as JSON")
+@result_cache_options
+@time_range_options
+def trace_funds(
+    address: str,
+    block_number: int | None,
+    end_block: int | None,
+    hops: int,
+    direction: str,
+    token: str | None,
+    any_order: bool,
+    top: int,
+    limit: int,
+    internal: bool,
+    tracer: str,
+    output_json: bool,
+    use_cache: bool | None,
+    result_cache: str | None,
+    from_time: str | None,
+    to_time: str | None,
+    header_cache: str | None,
+) -> None:
+    """
+    Follow transfers from (or into) ADDRESS over a block range, up to --hops away.
+
+    Scans BLOCK_NUMBER..END_BLOCK (or --from-time / --to-time) into an
+    in-memory transfer graph, then lists the addresses reached (fewest hops,
+    first block) and ADDRESS's top counterparties by transfer count, or by
+    value with --token.
+
+    Example:
+      eth-tx-explorer trace-funds 0xabc... 19000000 19000999 --hops 3
+      eth-tx-explorer trace-funds 0xabc... 19000000 19000999 --token 0xA0b8...eB48 --direction in
+      eth-tx-explorer trace-funds 0xabc... --from-time 2024-03-01 --to-time 2024-03-02 --internal
+    """
+    graph = TransferGraph()
+    try:
+        start_id = graph.addresses.intern(address)
+        graph.token_id(token)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    use_result_cache = result_cache_enabled(use_cache, result_cache)
+    w3 = get_web3()
+    start, end = resolve_block_range(w3, block_number, end_block, from_time, to_time, header_cache)
+    bloom_filter = LogBloomFilter(TRANSFER_SIG)
+    cache = None
+    try:
+        if use_result_cache:
+            cache = open_transfer_cache(w3, result_cache)
+        options = dict(internal=internal, tracer=tracer, bloom_filter=bloom_filter, addresses=graph.addresses)
+        for n in range(start, end + 1):
+            if cache is not None:
+                records = cached_block_transfers(w3, n, cache, **options)
+            else:
+                records = process_block_transfers(w3, n, **options)
+            graph.add_records(records, n)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    except Exception as e:
+        raise click.ClickException(f"Error fetching block: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
+
+    reached = graph.reach(address, hops, direction, token, causal=not any_order)
+    del reached[start_id]
+    ordered = sorted(reached.items(), key=lambda item: (item[1][0], item[1][1] if direction == "out" else -item[1][1]))
+    if limit:
+        ordered = ordered[:limit]
+    flows = graph.top_flows(address, direction, token, limit=top) if top else []
+    checksum = graph.addresses.checksum
+
+    def token_name(t: int) -> str:
+        return "ETH" if t == ETH else checksum(t)
+
+    if output_json:
+        click.echo(json.dumps({
+            "address": checksum(start_id),
+            "start_block": start,
+            "end_block": end,
+            "edges": len(graph),
+            "reached": [
+                {"address": checksum(node), "hops": h, "block": b, "via": graph.edge(e)}
+                for node, (h, b, e) in ordered
+            ],
+            "top_flows": [
+                {"counterparty": checksum(node), "token": token_name(t), "total": total, "transfers": count}
+                for node, t, total, count in flows
+            ],
+        }, indent=2))
+        return
+
+    lines = [
+        f"Graph: {len(graph)} transfer(s) between {len(graph.addresses)} address(es), "
+        f"blocks {start}..{end} ({graph.nbytes / 2**20:.1f} MiB)",
+        f"{len(reached)} address(es) within {hops} hop(s) {direction} of {checksum(start_id)}"
+        + (f" (showing {len(ordered)})" if len(ordered) < len(reached) else ""),
+        f"  {'HOPS':>4}  {'BLOCK':>10}  {'ADDRESS':42s}  VIA",
+    ]
+    for node, (h, b, e) in ordered:
+        via = checksum(graph.endpoints(e)[0 if direction == "out" else 1])
+        lines.append(f"  {h:>4}  {b:>10}  {checksum(node):42s}  {via}")
+    if flows:
+        lines.append(f"Top counterparties ({direction}):")
+        lines.append(f"  {'TOKEN':42s}  {'COUNTERPARTY':42s}  {'TRANSFERS':>9}  TOTAL")
+        for node, t, total, count in flows:
+            amount = f"{format_ether(total)} ETH" if t == ETH else str(total)
+            lines.append(f"  {token_name(t):42s}  {checksum(node):42s}  {count:>9}  {amount}")
+    click.echo("\n".join(lines))
+
+
+@cli.command()
+@click.argument("start_block", type=int)
+@click.argument("end_block", type=int)
+@click.argument("output", type=click.Path(dir_okay=False))
+def archive(start_block: int, end_block: int, output: str) -> None:
+    """
+    Dump blocks START_BLOCK..END_BLOCK (inclusive) with receipts to an archive.
+
+    The archive is append-only: rerunning skips blocks already stored.
+    Reprocess offline with `block-transfers N --archive OUTPUT`.
+
+    Example:
+      eth-tx-explorer archive 19000000 19000099 blocks.etxa
+    """
+    if end_block < start_block:
+        raise click.UsageError("END_BLOCK must be >= START_BLOCK.")
+    w3 = get_web3()
+    written = 0
+    try:
+        with ArchiveWriter(output) as writer:
+            for n in range(start_block, end_block + 1):
+                if archive_block(w3, writer, n):
+                    written += 1
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    except Exception as e:
+        raise click.ClickException(f"Error archiving block: {e}")
+    total = end_block - start_block + 1
+    click.echo(f"Archived {written} block(s) to {output} ({total - written} already present)")
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to bind")
+@click.option("--port", type=int, default=9545, show_default=True, help="Port to listen on")
+@click.option("--cache-size", type=int, default=4096, show_default=True, help="Max cached finalized results")
+@click.option("--workers", type=int, default=16, show_default=True, help="Upstream RPC worker threads / pooled connections")
+@click.option(
+    "--finality-depth",
+    type=int,
+    default=DEFAULT_FINALITY_DEPTH,
+    show_default=True,
+    help="Blocks below head after which results are cached",
+)
+def serve(host: str, port: int, cache_size: int, workers: int, finality_depth: int) -> None:
+    """
+    Run a long-lived HTTP JSON API over the core lookups.
+
+    Routes: /blocks/N, /blocks/N/transfers[?internal=1], /tx/HASH,
+    /tx/HASH/logs, /metrics.
+
+    Example:
+      eth-tx-explorer serve --port 9545
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    from eth_tx_explorer.service import QueryService, run_server
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    w3 = get_web3(session=session)
+    service = QueryService(w3, cache_size=cache_size, finality_depth=finality_depth, workers=workers)
+    click.echo(f"eth-tx-explorer serving on http://{host}:{port}")
+    run_server(service, host, port)
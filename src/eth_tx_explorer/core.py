@@ -1,9 +1,19 @@
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from web3 import Web3
+from web3.exceptions import Web3RPCError
 from web3.types import HexBytes
 from typing import Dict, Any, List, Tuple, Optional
 from eth_utils import keccak, to_bytes
 
+from eth_tx_explorer.addresses import AddressTable
+from eth_tx_explorer.bloom import LogBloomFilter
+from eth_tx_explorer.events import EventRegistry
+from eth_tx_explorer.traces import CALL_TRACER, fetch_internal_transfers
+from eth_tx_explorer.transports import PIPELINE_DEPTH
+from eth_tx_explorer.watchlist import Watchlist
+
 
 # ERC-20 Transfer event signature: Transfer(address,address,uint256)
 TRANSFER_SIG = HexBytes(keccak(to_bytes(text="Transfer(address,address,uint256)")))
@@ -13,6 +23,7 @@ ETH_SIMPLE_TRANSFER = "ETH_SIMPLE_TRANSFER"
 ETH_CALL_WITH_VALUE = "ETH_CALL_WITH_VALUE"
 CONTRACT_CREATION_WITH_VALUE = "CONTRACT_CREATION_WITH_VALUE"
 ERC20_TRANSFER = "ERC20_TRANSFER"
+ETH_INTERNAL_TRANSFER = "ETH_INTERNAL_TRANSFER"
 
 
 def _get_attr(obj: Any, key: str, default: Any = None) -> Any:
@@ -84,15 +95,49 @@ def get_transaction_index(
     return 0
 
 
-def is_contract(w3: Web3, address: Any, cache: Dict[str, bool]) -> bool:
-    """Return True if address has code (contract). Uses per-block cache."""
-    addr = Web3.to_checksum_address(address) if address else None
-    if not addr:
+# Web3 instances whose node refused a get_code pinned to a past block (pruned
+# full nodes keep only recent state); later lookups on them use "latest".
+_NO_HISTORICAL_STATE: "weakref.WeakSet[Web3]" = weakref.WeakSet()
+
+
+def _get_code(w3: Web3, address: str, block_identifier: Any) -> Any:
+    """get_code at block_identifier, falling back to "latest" without historical state."""
+    if block_identifier != "latest" and w3 not in _NO_HISTORICAL_STATE:
+        try:
+            return w3.eth.get_code(address, block_identifier)
+        except Web3RPCError:
+            _NO_HISTORICAL_STATE.add(w3)
+    return w3.eth.get_code(address, "latest")
+
+
+def is_contract(
+    w3: Web3,
+    address: Any,
+    cache: Dict[Any, bool],
+    block_identifier: Any = "latest",
+    addresses: Optional[AddressTable] = None,
+) -> bool:
+    """
+    Return True if address has code (contract). Uses per-block cache.
+    Pass the block number being processed so the answer is pinned to that
+    block (and can be deduplicated by the provider layer) when the node has
+    the state for it; otherwise the lookup falls back to "latest".
+    With an AddressTable the cache is keyed by address ID and the checksum
+    comes from the table; otherwise it is keyed by lowercase address.
+    """
+    if not address:
         return False
-    key = addr.lower()
-    if key in cache:
-        return cache[key]
-    code = w3.eth.get_code(addr)
+    if addresses is not None:
+        key = addresses.intern(address)
+        if key in cache:
+            return cache[key]
+        addr = addresses.checksum(key)
+    else:
+        addr = Web3.to_checksum_address(address)
+        key = addr.lower()
+        if key in cache:
+            return cache[key]
+    code = _get_code(w3, addr, block_identifier)
     has_code = bool(code and len(code) > 2)
     cache[key] = has_code
     return has_code
@@ -125,28 +170,60 @@ def compute_gas_summary(tx: Any, receipt: Any) -> Dict[str, Any]:
     }
 
 
-def fetch_block_transfers(w3: Web3, block_number: int) -> Tuple[Dict[str, Any], List[Any]]:
-    """Fetch block with full transactions. Returns (block_dict, list of tx objects)."""
-    block = w3.eth.get_block(block_number, full_transactions=True)
+def fetch_block_transfers(
+    w3: Web3, block_number: int, block: Optional[Any] = None
+) -> Tuple[Dict[str, Any], List[Any]]:
+    """
+    Fetch block with full transactions. Returns (block_dict, list of tx objects).
+    block: the same block already fetched with full transactions (no RPC then).
+    """
+    if block is None:
+        block = w3.eth.get_block(block_number, full_transactions=True)
     if not block:
         raise ValueError(f"Block {block_number} not found")
-    block_dict = {"number": block.number, "timestamp": block.timestamp}
+    block_dict = {
+        "number": block.number,
+        "timestamp": block.timestamp,
+        "logsBloom": _get_attr(block, "logsBloom"),
+    }
     return block_dict, list(block.transactions)
 
 
 def fetch_transfer_receipts(w3: Web3, transactions: List[Any]) -> List[Tuple[Any, Any]]:
-    """Fetch receipts for each tx. Order not guaranteed to match block order."""
-    out: List[Tuple[Any, Any]] = []
-    for tx in transactions:
-        tx_hash = _canonical_tx_hash(tx)
-        if not tx_hash:
-            continue
+    """
+    Fetch receipts for each tx. Order not guaranteed to match block order.
+    On pipelining providers (WebSocket / IPC, see transports.py) up to
+    PIPELINE_DEPTH receipt requests are in flight at once on the connection.
+    """
+    pending = [(tx, h) for tx in transactions if (h := _canonical_tx_hash(tx))]
+
+    def fetch(item: Tuple[Any, str]) -> Optional[Tuple[Any, Any]]:
         try:
-            r = w3.eth.get_transaction_receipt(tx_hash)
-            out.append((tx, r))
+            return item[0], w3.eth.get_transaction_receipt(item[1])
         except Exception:
-            continue
-    return out
+            return None
+
+    if len(pending) > 1 and getattr(getattr(w3, "provider", None), "supports_pipelining", False):
+        with ThreadPoolExecutor(max_workers=min(PIPELINE_DEPTH, len(pending))) as pool:
+            results = list(pool.map(fetch, pending))
+    else:
+        results = [fetch(item) for item in pending]
+    return [r for r in results if r is not None]
+
+
+def fetch_watched_tx_hashes(w3: Web3, block_number: int, watchlist: Watchlist) -> set:
+    """
+    Canonical hashes of txs with a Transfer log touching the watchlist.
+
+    Uses eth_getLogs with the watchlist pushed into the address/topic filters
+    (see Watchlist.log_filters), then re-checks each log with the local matcher.
+    """
+    hashes = set()
+    for log_filter in watchlist.log_filters(block_number, TRANSFER_SIG):
+        for log in w3.eth.get_logs(log_filter):
+            if log.topics and log.topics[0] == TRANSFER_SIG and watchlist.matches_log(log):
+                hashes.add(Web3.to_hex(log.transactionHash).lower())
+    return hashes
 
 
 def _extract_eth_transfer(
@@ -156,25 +233,27 @@ def _extract_eth_transfer(
     tx_index: int,
     env_type: str,
     gas_summary: Dict[str, Any],
-    contract_cache: Dict[str, bool],
+    contract_cache: Dict[int, bool],
+    block_identifier: Any,
+    addresses: AddressTable,
 ) -> Optional[Dict[str, Any]]:
     """At most one ETH transfer per tx when tx.value > 0."""
     value = _get_attr(tx, "value", 0) or 0
     if value == 0:
         return None
     from_addr = _get_attr(tx, "from")
+    if from_addr:
+        from_addr = addresses.checksum(addresses.intern(from_addr))
     to_addr = _get_attr(tx, "to")
     if to_addr is None:
         transfer_type = CONTRACT_CREATION_WITH_VALUE
         to_display = "(contract creation)"
     else:
-        to_checksum = Web3.to_checksum_address(to_addr) if to_addr else None
-        if is_contract(w3, to_checksum or to_addr, contract_cache):
+        to_display = addresses.checksum(addresses.intern(to_addr))
+        if is_contract(w3, to_addr, contract_cache, block_identifier, addresses):
             transfer_type = ETH_CALL_WITH_VALUE
-            to_display = to_checksum or to_addr
         else:
             transfer_type = ETH_SIMPLE_TRANSFER
-            to_display = to_checksum or to_addr
     return {
         "transfer_type": transfer_type,
         "tx_hash": Web3.to_hex(tx.hash),
@@ -189,22 +268,59 @@ def _extract_eth_transfer(
     }
 
 
+def _extract_internal_transfers(
+    tx: Any,
+    internal: List[Dict[str, Any]],
+    tx_index: int,
+    env_type: str,
+    gas_summary: Dict[str, Any],
+    addresses: AddressTable,
+) -> List[Dict[str, Any]]:
+    """One ETH_INTERNAL_TRANSFER record per value-bearing trace frame of the tx."""
+    records: List[Dict[str, Any]] = []
+    for frame in internal:
+        from_addr = frame.get("from")
+        records.append({
+            "transfer_type": ETH_INTERNAL_TRANSFER,
+            "tx_hash": Web3.to_hex(tx.hash),
+            "transaction_index": tx_index,
+            "envelope_type": env_type,
+            "from_addr": addresses.checksum(addresses.intern(from_addr)) if from_addr else None,
+            "to_addr": addresses.checksum(addresses.intern(frame["to"])),
+            "eth_value_wei": frame["value"],
+            "token_contract": None,
+            "token_value": None,
+            **gas_summary,
+        })
+    return records
+
+
 def _extract_erc20_transfers(
     tx: Any,
     receipt: Any,
     tx_index: int,
     env_type: str,
     gas_summary: Dict[str, Any],
+    watchlist: Optional[Watchlist] = None,
+    addresses: Optional[AddressTable] = None,
 ) -> List[Dict[str, Any]]:
-    """One ERC20_TRANSFER record per Transfer(address,address,uint256) log."""
+    """
+    One ERC20_TRANSFER record per Transfer(address,address,uint256) log.
+    With a watchlist, logs are matched on raw topic bytes before decoding.
+    Topic addresses are rendered through the AddressTable (lowercase hex).
+    """
+    if addresses is None:
+        addresses = AddressTable()
     records: List[Dict[str, Any]] = []
     for log in receipt.logs or []:
         if not log.topics or len(log.topics) < 3:
             continue
         if log.topics[0] != TRANSFER_SIG:
             continue
-        from_addr = "0x" + (log.topics[1].hex() if hasattr(log.topics[1], "hex") else str(log.topics[1]))[-40:]
-        to_addr = "0x" + (log.topics[2].hex() if hasattr(log.topics[2], "hex") else str(log.topics[2]))[-40:]
+        if watchlist is not None and not watchlist.matches_log(log):
+            continue
+        from_addr = addresses.lower(addresses.intern_topic(log.topics[1]))
+        to_addr = addresses.lower(addresses.intern_topic(log.topics[2]))
         amount = int(log.data.hex(), 16) if log.data else 0
         records.append({
             "transfer_type": ERC20_TRANSFER,
@@ -214,25 +330,80 @@ def _extract_erc20_transfers(
             "from_addr": from_addr,
             "to_addr": to_addr,
             "eth_value_wei": None,
-            "token_contract": log.address,
+            "token_contract": addresses.checksum(addresses.intern(log.address)),
             "token_value": amount,
             **gas_summary,
         })
     return records
 
 
-def process_block_transfers(w3: Web3, block_number: int) -> List[Dict[str, Any]]:
+def process_block_transfers(
+    w3: Web3,
+    block_number: int,
+    internal: bool = False,
+    tracer: str = CALL_TRACER,
+    watchlist: Optional[Watchlist] = None,
+    bloom_filter: Optional[LogBloomFilter] = None,
+    addresses: Optional[AddressTable] = None,
+    block: Optional[Any] = None,
+) -> List[Dict[str, Any]]:
     """
     Identify all transfers in a block. Each transfer is a separate record.
     transactionIndex from block order (primary), then tx/receipt.
+    With internal=True the block is traced once (see traces.py) and ETH moved
+    by contract calls is reported as ETH_INTERNAL_TRANSFER records.
+    With a watchlist, only transfers touching a watched address are returned and
+    receipts are fetched only for txs that can produce one.
+    The block logsBloom is checked first (bloom_filter, default: Transfer topic
+    only); when it rules out Transfer logs, only txs carrying ETH get receipts.
+    Pass one AddressTable across calls when scanning a range so recurring
+    addresses are decoded and checksummed once.
+    Pass block when the full block is already in hand (see resultcache.py).
     """
-    block, transactions = fetch_block_transfers(w3, block_number)
+    block, transactions = fetch_block_transfers(w3, block_number, block)
     if not transactions:
         return []
+    if bloom_filter is None:
+        bloom_filter = LogBloomFilter(TRANSFER_SIG)
+    may_have_logs = bloom_filter.check_block(block.get("logsBloom"))
     tx_hash_to_index = {_canonical_tx_hash(t): i for i, t in enumerate(transactions)}
+    internal_by_tx: Dict[str, List[Dict[str, Any]]] = {}
+    if internal:
+        internal_by_tx = fetch_internal_transfers(w3, block_number, list(tx_hash_to_index), tracer)
+    eth_watched = set()
+    fetched_count = len(transactions)
+    if watchlist is not None:
+        for tx in transactions:
+            if (_get_attr(tx, "value", 0) or 0) and (
+                watchlist.contains_address(_get_attr(tx, "from"))
+                or watchlist.contains_address(_get_attr(tx, "to"))
+            ):
+                eth_watched.add(_canonical_tx_hash(tx))
+        watched_internal: Dict[str, List[Dict[str, Any]]] = {}
+        for h, frames in internal_by_tx.items():
+            kept = [
+                f for f in frames
+                if watchlist.contains_address(f.get("from")) or watchlist.contains_address(f.get("to"))
+            ]
+            if kept:
+                watched_internal[h] = kept
+        internal_by_tx = watched_internal
+        relevant = eth_watched | set(internal_by_tx)
+        if may_have_logs:
+            relevant |= fetch_watched_tx_hashes(w3, block_number, watchlist)
+        transactions = [t for t in transactions if _canonical_tx_hash(t) in relevant]
+    elif not may_have_logs:
+        transactions = [
+            t for t in transactions
+            if (_get_attr(t, "value", 0) or 0) or _canonical_tx_hash(t) in internal_by_tx
+        ]
+    bloom_filter.stats.receipts_skipped += fetched_count - len(transactions)
     tx_receipt_pairs = fetch_transfer_receipts(w3, transactions)
-    contract_cache: Dict[str, bool] = {}
+    if addresses is None:
+        addresses = AddressTable()
+    contract_cache: Dict[int, bool] = {}
     all_records: List[Dict[str, Any]] = []
+    erc20_count = 0
 
     for tx, receipt in tx_receipt_pairs:
         tx_hash_hex = _canonical_tx_hash(tx)
@@ -241,15 +412,46 @@ def process_block_transfers(w3: Web3, block_number: int) -> List[Dict[str, Any]]
         env_type = envelope_type(tx)
         gas_summary = compute_gas_summary(tx, receipt)
 
-        eth_rec = _extract_eth_transfer(w3, tx, receipt, tx_index, env_type, gas_summary, contract_cache)
-        if eth_rec:
-            all_records.append(eth_rec)
-        erc20_records = _extract_erc20_transfers(tx, receipt, tx_index, env_type, gas_summary)
-        all_records.extend(erc20_records)
-
+        if watchlist is None or tx_hash_hex in eth_watched:
+            eth_rec = _extract_eth_transfer(
+                w3, tx, receipt, tx_index, env_type, gas_summary, contract_cache, block_number, addresses
+            )
+            if eth_rec:
+                all_records.append(eth_rec)
+        if tx_hash_hex in internal_by_tx:
+            all_records.extend(
+                _extract_internal_transfers(
+                    tx, internal_by_tx[tx_hash_hex], tx_index, env_type, gas_summary, addresses
+                )
+            )
+        if may_have_logs and bloom_filter.may_match(_get_attr(receipt, "logsBloom")):
+            erc20_records = _extract_erc20_transfers(
+                tx, receipt, tx_index, env_type, gas_summary, watchlist, addresses
+            )
+            erc20_count += len(erc20_records)
+            all_records.extend(erc20_records)
+
+    if may_have_logs and not erc20_count:
+        bloom_filter.stats.false_positives += 1
     return all_records
 
 
+def fetch_block_events(
+    w3: Web3,
+    block_number: int,
+    registry: Optional[EventRegistry] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Decode every recognised event log in a block (see events.py).
+    registry defaults to the built-in ERC-20/721/1155/WETH events.
+    """
+    if registry is None:
+        registry = EventRegistry.with_builtins()
+    _, transactions = fetch_block_transfers(w3, block_number)
+    receipts = [r for _, r in fetch_transfer_receipts(w3, transactions)]
+    return registry.decode_receipts(receipts)
+
+
 def fetch_block_info(w3: Web3, block_number: int) -> Dict[str, Any]:
     block = w3.eth.get_block(block_number)
 
@@ -284,6 +486,24 @@ def fetch_tx_info(w3: Web3, tx_hash: str) -> Dict[str, Any]:
     }
 
 
+def fetch_tx_logs(w3: Web3, tx_hash: str) -> Dict[str, Any]:
+    """Receipt logs of a tx as plain data (hex topics/data), with its block number."""
+    receipt = w3.eth.get_transaction_receipt(tx_hash)
+    return {
+        "tx_hash": Web3.to_hex(receipt.transactionHash),
+        "block_number": receipt.blockNumber,
+        "logs": [
+            {
+                "address": log.address,
+                "logIndex": log.logIndex,
+                "topics": [Web3.to_hex(t) for t in log.topics],
+                "data": Web3.to_hex(log.data),
+            }
+            for log in receipt.logs or []
+        ],
+    }
+
+
 def print_receipt_logs(receipt) -> None:
     
     logs = receipt.logs
@@ -308,24 +528,39 @@ def print_receipt_logs(receipt) -> None:
         print("-" * 60)
 
 
-def print_erc20_logs(w3: Web3, block_number: int) -> None:
+def print_erc20_logs(
+    w3: Web3,
+    block_number: int,
+    bloom_filter: Optional[LogBloomFilter] = None,
+) -> None:
     """
     Print logs for all transactions in a block that contain ERC-20 Transfer events.
     
     Args:
         w3: Web3 instance connected to Ethereum node
         block_number: Block number to inspect
+        bloom_filter: Precompiled logsBloom check (default: Transfer topic);
+            blocks / receipts it rules out are skipped without fetching.
     """
+    if bloom_filter is None:
+        bloom_filter = LogBloomFilter(TRANSFER_SIG)
+
     # Fetch the block
     block = w3.eth.get_block(block_number)
-    
+
+    # Skip the whole block when its header bloom proves there is no Transfer log
+    if not bloom_filter.check_block(_get_attr(block, "logsBloom")):
+        bloom_filter.stats.receipts_skipped += len(block.transactions)
+        return
+
+    found = False
     # Iterate through all transactions in the block
     for tx_hash in block.transactions:
         # Fetch the receipt for each transaction
         receipt = w3.eth.get_transaction_receipt(tx_hash)
         
         # Inspect logs in the receipt
-        if receipt.logs:
+        if receipt.logs and bloom_filter.may_match(_get_attr(receipt, "logsBloom")):
             # Check if any log has topics[0] == TRANSFER_SIG
             has_transfer = False
             for log in receipt.logs:
@@ -336,4 +571,8 @@ def print_erc20_logs(w3: Web3, block_number: int) -> None:
             
             # If any log matches TRANSFER_SIG, print all logs for this receipt
             if has_transfer:
+                found = True
                 print_receipt_logs(receipt)
+
+    if not found:
+        bloom_filter.stats.false_positives += 1
@@ -0,0 +1,262 @@
+"""Request deduplication for idempotent RPC calls, as web3 middleware.
+
+Within one session the same immutable data is asked for repeatedly (the block
+of every tx in fetch_tx_info, receipts, get_code of recurring addresses). The
+deduplicator sits innermost in the middleware onion and memoizes raw
+responses keyed by method + params, but only once the answer cannot change:
+
+- calls pinned to an explicit block number are stored only when that block is
+  at least finality_depth below the head (a block just below the head can
+  still be reorged away);
+- lookups by hash (blocks, transactions, receipts) are stored only when the
+  block the result belongs to is final by the same rule;
+- anything tagged latest / pending / safe / finalized, or pinned by block
+  hash, goes straight to the node.
+
+Traces are never stored: one block trace can be hundreds of MB. The cache is
+an LRU bounded by the approximate size of the stored results. Concurrent
+identical calls pinned to a block number or hash share one in-flight request
+even while their block is not final yet (the answer is just not stored);
+tagged calls such as "latest", and methods outside the tables below, always
+go to the node on their own.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from web3 import Web3
+from web3.middleware.base import Web3Middleware
+
+from eth_tx_explorer.blocktime import DEFAULT_FINALITY_DEPTH, FinalityTracker
+
+
+DEFAULT_MAX_BYTES = 32 << 20
+# Results larger than max_bytes // _MAX_ENTRY_SHARE are passed through unstored.
+_MAX_ENTRY_SHARE = 8
+
+# Tags whose meaning moves with the chain head ("earliest" is genesis: stable).
+MUTABLE_BLOCK_TAGS = frozenset({"latest", "pending", "safe", "finalized"})
+
+# Methods keyed by a block number: method -> position of the block param.
+_BLOCK_PARAM_INDEX = {
+    "eth_getBlockByNumber": 0,
+    "eth_getBlockTransactionCountByNumber": 0,
+    "eth_getBlockReceipts": 0,
+    "eth_getBalance": 1,
+    "eth_getCode": 1,
+    "eth_getTransactionCount": 1,
+    "eth_call": 1,
+    "eth_getStorageAt": 2,
+}
+
+# Methods keyed by a hash: stored once the result's block is final.
+# method -> result field holding that block's number.
+_HASH_KEYED = {
+    "eth_getBlockByHash": "number",
+    "eth_getTransactionByHash": "blockNumber",
+    "eth_getTransactionReceipt": "blockNumber",
+}
+
+# Chain constants: always stored.
+_CONSTANT = frozenset({"eth_chainId", "net_version"})
+
+# request_block() for requests whose block is only known from the response.
+HASH_KEYED = -2
+# request_block() for chain constants.
+CONSTANT = -1
+
+
+def _block_number(block_id: Any) -> Optional[int]:
+    """Block number of an explicit block identifier; None for tags, hashes and defaults."""
+    if block_id is None or isinstance(block_id, bool):
+        return None
+    if isinstance(block_id, int):
+        return block_id
+    if isinstance(block_id, dict):
+        # EIP-1898 block object: only {"blockNumber": ...} has a known height.
+        return _block_number(block_id.get("blockNumber"))
+    text = str(block_id)
+    if text == "earliest":
+        return 0
+    if text in MUTABLE_BLOCK_TAGS or len(text) > 18:
+        # Tags, or a 32-byte block hash given in place of a number.
+        return None
+    try:
+        return int(text, 16) if text.startswith("0x") else int(text)
+    except ValueError:
+        return None
+
+
+def request_block(method: str, params: Any) -> Optional[int]:
+    """
+    Block a request's answer is pinned to: its number, HASH_KEYED when it is
+    only known from the response, CONSTANT for chain constants, or None if
+    the request must never be stored.
+    """
+    if method in _CONSTANT:
+        return CONSTANT
+    if method in _HASH_KEYED:
+        return HASH_KEYED
+    params = list(params or [])
+    if method == "eth_getLogs":
+        f = params[0] if params else {}
+        if not isinstance(f, dict) or "blockHash" in f or _block_number(f.get("fromBlock")) is None:
+            return None
+        return _block_number(f.get("toBlock"))
+    idx = _BLOCK_PARAM_INDEX.get(method)
+    if idx is None or idx >= len(params):
+        # A missing block param means the node defaults to "latest".
+        return None
+    return _block_number(params[idx])
+
+
+def response_block(method: str, result: Any) -> Optional[int]:
+    """Block number a hash-keyed lookup's result belongs to (None while pending)."""
+    field = _HASH_KEYED.get(method)
+    if field is None or not isinstance(result, dict):
+        return None
+    return _block_number(result.get(field))
+
+
+def _request_key(method: str, params: Any) -> Hashable:
+    return method, json.dumps(params, sort_keys=True, default=str)
+
+
+def _result_size(result: Any) -> int:
+    """Approximate in-memory footprint of a decoded result: its JSON length."""
+    return len(json.dumps(result, separators=(",", ":"), default=str))
+
+
+class RequestDeduplicator:
+    """
+    Memoizing wrapper for make_request functions (see wrap()).
+
+    Only successful, non-null responses for final blocks are stored (a tx
+    that is not mined yet returns null and must be asked again). Bounded LRU
+    of about max_bytes of results; finality is judged against the head
+    (eth_blockNumber, refreshed at most every couple of seconds).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        finality_depth: int = DEFAULT_FINALITY_DEPTH,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._cache: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.finality = FinalityTracker(finality_depth)
+        self.stats = {"requests": 0, "hits": 0, "shared": 0, "passthrough": 0, "not_final": 0}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def _is_final(self, make_request: Callable[[Any, Any], Dict[str, Any]], block: Optional[int]) -> bool:
+        def fetch_head() -> Optional[int]:
+            head = make_request("eth_blockNumber", []).get("result")
+            return None if head is None else int(head, 16)
+
+        return self.finality.is_final(block, fetch_head)
+
+    def _store(self, key: Hashable, response: Dict[str, Any]) -> None:
+        size = _result_size(response["result"])
+        if size > self.max_bytes // _MAX_ENTRY_SHARE:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = response
+            self._sizes[key] = size
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                old, _ = self._cache.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old)
+
+    def request(
+        self, make_request: Callable[[Any, Any], Dict[str, Any]], method: Any, params: Any
+    ) -> Dict[str, Any]:
+        """make_request(method, params), answered from / stored in the cache when safe."""
+        method_name = str(method)
+        block = request_block(method_name, params)
+        if block is None:
+            self.stats["passthrough"] += 1
+            return make_request(method, params)
+        # Near-head answers can still change: shared by concurrent callers, never stored.
+        final = block < 0 or self._is_final(make_request, block)
+        key = _request_key(method_name, params)
+        with self._lock:
+            self.stats["requests"] += 1
+            cached = self._cache.get(key) if final else None
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached
+            pending: Optional[Future] = self._inflight.get(key)
+            if pending is None:
+                owner = True
+                pending = self._inflight[key] = Future()
+            else:
+                owner = False
+                self.stats["shared"] += 1
+        if not owner:
+            return pending.result()
+        try:
+            response = make_request(method, params)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+        pending.set_result(response)
+        result = response.get("result")
+        if response.get("error") or result is None:
+            return response
+        if block == HASH_KEYED:
+            final = self._is_final(make_request, response_block(method_name, result))
+        if final:
+            self._store(key, response)
+        else:
+            self.stats["not_final"] += 1
+        return response
+
+    def wrap(self, make_request: Callable[[Any, Any], Dict[str, Any]]) -> Callable[[Any, Any], Dict[str, Any]]:
+        """make_request with deduplication in front of it."""
+
+        def deduplicated(method: Any, params: Any) -> Dict[str, Any]:
+            return self.request(make_request, method, params)
+
+        return deduplicated
+
+
+class DedupMiddleware(Web3Middleware):
+    """web3 middleware routing single requests through a shared RequestDeduplicator."""
+
+    def __init__(self, w3: Web3, dedup: RequestDeduplicator) -> None:
+        super().__init__(w3)
+        self.dedup = dedup
+
+    def wrap_make_request(self, make_request: Any) -> Any:
+        return self.dedup.wrap(make_request)
+
+
+def install_dedup(
+    w3: Web3,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    finality_depth: int = DEFAULT_FINALITY_DEPTH,
+) -> RequestDeduplicator:
+    """Add a RequestDeduplicator as w3's innermost middleware and return it."""
+    dedup = RequestDeduplicator(max_bytes, finality_depth)
+    # Innermost (layer 0): it sees and stores the raw provider responses.
+    w3.middleware_onion.inject(lambda w3: DedupMiddleware(w3, dedup), name="dedup", layer=0)
+    return dedup
@@ -0,0 +1,318 @@
+"""Event decoder registry: topic0 -> precompiled byte-level decoder.
+
+Each event signature is compiled once into a list of field extractors that
+read directly from topic / data bytes (word slices + int.from_bytes), so
+decoding a log is one dict lookup plus a few slices, without per-log ABI
+handling. Dispatch is keyed by (topic0, topic count) because standards share
+a topic0: ERC-20 and ERC-721 Transfer differ only in whether the third
+argument is indexed.
+
+Static types (address, uintN, intN, bool, bytesN) and one-level dynamic
+types (bytes, string, T[] of static T) are decoded natively; anything else
+(tuples, nested or fixed-size arrays) falls back to eth_abi for the data part.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from eth_utils import keccak
+
+
+# Built-in events, in ABI-signature form. Names become the decoded arg keys.
+BUILTIN_EVENTS = (
+    "Transfer(address indexed from, address indexed to, uint256 value)",
+    "Transfer(address indexed from, address indexed to, uint256 indexed tokenId)",
+    "Approval(address indexed owner, address indexed spender, uint256 value)",
+    "Approval(address indexed owner, address indexed approved, uint256 indexed tokenId)",
+    "ApprovalForAll(address indexed owner, address indexed operator, bool approved)",
+    "Deposit(address indexed dst, uint256 wad)",
+    "Withdrawal(address indexed src, uint256 wad)",
+    "TransferSingle(address indexed operator, address indexed from, address indexed to, uint256 id, uint256 value)",
+    "TransferBatch(address indexed operator, address indexed from, address indexed to, uint256[] ids, uint256[] values)",
+)
+
+_SIGNATURE_RE = re.compile(r"^\s*([A-Za-z_$][\w$]*)\s*\((.*)\)\s*$", re.S)
+_STATIC_RE = re.compile(r"^(address|bool|u?int\d*|bytes(?:[1-9]|[12]\d|3[0-2]))$")
+
+Extractor = Callable[[Sequence[bytes], bytes], Any]
+
+
+def _canonical_type(t: str) -> str:
+    t = t.strip()
+    if t.startswith("uint") and (len(t) == 4 or t[4] == "["):
+        return "uint256" + t[4:]
+    if t.startswith("int") and (len(t) == 3 or t[3] == "["):
+        return "int256" + t[3:]
+    return t
+
+
+def _split_params(text: str) -> List[str]:
+    """Split a parameter list on top-level commas (tuple types keep their commas)."""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(text):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    tail = text[start:]
+    if tail.strip() or parts:
+        parts.append(tail)
+    return [p.strip() for p in parts]
+
+
+def _word_decoder(abi_type: str) -> Optional[Callable[[bytes], Any]]:
+    """Decoder for one 32-byte word of a static type, or None if not static."""
+    if not _STATIC_RE.match(abi_type):
+        return None
+    if abi_type == "address":
+        return lambda w: "0x" + w[12:32].hex()
+    if abi_type == "bool":
+        return lambda w: w[31] != 0
+    if abi_type.startswith("uint"):
+        return lambda w: int.from_bytes(w, "big")
+    if abi_type.startswith("int"):
+        return lambda w: int.from_bytes(w, "big", signed=True)
+    size = int(abi_type[5:])
+    return lambda w: "0x" + w[:size].hex()
+
+
+class EventDecoder:
+    """
+    One event signature compiled into per-field extractors.
+
+    decode(topics, data) returns {arg name: value}; topics are raw 32-byte
+    values (topic0 included), data is the raw log data. Truncated topics or
+    data raise ValueError instead of decoding short words.
+    """
+
+    def __init__(self, name: str, params: List[Tuple[str, str, bool]]) -> None:
+        self.name = name
+        self.params = params
+        self.types = [t for _, t, _ in params]
+        self.signature = f"{name}({','.join(self.types)})"
+        self.topic0 = keccak(text=self.signature)
+        self.topic_count = 1 + sum(1 for _, _, indexed in params if indexed)
+        # One head word per non-indexed argument (dynamic ones hold an offset).
+        self._head_size = 32 * (len(params) - self.topic_count + 1)
+        self._fields = self._compile()
+
+    @classmethod
+    def from_signature(cls, signature: str) -> "EventDecoder":
+        """Parse e.g. ``Approval(address indexed owner, address indexed spender, uint256 value)``."""
+        m = _SIGNATURE_RE.match(signature)
+        if not m:
+            raise ValueError(f"Invalid event signature: {signature!r}")
+        params: List[Tuple[str, str, bool]] = []
+        for i, part in enumerate(_split_params(m.group(2))):
+            if not part:
+                raise ValueError(f"Invalid event signature: {signature!r}")
+            if part.startswith("("):
+                close = part.rindex(")")
+                suffix = part[close + 1:].split()
+                abi_type = part[:close + 1] + (suffix[0] if suffix and suffix[0].startswith("[") else "")
+                rest = suffix[1:] if suffix and suffix[0].startswith("[") else suffix
+            else:
+                tokens = part.split()
+                abi_type, rest = tokens[0], tokens[1:]
+            indexed = bool(rest) and rest[0] == "indexed"
+            if indexed:
+                rest = rest[1:]
+            arg_name = rest[0] if rest else f"arg{i}"
+            params.append((arg_name, _canonical_type(abi_type), indexed))
+        return cls(m.group(1), params)
+
+    @classmethod
+    def from_abi(cls, entry: Dict[str, Any]) -> "EventDecoder":
+        """Build from one ABI JSON event entry."""
+        params = [
+            (inp.get("name") or f"arg{i}", _abi_input_type(inp), bool(inp.get("indexed")))
+            for i, inp in enumerate(entry.get("inputs") or [])
+        ]
+        return cls(entry["name"], params)
+
+    def _compile(self) -> List[Tuple[str, Extractor]]:
+        fields: List[Tuple[str, Extractor]] = []
+        topic_pos = 1
+        data_params = [(n, t) for n, t, indexed in self.params if not indexed]
+        for arg_name, abi_type, indexed in self.params:
+            if indexed:
+                fields.append((arg_name, _topic_extractor(abi_type, topic_pos)))
+                topic_pos += 1
+        native = [_data_extractor(t, slot) for slot, (_, t) in enumerate(data_params)]
+        if all(e is not None for e in native):
+            fields.extend((n, e) for (n, _), e in zip(data_params, native))
+        elif data_params:
+            fields.extend(_abi_fallback(data_params))
+        return fields
+
+    def decode(self, topics: Sequence[bytes], data: bytes) -> Dict[str, Any]:
+        """Raises ValueError for logs too short for the signature (truncated data or topics)."""
+        if len(topics) < self.topic_count or any(len(t) != 32 for t in topics[1:self.topic_count]):
+            raise ValueError(f"{self.signature}: malformed topics")
+        if len(data) < self._head_size:
+            raise ValueError(f"{self.signature}: data shorter than {self._head_size} bytes")
+        return {name: extract(topics, data) for name, extract in self._fields}
+
+
+def _abi_input_type(inp: Dict[str, Any]) -> str:
+    t = inp["type"]
+    if t.startswith("tuple"):
+        inner = ",".join(_abi_input_type(c) for c in inp.get("components") or [])
+        return f"({inner}){t[5:]}"
+    return _canonical_type(t)
+
+
+def _topic_extractor(abi_type: str, pos: int) -> Extractor:
+    decode = _word_decoder(abi_type)
+    if decode is None:
+        # Indexed dynamic values are stored as their keccak hash.
+        return lambda topics, data: "0x" + bytes(topics[pos]).hex()
+    return lambda topics, data: decode(bytes(topics[pos]))
+
+
+def _check_tail(data: bytes, end: int) -> None:
+    if end > len(data):
+        raise ValueError(f"dynamic value ends at byte {end}, past the {len(data)}-byte data")
+
+
+def _tail_word(data: bytes, off: int) -> bytes:
+    _check_tail(data, off + 32)
+    return data[off:off + 32]
+
+
+def _data_extractor(abi_type: str, slot: int) -> Optional[Extractor]:
+    start = 32 * slot
+    decode = _word_decoder(abi_type)
+    if decode is not None:
+        return lambda topics, data: decode(data[start:start + 32])
+    if abi_type in ("bytes", "string"):
+        as_text = abi_type == "string"
+
+        def dynamic(topics: Sequence[bytes], data: bytes) -> Any:
+            off = int.from_bytes(data[start:start + 32], "big")
+            size = int.from_bytes(_tail_word(data, off), "big")
+            _check_tail(data, off + 32 + size)
+            raw = data[off + 32:off + 32 + size]
+            return raw.decode("utf-8", "replace") if as_text else "0x" + raw.hex()
+        return dynamic
+    if abi_type.endswith("[]"):
+        item = _word_decoder(abi_type[:-2])
+        if item is None:
+            return None
+
+        def array(topics: Sequence[bytes], data: bytes) -> List[Any]:
+            off = int.from_bytes(data[start:start + 32], "big")
+            count = int.from_bytes(_tail_word(data, off), "big")
+            base = off + 32
+            _check_tail(data, base + 32 * count)
+            return [item(data[base + 32 * i:base + 32 * (i + 1)]) for i in range(count)]
+        return array
+    return None
+
+
+def _abi_fallback(data_params: List[Tuple[str, str]]) -> List[Tuple[str, Extractor]]:
+    """Decode the whole data section with eth_abi once per log, then split by field."""
+    from eth_abi import decode as abi_decode
+
+    types = [t for _, t in data_params]
+    last: Dict[str, Any] = {"data": None, "values": ()}
+
+    def values(data: bytes) -> Tuple[Any, ...]:
+        if last["data"] is not data:
+            last["data"] = data
+            last["values"] = abi_decode(types, data)
+        return last["values"]
+
+    return [
+        (name, (lambda i: lambda topics, data: values(data)[i])(i))
+        for i, (name, _) in enumerate(data_params)
+    ]
+
+
+class EventRegistry:
+    """
+    topic0 -> decoder dispatch table. Build it once, then decode_log() /
+    decode_receipts() cost one dict lookup per log.
+    """
+
+    def __init__(self, decoders: Iterable[EventDecoder] = ()) -> None:
+        self._table: Dict[Tuple[bytes, int], EventDecoder] = {}
+        for d in decoders:
+            self.register(d)
+
+    @classmethod
+    def with_builtins(cls) -> "EventRegistry":
+        return cls(EventDecoder.from_signature(s) for s in BUILTIN_EVENTS)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def register(self, decoder: EventDecoder) -> None:
+        """Add a decoder; a later decoder with the same topic0 and topic count wins."""
+        self._table[(decoder.topic0, decoder.topic_count)] = decoder
+
+    def register_signature(self, signature: str) -> EventDecoder:
+        decoder = EventDecoder.from_signature(signature)
+        self.register(decoder)
+        return decoder
+
+    def register_abi(self, abi: Union[str, Path, List[Dict[str, Any]]]) -> int:
+        """Register every non-anonymous event of an ABI (list, JSON text or file). Returns the count."""
+        if isinstance(abi, Path) or (isinstance(abi, str) and not abi.lstrip().startswith("[")):
+            abi = json.loads(Path(abi).read_text(encoding="utf-8"))
+        elif isinstance(abi, str):
+            abi = json.loads(abi)
+        count = 0
+        for entry in abi:
+            if entry.get("type") == "event" and not entry.get("anonymous"):
+                self.register(EventDecoder.from_abi(entry))
+                count += 1
+        return count
+
+    def lookup(self, topics: Sequence[bytes]) -> Optional[EventDecoder]:
+        if not topics:
+            return None
+        return self._table.get((topics[0], len(topics)))
+
+    def decode_log(self, log: Any, tx_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Decoded event for a log, or None when no registered event matches or
+        the log is malformed for it (truncated data or topics).
+        """
+        topics = log.topics
+        if not topics:
+            return None
+        decoder = self._table.get((topics[0], len(topics)))
+        if decoder is None:
+            return None
+        try:
+            args = decoder.decode(topics, bytes(log.data))
+        except Exception:
+            # Malformed data for this signature (e.g. a non-standard emitter).
+            return None
+        return {
+            "event": decoder.name,
+            "signature": decoder.signature,
+            "tx_hash": tx_hash,
+            "address": log.address,
+            "log_index": log.logIndex,
+            "args": args,
+        }
+
+    def decode_receipts(self, receipts: Iterable[Any]) -> List[Dict[str, Any]]:
+        """Decode every recognised log of a receipt set, in receipt / log order."""
+        out: List[Dict[str, Any]] = []
+        for receipt in receipts:
+            tx_hash = receipt.transactionHash
+            if not isinstance(tx_hash, str):
+                tx_hash = "0x" + bytes(tx_hash).hex()
+            for log in receipt.logs or []:
+                event = self.decode_log(log, tx_hash)
+                if event is not None:
+                    out.append(event)
+        return out
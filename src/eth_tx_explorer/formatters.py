@@ -1,60 +1,185 @@
-def format_transfer_summary(w3, record: dict) -> str:
+from functools import lru_cache
+from typing import Any, List, Sequence
+
+
+MAX_WEI = 2**256 - 1
+_SCALE = {18: 10**18, 9: 10**9}
+
+TRANSFER_SEPARATOR = "-" * 60
+BLOCK_SEPARATOR = "=" * 60
+LAYOUTS = ("blocks", "table")
+
+
+def format_units(value: int, decimals: int) -> str:
     """
-    Format a single transfer record. Strict order:
-    TransferType -> Transaction -> TransactionIndex -> EnvelopeType -> From/To -> Value or Token -> Gas.
+    ``str(w3.from_wei(value, unit))`` using integer division only.
+
+    Matches the Decimal rendering byte-for-byte: trailing zeros are dropped
+    and values below 1e-6 switch to scientific notation (``1E-18``).
     """
+    if value == 0:
+        return "0"
+    if value < 0 or value > MAX_WEI:
+        raise ValueError("value must be between 0 and 2**256 - 1")
+    whole, frac = divmod(value, _SCALE.get(decimals) or 10**decimals)
+    if not frac:
+        return str(whole)
+    frac_digits = f"{frac:0{decimals}d}".rstrip("0")
+    if whole:
+        return f"{whole}.{frac_digits}"
+    digits = frac_digits.lstrip("0")
+    adjusted = len(digits) - len(frac_digits) - 1
+    if adjusted >= -6:
+        return f"0.{frac_digits}"
+    mantissa = f"{digits[0]}.{digits[1:]}" if len(digits) > 1 else digits
+    return f"{mantissa}E{adjusted}"
+
+
+def format_ether(wei: int) -> str:
+    return format_units(wei, 18)
+
+
+@lru_cache(maxsize=4096)
+def format_gwei(wei: int) -> str:
+    """Gas prices repeat heavily within a block, so renderings are memoized."""
+    return format_units(wei, 9)
+
+
+def _transfer_lines(record: dict, from_addr: str, to_addr: str) -> List[str]:
     lines = [
         f"TransferType: {record['transfer_type']}",
         f"Transaction: {record['tx_hash']}",
         f"TransactionIndex: {record['transaction_index']}",
         f"EnvelopeType: {record['envelope_type']}",
+        f"From: {from_addr} → To: {to_addr}",
     ]
-    from_addr = record.get("from_addr") or ""
-    to_addr = record.get("to_addr") or "(contract creation)"
-    lines.append(f"From: {from_addr} → To: {to_addr}")
     if record["transfer_type"] == "ERC20_TRANSFER":
         lines.append(f"Token Contract: {record['token_contract']}")
         lines.append(f"Token Amount: {record['token_value']} (raw uint256)")
     else:
-        wei = record.get("eth_value_wei") or 0
-        lines.append(f"Value: {w3.from_wei(wei, 'ether')} ETH")
-    gas = record.get("gas") or 0
-    gas_used = record.get("gasUsed") or 0
-    lines.append(f"Gas: {gas} limit | {gas_used} used")
+        lines.append(f"Value: {format_ether(record.get('eth_value_wei') or 0)} ETH")
+    lines.append(f"Gas: {record.get('gas') or 0} limit | {record.get('gasUsed') or 0} used")
     t = record.get("tx_type", 0)
     if t == 2:
         lines.append("Type: EIP-1559")
         mf = record.get("maxFeePerGas")
         mp = record.get("maxPriorityFeePerGas")
         if mf is not None:
-            lines.append(f"Max Fee: {w3.from_wei(mf, 'gwei')} gwei")
+            lines.append(f"Max Fee: {format_gwei(mf)} gwei")
         if mp is not None:
-            lines.append(f"Max Priority: {w3.from_wei(mp, 'gwei')} gwei")
+            lines.append(f"Max Priority: {format_gwei(mp)} gwei")
     else:
         lines.append("Type: Legacy" if t == 0 else "Type: EIP-2930")
         gp = record.get("gasPrice")
         if gp is not None:
-            lines.append(f"Gas Price: {w3.from_wei(gp, 'gwei')} gwei")
+            lines.append(f"Gas Price: {format_gwei(gp)} gwei")
     eff = record.get("effectiveGasPrice")
     if eff is not None:
-        lines.append(f"Effective Price: {w3.from_wei(eff, 'gwei')} gwei")
-    return "\n".join(lines)
+        lines.append(f"Effective Price: {format_gwei(eff)} gwei")
+    return lines
+
+
+def format_transfer_summary(w3, record: dict) -> str:
+    """
+    Format a single transfer record. Strict order:
+    TransferType -> Transaction -> TransactionIndex -> EnvelopeType -> From/To -> Value or Token -> Gas.
+
+    Amounts are rendered with format_units (same text as w3.from_wei); w3 is
+    kept for API compatibility.
+    """
+    from_addr = record.get("from_addr") or ""
+    to_addr = record.get("to_addr") or "(contract creation)"
+    return "\n".join(_transfer_lines(record, str(from_addr), str(to_addr)))
+
+
+class TransferRenderer:
+    """
+    Renders a block's transfer records into one string, written with a single
+    buffered write instead of one echo per line block.
+
+    layout "blocks" is byte-identical to echoing format_transfer_summary per
+    record; "table" prints one fixed-width row per transfer.
+    """
+
+    TABLE_HEADER = (
+        f"{'IDX':>5}  {'TYPE':<28}  {'FROM':<42}  {'TO':<42}  {'GAS USED':>10}  AMOUNT"
+    )
+
+    def __init__(self, layout: str = "blocks") -> None:
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout {layout!r}; expected one of {', '.join(LAYOUTS)}")
+        self.layout = layout
+
+    def record(self, record: dict) -> str:
+        """One record in the current layout, without a trailing newline."""
+        from_addr = str(record.get("from_addr") or "")
+        to_addr = str(record.get("to_addr") or "(contract creation)")
+        if self.layout == "blocks":
+            return "\n".join(_transfer_lines(record, from_addr, to_addr))
+        if record["transfer_type"] == "ERC20_TRANSFER":
+            amount = f"{record['token_value']} {record.get('token_contract') or ''}"
+        else:
+            amount = f"{format_ether(record.get('eth_value_wei') or 0)} ETH"
+        return (
+            f"{record['transaction_index']:>5}  {record['transfer_type']:<28}  "
+            f"{from_addr:<42}  {to_addr:<42}  {record.get('gasUsed') or 0:>10}  {amount}"
+        )
+
+    def render_block(self, block_number: int, records: Sequence[dict]) -> str:
+        """Full text output for a block, newline-terminated."""
+        parts = [f"Block {block_number} — {len(records)} transfer(s) found", BLOCK_SEPARATOR]
+        if self.layout == "blocks":
+            for r in records:
+                parts.append(self.record(r))
+                parts.append(TRANSFER_SEPARATOR)
+        else:
+            parts.append(self.TABLE_HEADER)
+            parts.extend(self.record(r) for r in records)
+        parts.append("")
+        return "\n".join(parts)
+
+    def write_block(self, stream: Any, block_number: int, records: Sequence[dict]) -> None:
+        stream.write(self.render_block(block_number, records))
+
+
+def transfer_record_to_json(record: dict) -> dict:
+    """JSON-ready view of a transfer record (addresses as strings, stable key order)."""
+    tc = record.get("token_contract")
+    return {
+        "transfer_type": record["transfer_type"],
+        "tx_hash": record["tx_hash"],
+        "transaction_index": record["transaction_index"],
+        "envelope_type": record["envelope_type"],
+        "from_addr": str(record["from_addr"]) if record.get("from_addr") is not None else None,
+        "to_addr": str(record["to_addr"]) if record.get("to_addr") is not None else None,
+        "eth_value_wei": record.get("eth_value_wei"),
+        "token_contract": str(tc) if tc is not None else None,
+        "token_value": record.get("token_value"),
+        "gas": record.get("gas"),
+        "gasPrice": record.get("gasPrice"),
+        "maxFeePerGas": record.get("maxFeePerGas"),
+        "maxPriorityFeePerGas": record.get("maxPriorityFeePerGas"),
+        "gasUsed": record.get("gasUsed"),
+        "effectiveGasPrice": record.get("effectiveGasPrice"),
+        "tx_type": record.get("tx_type"),
+    }
+
+
+_TX_INFO_KEYS = (
+    "hash",
+    "from",
+    "to",
+    "value_eth",
+    "gas_used",
+    "fee_eth",
+    "status",
+    "block_number",
+    "timestamp",
+)
 
 
 def format_tx_info(tx: dict) -> str:
-    required_keys = [
-        "hash",
-        "from",
-        "to",
-        "value_eth",
-        "gas_used",
-        "fee_eth",
-        "status",
-        "block_number",
-        "timestamp",
-    ]
-    
-    missing_keys = [key for key in required_keys if key not in tx]
+    missing_keys = [key for key in _TX_INFO_KEYS if key not in tx]
 
     if missing_keys:
         raise ValueError(
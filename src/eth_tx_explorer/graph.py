@@ -0,0 +1,273 @@
+"""Transfer graph: addresses as integer nodes, transfers as array-backed edges.
+
+Node IDs come from an AddressTable (dense, first-seen order). Each transfer
+is one edge in parallel typed arrays: source, target, token, value and
+block. Values are uint256, split into low / high 64-bit words, with the rare
+amount above 2**128 kept in a side dict. That is 32 bytes per edge, with no
+per-edge Python objects.
+
+Queries walk a CSR index (per direction: an offsets array over node IDs and
+the edge IDs sorted by node), built on first use. Edges appended after that
+go to a small per-node tail list until the tail outgrows a quarter of the
+index, at which point the index is dropped and rebuilt on the next query,
+so appends stay cheap and the rebuild cost is amortized.
+"""
+
+from array import array
+from collections import Counter
+from itertools import accumulate
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from eth_tx_explorer.addresses import AddressTable
+from eth_tx_explorer.watchlist import AddressLike
+
+
+# Token column value for native ETH (plain, call-with-value and internal transfers).
+ETH = 0xFFFFFFFF
+
+DIRECTIONS = ("out", "in")
+
+_MASK64 = (1 << 64) - 1
+_MAX_BLOCK = (1 << 32) - 1
+# Tail edges tolerated before the CSR index is rebuilt (or 1/4 of the index).
+_TAIL_MIN = 4096
+
+
+class TransferGraph:
+    """
+    Directed multigraph of transfers. Build with add_records() (records from
+    process_block_transfers) or add_transfer(); query with reach() and
+    top_flows().
+    """
+
+    def __init__(self, addresses: Optional[AddressTable] = None) -> None:
+        self.addresses = addresses if addresses is not None else AddressTable()
+        self._src = array("I")
+        self._dst = array("I")
+        self._token = array("I")
+        self._lo = array("Q")
+        self._hi = array("Q")
+        self._big: Dict[int, int] = {}
+        self._block = array("I")
+        # direction -> (offsets, edge IDs sorted by node); absent until built.
+        self._csr: Dict[str, Tuple[array, array]] = {}
+        self._indexed = 0
+        self._tail: Dict[str, Dict[int, List[int]]] = {d: {} for d in DIRECTIONS}
+
+    def __len__(self) -> int:
+        return len(self._src)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the edge columns and CSR indexes (excluding the AddressTable)."""
+        columns = (self._src, self._dst, self._token, self._lo, self._hi, self._block)
+        total = sum(a.itemsize * len(a) for a in columns)
+        for offsets, order in self._csr.values():
+            total += offsets.itemsize * len(offsets) + order.itemsize * len(order)
+        return total
+
+    def token_id(self, token: Optional[AddressLike]) -> Optional[int]:
+        """Token column value for a token address or "ETH" (None stays None)."""
+        if token is None:
+            return None
+        if isinstance(token, str) and token.upper() == "ETH":
+            return ETH
+        return self.addresses.intern(token)
+
+    def add_transfer(
+        self, from_addr: AddressLike, to_addr: AddressLike, token: Optional[AddressLike], value: int, block: int
+    ) -> int:
+        """Append one edge (token None or "ETH" for native ETH); returns its edge ID."""
+        addresses = self.addresses
+        s, d = addresses.intern(from_addr), addresses.intern(to_addr)
+        t = ETH if token is None else self.token_id(token)
+        e = len(self._src)
+        self._src.append(s)
+        self._dst.append(d)
+        self._token.append(t)
+        if value >> 128:
+            self._big[e] = value
+            value = 0
+        self._lo.append(value & _MASK64)
+        self._hi.append(value >> 64)
+        self._block.append(block)
+        if self._csr:
+            if e + 1 - self._indexed > max(_TAIL_MIN, self._indexed // 4):
+                self._csr.clear()
+                for tail in self._tail.values():
+                    tail.clear()
+            else:
+                for direction, node in (("out", s), ("in", d)):
+                    if direction in self._csr:
+                        self._tail[direction].setdefault(node, []).append(e)
+        return e
+
+    def add_records(self, records: Iterable[Mapping[str, Any]], block_number: int) -> int:
+        """
+        Append the transfers in process_block_transfers() records of one block.
+        Contract creations (no recipient address) are skipped. Returns the
+        number of edges added.
+        """
+        added = 0
+        for r in records:
+            from_addr, to_addr = r.get("from_addr"), r.get("to_addr")
+            if not from_addr or not to_addr or not to_addr.startswith("0x"):
+                continue
+            token = r.get("token_contract")
+            value = r.get("token_value") if token else r.get("eth_value_wei")
+            self.add_transfer(from_addr, to_addr, token, value or 0, block_number)
+            added += 1
+        return added
+
+    def endpoints(self, edge: int) -> Tuple[int, int]:
+        """(source, target) node IDs of an edge."""
+        return self._src[edge], self._dst[edge]
+
+    def value(self, edge: int) -> int:
+        big = self._big.get(edge)
+        return big if big is not None else self._lo[edge] | self._hi[edge] << 64
+
+    def edge(self, edge: int) -> Dict[str, Any]:
+        """Edge as a dict with checksummed addresses (token "ETH" for native ETH)."""
+        checksum = self.addresses.checksum
+        token = self._token[edge]
+        return {
+            "from": checksum(self._src[edge]),
+            "to": checksum(self._dst[edge]),
+            "token": "ETH" if token == ETH else checksum(token),
+            "value": self.value(edge),
+            "block": self._block[edge],
+        }
+
+    def _index(self, direction: str) -> Tuple[array, array]:
+        csr = self._csr.get(direction)
+        if csr is not None:
+            return csr
+        if self._csr and self._indexed != len(self._src):
+            # The other direction's index has a tail: rebuild both from scratch.
+            self._csr.clear()
+            for tail in self._tail.values():
+                tail.clear()
+        keys = self._src if direction == "out" else self._dst
+        counts = [0] * (len(self.addresses) + 1)
+        for node, count in Counter(keys).items():
+            counts[node + 1] = count
+        offsets = array("Q", accumulate(counts))
+        # Counting-sort placement: within a node, edges stay in append
+        # (usually block) order, and nothing of size E is built besides order.
+        cursor = offsets.tolist()
+        order = array("I", bytes(len(keys) * array("I").itemsize))
+        for e, node in enumerate(keys):
+            slot = cursor[node]
+            order[slot] = e
+            cursor[node] = slot + 1
+        csr = self._csr[direction] = (offsets, order)
+        self._indexed = len(keys)
+        return csr
+
+    def edges(self, node: int, direction: str = "out") -> Iterator[int]:
+        """Edge IDs leaving (out) or entering (in) a node."""
+        offsets, order = self._index(direction)
+        if node + 1 < len(offsets):
+            yield from order[offsets[node]:offsets[node + 1]]
+        tail = self._tail[direction].get(node)
+        if tail:
+            yield from tail
+
+    def reach(
+        self,
+        address: AddressLike,
+        hops: int = 2,
+        direction: str = "out",
+        token: Optional[AddressLike] = None,
+        start_block: Optional[int] = None,
+        end_block: Optional[int] = None,
+        causal: bool = True,
+    ) -> Dict[int, Tuple[int, int, int]]:
+        """
+        Addresses reachable from address within hops transfers:
+        node ID -> (hops, block, via edge), all three describing one path;
+        the start node is included as (0, start, -1).
+
+        direction "out" follows funds forward, "in" traces where they came
+        from. With causal=False the path is the first found with the fewest
+        hops. With causal=True a hop only counts if it happens no earlier
+        (out) / no later (in) than the transfer that reached the node, and
+        the path is the one with the earliest arrival (out) / latest
+        departure (in), fewest hops among those. Only edges in
+        start_block..end_block and of token (if given) are used.
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        token_id = self.token_id(token)
+        lo = start_block if start_block is not None else 0
+        hi = end_block if end_block is not None else _MAX_BLOCK
+        forward = direction == "out"
+        ends = self._dst if forward else self._src
+        blocks, tokens = self._block, self._token
+        start = self.addresses.intern(address)
+        # Time keys are negated going backwards, so "usable" is always key >= t.
+        first = lo if forward else -hi
+        reached = {start: (0, lo if forward else hi, -1)}
+        best = {start: first}
+        frontier = {start: first}
+        for depth in range(1, hops + 1):
+            nxt: Dict[int, int] = {}
+            for u, t in frontier.items():
+                for e in self.edges(u, direction):
+                    b = blocks[e]
+                    if b < lo or b > hi or (token_id is not None and tokens[e] != token_id):
+                        continue
+                    key = b if forward else -b
+                    if causal and key < t:
+                        continue
+                    v = ends[e]
+                    if v in reached and (not causal or key >= best[v]):
+                        continue
+                    # First reach, or an earlier arrival (causal): hops, block
+                    # and via all describe this one path.
+                    reached[v] = (depth, b, e)
+                    best[v] = key
+                    if causal:
+                        nxt[v] = key
+                    else:
+                        nxt.setdefault(v, key)
+            frontier = nxt
+        return reached
+
+    def top_flows(
+        self,
+        address: AddressLike,
+        direction: str = "out",
+        token: Optional[AddressLike] = None,
+        start_block: Optional[int] = None,
+        end_block: Optional[int] = None,
+        limit: int = 10,
+    ) -> List[Tuple[int, int, int, int]]:
+        """
+        Largest counterparties of address: (counterparty ID, token, total
+        value, transfer count). Ranked by total value when token is given;
+        across tokens values are not comparable, so by transfer count.
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        token_id = self.token_id(token)
+        lo = start_block if start_block is not None else 0
+        hi = end_block if end_block is not None else _MAX_BLOCK
+        ends = self._dst if direction == "out" else self._src
+        blocks, tokens, low, high, big = self._block, self._token, self._lo, self._hi, self._big
+        totals: Dict[Tuple[int, int], int] = {}
+        counts: Dict[Tuple[int, int], int] = {}
+        for e in self.edges(self.addresses.intern(address), direction):
+            b = blocks[e]
+            t = tokens[e]
+            if b < lo or b > hi or (token_id is not None and t != token_id):
+                continue
+            key = (ends[e], t)
+            totals[key] = totals.get(key, 0) + (big[e] if big and e in big else low[e] | high[e] << 64)
+            counts[key] = counts.get(key, 0) + 1
+        if token_id is not None:
+            top = sorted(totals, key=totals.__getitem__, reverse=True)[:limit]
+        else:
+            top = sorted(totals, key=lambda key: (counts[key], totals[key]), reverse=True)[:limit]
+        return [(node, t, totals[(node, t)], counts[(node, t)]) for node, t in top]
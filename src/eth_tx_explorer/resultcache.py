@@ -0,0 +1,468 @@
+"""Derived-result cache for process_block_transfers().
+
+Raw RPC data can be memoized (dedup.py) or archived (archive.py), but a rerun
+still redoes contract classification, log decoding and gas summaries for
+every block. This cache stores the finished transfer records per block in
+sqlite, keyed by
+
+- the block hash, so a reorg (new hash at the same height) misses instead of
+  returning records for a block that is no longer canonical;
+- an extractor version: a hash of the source of every package module on the
+  extraction path (everything rpc.py and core.py import, directly or not:
+  transports, dedup, events, traces, ...), so any change to the code that
+  fetches or shapes the records misses as well;
+- a variant string for the options that change the output (--internal and
+  its tracer, the --watch set).
+
+Blocks at or below the finality depth also get a number -> hash row, so a
+repeat query over finalized history is one sqlite read per block and no RPC.
+Newer blocks cost one header fetch to learn the current hash first. Rows of
+other extractor versions are never read; they are pruned a batch at a time
+as new results are committed.
+
+Records are stored in a compact columnar form: field names and distinct
+values are written once per block (0x-hex strings such as hashes and
+lowercase addresses, and EIP-55 addresses, as raw bytes), and each field is a
+fixed-width column of indexes into that value table, so decoding is a few
+bulk array loads.
+"""
+
+import ast
+import hashlib
+import importlib.util
+import sqlite3
+import sys
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from web3 import Web3
+
+from eth_tx_explorer import __version__
+from eth_tx_explorer.addresses import AddressTable
+from eth_tx_explorer.blocktime import DEFAULT_FINALITY_DEPTH, cache_dir
+from eth_tx_explorer.bloom import LogBloomFilter
+from eth_tx_explorer.core import process_block_transfers
+from eth_tx_explorer.traces import CALL_TRACER
+from eth_tx_explorer.watchlist import Watchlist
+
+
+# Bump when the record encoding below changes.
+FORMAT_VERSION = 1
+
+# Entry points of record extraction: the RPC stack (get_web3) and
+# process_block_transfers(). The extractor version covers every package
+# module they import, directly or not.
+EXTRACTOR_ROOTS = ("rpc", "core")
+
+# Writes are committed in batches; sqlite fsyncs on every commit.
+_COMMIT_EVERY = 256
+
+# Value-table kinds.
+_TEXT, _HEX, _CHECKSUM, _UINT, _NEG_INT = 0, 1, 2, 3, 4
+
+_ABSENT = object()
+
+
+def _module_source(name: str) -> Optional[bytes]:
+    spec = importlib.util.find_spec(f"eth_tx_explorer.{name}")
+    if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+        return None
+    try:
+        return Path(spec.origin).read_bytes()
+    except OSError:
+        return None
+
+
+def _package_imports(source: bytes) -> List[str]:
+    """eth_tx_explorer submodules imported by a module's source."""
+    names = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            # "from eth_tx_explorer import x" may name a submodule.
+            modules = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+        else:
+            continue
+        for module in modules:
+            if module.startswith("eth_tx_explorer.") and module.count(".") == 1:
+                names.append(module.split(".", 1)[1])
+    return names
+
+
+@lru_cache(maxsize=None)
+def extractor_modules() -> Tuple[str, ...]:
+    """Package modules reachable by import from EXTRACTOR_ROOTS, sorted."""
+    seen = set()
+    todo = list(EXTRACTOR_ROOTS)
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        source = _module_source(name)
+        if source is None and name not in EXTRACTOR_ROOTS:
+            # Not a module (an imported name such as __version__).
+            continue
+        seen.add(name)
+        if source is not None:
+            todo.extend(_package_imports(source))
+    return tuple(sorted(seen))
+
+
+@lru_cache(maxsize=None)
+def extractor_version() -> bytes:
+    """16-byte digest of FORMAT_VERSION and the source of extractor_modules()."""
+    h = hashlib.sha256(b"format:%d" % FORMAT_VERSION)
+    for name in extractor_modules():
+        source = _module_source(name)
+        if source is None:
+            # No source on disk (frozen install): fall back to the package version.
+            source = __version__.encode()
+        h.update(name.encode() + b"\0" + source)
+    return h.digest()[:16]
+
+
+def result_variant(internal: bool, tracer: str, watchlist: Optional[Watchlist]) -> str:
+    """Cache key part for the process_block_transfers() options that change its output."""
+    variant = f"internal={tracer}" if internal else "plain"
+    if watchlist is not None:
+        digest = hashlib.sha256(b"".join(sorted(watchlist.keys()))).hexdigest()[:16]
+        variant += f";watch={digest}"
+    return variant
+
+
+def _put_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _value_entry(v: Any, addresses: AddressTable) -> Tuple[int, bytes]:
+    if isinstance(v, str):
+        if v[:2] == "0x" and len(v) % 2 == 0:
+            body = v[2:]
+            try:
+                raw = bytes.fromhex(body)
+            except ValueError:
+                raw = None
+            if raw is not None:
+                if raw.hex() == body:
+                    return _HEX, raw
+                if len(raw) == 20 and addresses.checksum(addresses.intern(raw)) == v:
+                    return _CHECKSUM, raw
+        return _TEXT, v.encode()
+    if isinstance(v, int) and not isinstance(v, bool):
+        if v >= 0:
+            return _UINT, v.to_bytes((v.bit_length() + 7) // 8, "big")
+        return _NEG_INT, (-v).to_bytes(((-v).bit_length() + 7) // 8, "big")
+    raise TypeError(f"Cannot encode {v!r} ({type(v).__name__})")
+
+
+def _index_array(indexes: List[int], typecode: str) -> bytes:
+    column = array(typecode, indexes)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def encode_records(records: List[Dict[str, Any]], addresses: Optional[AddressTable] = None) -> bytes:
+    """
+    Compact binary form of transfer records (None, int and str values).
+    Raises TypeError for any other value type.
+
+    Layout: format byte, field names, a table of the distinct values, then
+    one little-endian index column per field (0 = None, 1 = field absent).
+    """
+    if addresses is None:
+        addresses = AddressTable()
+    keys: Dict[str, None] = {}
+    for r in records:
+        keys.update(dict.fromkeys(r))
+    table: Dict[Tuple[type, Any], int] = {}
+    columns = []
+    for k in keys:
+        column = []
+        for r in records:
+            v = r.get(k, _ABSENT)
+            if v is None:
+                column.append(0)
+            elif v is _ABSENT:
+                column.append(1)
+            else:
+                # Keyed by type too, so True never aliases 1 (bools are rejected below).
+                column.append(table.setdefault((type(v), v), len(table) + 2))
+        columns.append(column)
+    out = bytearray([FORMAT_VERSION])
+    _put_varint(out, len(keys))
+    for k in keys:
+        raw = k.encode()
+        _put_varint(out, len(raw))
+        out += raw
+    _put_varint(out, len(table))
+    for _, v in table:
+        kind, raw = _value_entry(v, addresses)
+        out.append(kind)
+        _put_varint(out, len(raw))
+        out += raw
+    _put_varint(out, len(records))
+    typecode = "H" if len(table) + 2 <= 0xFFFF else "I"
+    out.append(ord(typecode))
+    for column in columns:
+        out += _index_array(column, typecode)
+    return bytes(out)
+
+
+def decode_records(data: bytes, addresses: Optional[AddressTable] = None) -> List[Dict[str, Any]]:
+    """
+    Records from encode_records(). Addresses are rendered through the
+    AddressTable, so they share strings with freshly extracted records.
+    """
+    if not data or data[0] != FORMAT_VERSION:
+        raise ValueError("Unsupported transfer record encoding")
+    if addresses is None:
+        addresses = AddressTable()
+    pos = 1
+    n, pos = _get_varint(data, pos)
+    keys = []
+    for _ in range(n):
+        size, pos = _get_varint(data, pos)
+        keys.append(data[pos:pos + size].decode())
+        pos += size
+    n, pos = _get_varint(data, pos)
+    values: List[Any] = [None, _ABSENT]
+    for _ in range(n):
+        kind = data[pos]
+        size, pos = _get_varint(data, pos + 1)
+        raw = data[pos:pos + size]
+        pos += size
+        if kind == _HEX:
+            values.append(addresses.lower(addresses.intern(raw)) if size == 20 else "0x" + raw.hex())
+        elif kind == _UINT:
+            values.append(int.from_bytes(raw, "big"))
+        elif kind == _CHECKSUM:
+            values.append(addresses.checksum(addresses.intern(raw)))
+        elif kind == _NEG_INT:
+            values.append(-int.from_bytes(raw, "big"))
+        else:
+            values.append(raw.decode())
+    n, pos = _get_varint(data, pos)
+    typecode = chr(data[pos])
+    pos += 1
+    columns = []
+    absent = False
+    for _ in keys:
+        column = array(typecode)
+        end = pos + n * column.itemsize
+        column.frombytes(data[pos:end])
+        if sys.byteorder == "big":
+            column.byteswap()
+        pos = end
+        absent = absent or 1 in column
+        columns.append([values[i] for i in column])
+    records = [dict(zip(keys, row)) for row in zip(*columns)]
+    if absent:
+        for r in records:
+            for k in [k for k, v in r.items() if v is _ABSENT]:
+                del r[k]
+    return records
+
+
+def default_cache_path(chain_id: int) -> Path:
+    """Per-chain result cache under cache_dir()."""
+    return cache_dir() / f"transfers-{chain_id}.sqlite"
+
+
+class TransferCache:
+    """
+    sqlite store of encoded transfer records by (block hash, extractor
+    version, variant), plus number -> hash for finalized blocks.
+
+    final_through: highest block number treated as final (None: none are).
+    Rows written by another extractor version are never returned; each
+    commit deletes up to a batch of them until none are left.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, final_through: Optional[int] = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self.final_through = final_through
+        self.extractor = extractor_version()
+        self.hits = 0
+        self.misses = 0
+        self._uncommitted = 0
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path) if self.path is not None else ":memory:")
+        self._db.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);
+            CREATE TABLE IF NOT EXISTS transfers (
+                block_hash BLOB, extractor BLOB, variant TEXT, records BLOB,
+                PRIMARY KEY (block_hash, extractor, variant)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS canonical (number INTEGER PRIMARY KEY, block_hash BLOB NOT NULL);
+            """
+        )
+        # meta.extractor names the version all rows belong to; it is only
+        # updated once rows of older versions are gone.
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'extractor'").fetchone()
+        self._stale = row is not None and row[0] != self.extractor
+        if row is None:
+            self._db.execute("INSERT INTO meta VALUES ('extractor', ?)", (self.extractor,))
+            self._db.commit()
+
+    def __enter__(self) -> "TransferCache":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def is_final(self, block_number: int) -> bool:
+        return self.final_through is not None and block_number <= self.final_through
+
+    def get_final(self, block_number: int, variant: str) -> Optional[bytes]:
+        """Encoded records of a finalized block by number (one query), if cached."""
+        row = self._db.execute(
+            "SELECT t.records FROM canonical c JOIN transfers t ON t.block_hash = c.block_hash "
+            "WHERE c.number = ? AND t.extractor = ? AND t.variant = ?",
+            (block_number, self.extractor, variant),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, block_hash: bytes, variant: str) -> Optional[bytes]:
+        row = self._db.execute(
+            "SELECT records FROM transfers WHERE block_hash = ? AND extractor = ? AND variant = ?",
+            (block_hash, self.extractor, variant),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, block_hash: bytes, variant: str, data: bytes) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?)", (block_hash, self.extractor, variant, data)
+        )
+        self._written()
+
+    def set_canonical(self, block_number: int, block_hash: bytes) -> None:
+        """Record the hash of a finalized block."""
+        self._db.execute("INSERT OR REPLACE INTO canonical VALUES (?, ?)", (block_number, block_hash))
+        self._written()
+
+    def _written(self) -> None:
+        self._uncommitted += 1
+        if self._uncommitted >= _COMMIT_EVERY:
+            self.commit()
+
+    def commit(self) -> None:
+        if self._stale:
+            self._prune(_COMMIT_EVERY)
+        self._db.commit()
+        self._uncommitted = 0
+
+    def _prune(self, limit: int) -> None:
+        """Delete up to limit rows of other extractor versions."""
+        deleted = self._db.execute(
+            "DELETE FROM transfers WHERE (block_hash, extractor, variant) IN "
+            "(SELECT block_hash, extractor, variant FROM transfers WHERE extractor != ? LIMIT ?)",
+            (self.extractor, limit),
+        ).rowcount
+        if deleted < limit:
+            self._stale = False
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('extractor', ?)", (self.extractor,))
+
+    def close(self) -> None:
+        self.commit()
+        self._db.close()
+
+
+def open_transfer_cache(w3: Web3, path: Optional[Union[str, Path]] = None) -> TransferCache:
+    """Result cache for the connected chain (default under cache_dir()), finality from the current head."""
+    if path is None:
+        path = default_cache_path(w3.eth.chain_id)
+    return TransferCache(path, final_through=w3.eth.block_number - DEFAULT_FINALITY_DEPTH)
+
+
+def _full_block(w3: Web3, block_number: int) -> Any:
+    block = w3.eth.get_block(block_number, full_transactions=True)
+    if not block:
+        raise ValueError(f"Block {block_number} not found")
+    return block
+
+
+def cached_block_transfers(
+    w3: Web3,
+    block_number: int,
+    cache: TransferCache,
+    internal: bool = False,
+    tracer: str = CALL_TRACER,
+    watchlist: Optional[Watchlist] = None,
+    bloom_filter: Optional[LogBloomFilter] = None,
+    addresses: Optional[AddressTable] = None,
+) -> List[Dict[str, Any]]:
+    """
+    process_block_transfers() through a TransferCache.
+
+    A finalized block already in the cache costs one sqlite read. Otherwise
+    the block hash is looked up first (from the full block for finalized
+    blocks, which a miss needs anyway; from the header for recent ones), and
+    a miss is processed from that same full block and stored under its hash.
+    """
+    if addresses is None:
+        addresses = AddressTable()
+    variant = result_variant(internal, tracer, watchlist)
+    final = cache.is_final(block_number)
+    block = None
+    if final:
+        data = cache.get_final(block_number, variant)
+        if data is not None:
+            cache.hits += 1
+            return decode_records(data, addresses)
+        block = _full_block(w3, block_number)
+        block_hash = bytes(block.hash)
+    else:
+        header = w3.eth.get_block(block_number)
+        if not header:
+            raise ValueError(f"Block {block_number} not found")
+        block_hash = bytes(header.hash)
+    data = cache.get(block_hash, variant)
+    if data is not None:
+        cache.hits += 1
+        records = decode_records(data, addresses)
+    else:
+        cache.misses += 1
+        if block is None:
+            # Key by the block actually processed: after a reorg it differs from the header.
+            block = _full_block(w3, block_number)
+            block_hash = bytes(block.hash)
+        records = process_block_transfers(
+            w3,
+            block_number,
+            internal=internal,
+            tracer=tracer,
+            watchlist=watchlist,
+            bloom_filter=bloom_filter,
+            addresses=addresses,
+            block=block,
+        )
+        try:
+            cache.put(block_hash, variant, encode_records(records, addresses))
+        except TypeError:
+            # Not representable (unexpected value type): serve uncached.
+            return records
+    if final:
+        cache.set_canonical(block_number, block_hash)
+    return records
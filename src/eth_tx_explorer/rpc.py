@@ -1,7 +1,11 @@
 from web3 import Web3
 from dotenv import load_dotenv
+
+from eth_tx_explorer.dedup import install_dedup
+from eth_tx_explorer.transports import provider_for_url
 from pathlib import Path
 import os
+from typing import Any, Optional
 
 
 # Load .env from project root (once)
@@ -9,9 +13,18 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 load_dotenv(PROJECT_ROOT / ".env")
 
 
-def get_web3() -> Web3:
+def get_web3(session: Optional[Any] = None, dedup: bool = True) -> Web3:
     """
     Create and return a Web3 instance using ETH_RPC_URL from .env.
+
+    The transport follows the URL scheme: http(s):// uses HTTP, ws(s):// a
+    persistent WebSocket and ipc://PATH (or a bare socket path) a Unix
+    socket; the last two pipeline concurrent requests (see transports.py).
+
+    session: optional requests.Session shared by all threads (connection pool,
+    HTTP only).
+    dedup: memoize calls whose answer is pinned to a finalized block for the
+    lifetime of this instance (see dedup.py).
     """
     rpc_url = os.getenv("ETH_RPC_URL")
     if not rpc_url:
@@ -19,10 +32,17 @@ def get_web3() -> Web3:
             "ETH_RPC_URL environment variable not set"
         )
 
-    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    try:
+        provider = provider_for_url(rpc_url, session=session)
+    except ValueError as e:
+        raise RuntimeError(str(e))
+    w3 = Web3(provider)
 
     if not w3.is_connected():
         raise RuntimeError("Failed to connect to Ethereum RPC")
 
+    if dedup:
+        install_dedup(w3)
+
     return w3
 
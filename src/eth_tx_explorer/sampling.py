@@ -0,0 +1,284 @@
+"""Stratified block sampling for range estimates.
+
+Questions like "ERC-20 transfers per block over the last month" do not need
+every block. The range is cut into equal-width strata of consecutive blocks
+and a few blocks are drawn at random (without replacement) from each, in
+proportion to stratum size, so daily activity cycles and slow trends are
+covered evenly. Per-block metrics of the sampled blocks give the stratified
+mean
+
+    mean = sum_h W_h * ybar_h,   var = sum_h W_h^2 * (1 - n_h / N_h) * s_h^2 / n_h
+
+(W_h = N_h / N), reported with a normal-approximation confidence interval
+for the per-block mean and for the range total (N * mean). With a target
+error, the sample doubles, topping up the same strata, until the interval's
+relative half-width on the primary metric is within target or every block has
+been processed (the estimate is then exact).
+"""
+
+import math
+import random
+import statistics
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from eth_tx_explorer.core import (
+    CONTRACT_CREATION_WITH_VALUE,
+    ERC20_TRANSFER,
+    ETH_CALL_WITH_VALUE,
+    ETH_INTERNAL_TRANSFER,
+    ETH_SIMPLE_TRANSFER,
+)
+
+
+DEFAULT_CONFIDENCE = 0.95
+# Upper bound on strata; each stratum starts with at least 2 blocks so its
+# variance can be estimated.
+MAX_STRATA = 64
+
+TRANSFER_METRICS = (
+    "transfers",
+    ERC20_TRANSFER,
+    ETH_SIMPLE_TRANSFER,
+    ETH_CALL_WITH_VALUE,
+    CONTRACT_CREATION_WITH_VALUE,
+    ETH_INTERNAL_TRANSFER,
+    "eth_value_wei",
+)
+
+SampleSpec = Union[int, float]
+
+
+def parse_sample_spec(text: str) -> SampleSpec:
+    """
+    --sample value: an integer block count ("500") or a fraction of the range
+    ("0.01" or "1%"), returned as int or float respectively.
+    """
+    value = text.strip()
+    try:
+        if value.endswith("%"):
+            rate = float(value[:-1]) / 100
+        elif value.isdigit():
+            count = int(value)
+            if count < 1:
+                raise ValueError
+            return count
+        else:
+            rate = float(value)
+    except ValueError:
+        raise ValueError(f"Invalid sample {text!r}: expected a block count (500) or a rate (0.01, 1%)")
+    if not 0 < rate <= 1:
+        raise ValueError(f"Invalid sample rate {text!r}: must be in (0, 1]")
+    return rate
+
+
+def sample_size(spec: SampleSpec, population: int) -> int:
+    """Blocks to draw for spec out of population (at least 2, at most all)."""
+    n = spec if isinstance(spec, int) else math.ceil(spec * population)
+    return min(population, max(n, 2))
+
+
+def transfer_metrics(records: Iterable[Mapping[str, Any]]) -> Dict[str, int]:
+    """
+    Per-block TRANSFER_METRICS from process_block_transfers() records, as
+    exact integers (eth_value_wei sums routinely exceed 2**53).
+    """
+    out = dict.fromkeys(TRANSFER_METRICS, 0)
+    for r in records:
+        out["transfers"] += 1
+        out[r["transfer_type"]] += 1
+        out["eth_value_wei"] += r.get("eth_value_wei") or 0
+    return out
+
+
+class Estimate:
+    """Stratified estimate of one metric: per-block mean and range total, +/- half-widths."""
+
+    def __init__(self, mean: float, variance: float, population: int, z: float) -> None:
+        self.mean = mean
+        self.half_width = z * math.sqrt(variance)
+        self.total = mean * population
+        self.total_half_width = self.half_width * population
+
+    @property
+    def relative_error(self) -> float:
+        if self.half_width == 0:
+            return 0.0
+        return self.half_width / abs(self.mean) if self.mean else math.inf
+
+    def to_dict(self) -> Dict[str, Any]:
+        relative_error = self.relative_error
+        return {
+            "mean_per_block": self.mean,
+            "mean_ci": [self.mean - self.half_width, self.mean + self.half_width],
+            "total": self.total,
+            "total_ci": [self.total - self.total_half_width, self.total + self.total_half_width],
+            # JSON has no infinity: a zero mean with nonzero spread has no relative error.
+            "relative_error": relative_error if math.isfinite(relative_error) else None,
+        }
+
+
+class StratifiedSample:
+    """
+    Blocks start..end (inclusive) split into strata; draws and per-block
+    metric values are kept per stratum.
+    """
+
+    def __init__(self, start: int, end: int, strata: int, seed: Optional[int] = None) -> None:
+        self.start = start
+        self.end = end
+        self.population = end - start + 1
+        strata = max(1, min(strata, self.population))
+        edges = [start + self.population * h // strata for h in range(strata + 1)]
+        self.strata: List[Tuple[int, int]] = list(zip(edges, edges[1:]))
+        self._rng = random.Random(seed)
+        self._taken: List[set] = [set() for _ in self.strata]
+        self._values: List[List[Mapping[str, float]]] = [[] for _ in self.strata]
+
+    @property
+    def size(self) -> int:
+        return sum(len(t) for t in self._taken)
+
+    def _draw(self, h: int, k: int) -> List[int]:
+        lo, hi = self.strata[h]
+        taken = self._taken[h]
+        if k >= hi - lo - len(taken):
+            new = [b for b in range(lo, hi) if b not in taken]
+        else:
+            new = []
+            while len(new) < k:
+                b = self._rng.randrange(lo, hi)
+                if b not in taken:
+                    taken.add(b)
+                    new.append(b)
+        taken.update(new)
+        return new
+
+    def grow(self, n: int) -> List[Tuple[int, int]]:
+        """
+        Top the sample up to n blocks (proportional allocation, largest
+        remainder, at least 2 per stratum) and return the new (stratum,
+        block) draws in block order.
+        """
+        n = min(n, self.population)
+        sizes = [hi - lo for lo, hi in self.strata]
+        quotas = [n * s / self.population for s in sizes]
+        alloc = [int(q) for q in quotas]
+        for h in sorted(range(len(sizes)), key=lambda h: alloc[h] - quotas[h])[: n - sum(alloc)]:
+            alloc[h] += 1
+        draws = []
+        for h, want in enumerate(alloc):
+            want = min(max(want, len(self._taken[h]), 2), sizes[h])
+            draws.extend((h, b) for b in self._draw(h, want - len(self._taken[h])))
+        return sorted(draws, key=lambda d: d[1])
+
+    def record(self, stratum: int, values: Mapping[str, float]) -> None:
+        self._values[stratum].append(values)
+
+    def estimate(self, metric: str, confidence: float = DEFAULT_CONFIDENCE) -> Estimate:
+        """Stratified mean / variance of metric over the recorded blocks."""
+        mean = variance = 0.0
+        for (lo, hi), values in zip(self.strata, self._values):
+            size, n = hi - lo, len(values)
+            if n == 0:
+                continue
+            ys = [v[metric] for v in values]
+            weight = size / self.population
+            # Sums stay exact for integer metrics; only ybar and s^2 become floats.
+            mean += weight * (sum(ys) / n)
+            if 1 < n < size:
+                s2 = statistics.variance(ys)
+                variance += weight * weight * (1 - n / size) * s2 / n
+        z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+        return Estimate(mean, variance, self.population, z)
+
+
+class RangeEstimate:
+    """Result of estimate_range(): per-metric Estimates plus how they were obtained."""
+
+    def __init__(
+        self,
+        sample: StratifiedSample,
+        metrics: Tuple[str, ...],
+        confidence: float,
+        rounds: int,
+        target_error: Optional[float],
+    ) -> None:
+        self.start = sample.start
+        self.end = sample.end
+        self.population = sample.population
+        self.sampled = sample.size
+        self.strata = len(sample.strata)
+        self.confidence = confidence
+        self.rounds = rounds
+        self.target_error = target_error
+        self.estimates = {m: sample.estimate(m, confidence) for m in metrics}
+
+    @property
+    def exact(self) -> bool:
+        return self.sampled == self.population
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "start_block": self.start,
+            "end_block": self.end,
+            "blocks": self.population,
+            "sampled": self.sampled,
+            "strata": self.strata,
+            "rounds": self.rounds,
+            "confidence": self.confidence,
+            "target_error": self.target_error,
+            "exact": self.exact,
+            "estimates": {m: e.to_dict() for m, e in self.estimates.items()},
+        }
+
+    def summary(self) -> str:
+        level = "exact" if self.exact else f"{self.confidence:.0%} CI"
+        lines = [
+            f"Blocks {self.start}..{self.end}: sampled {self.sampled}/{self.population} "
+            f"({self.sampled / self.population:.2%}) in {self.strata} strata, {self.rounds} round(s)",
+            f"{'metric':30s} {'per block':>24s} {'range total':>32s}",
+        ]
+        for metric, e in self.estimates.items():
+            lines.append(
+                f"{metric:30s} {e.mean:>12.4g} ± {e.half_width:<9.3g} "
+                f"{e.total:>18.6g} ± {e.total_half_width:<10.3g} ({level}, ±{e.relative_error:.1%})"
+            )
+        return "\n".join(lines)
+
+
+def estimate_range(
+    start: int,
+    end: int,
+    measure: Callable[[int], Mapping[str, float]],
+    spec: SampleSpec,
+    metrics: Tuple[str, ...] = TRANSFER_METRICS,
+    target_error: Optional[float] = None,
+    primary: str = "transfers",
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: Optional[int] = None,
+    on_round: Optional[Callable[[int, StratifiedSample, Estimate], None]] = None,
+) -> RangeEstimate:
+    """
+    Estimate metrics over blocks start..end (inclusive) by calling
+    measure(block_number) on a stratified sample sized by spec.
+
+    With target_error (relative half-width, e.g. 0.05 for ±5%), the sample
+    doubles until the primary metric's interval is that tight or the whole
+    range has been measured. on_round(round, sample, primary_estimate) is
+    called after each round.
+    """
+    population = end - start + 1
+    n = sample_size(spec, population)
+    sample = StratifiedSample(start, end, min(MAX_STRATA, max(1, n // 2)), seed)
+    rounds = 0
+    while True:
+        rounds += 1
+        for h, block_number in sample.grow(n):
+            sample.record(h, measure(block_number))
+        current = sample.estimate(primary, confidence)
+        if on_round is not None:
+            on_round(rounds, sample, current)
+        if target_error is None or current.relative_error <= target_error or sample.size == population:
+            break
+        n = min(population, 2 * sample.size)
+    return RangeEstimate(sample, metrics, confidence, rounds, target_error)
@@ -0,0 +1,295 @@
+"""Long-running HTTP query service over the core.py functions.
+
+One process keeps a single Web3 instance (one pooled HTTP session), an
+in-memory LRU of results for finalized blocks, and coalesces concurrent
+identical requests so they share one upstream fetch. core.py is synchronous,
+so upstream work runs on a bounded thread pool.
+
+Routes (JSON):
+    GET /blocks/{number}             fetch_block_info
+    GET /blocks/{number}/transfers   process_block_transfers (?internal=1)
+    GET /tx/{hash}                   fetch_tx_info
+    GET /tx/{hash}/logs              fetch_tx_logs
+    GET /metrics                     latency / cache / coalescing counters
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+from aiohttp import web
+from web3 import Web3
+from web3.exceptions import BlockNotFound, TransactionNotFound
+
+from eth_tx_explorer.blocktime import DEFAULT_FINALITY_DEPTH, FinalityTracker
+from eth_tx_explorer.core import (
+    fetch_block_info,
+    fetch_tx_info,
+    fetch_tx_logs,
+    process_block_transfers,
+)
+from eth_tx_explorer.formatters import transfer_record_to_json
+
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_WORKERS = 16
+# Latency samples kept per route for percentiles.
+_LATENCY_WINDOW = 2048
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+class LatencyMetrics:
+    """Per-route request counts, errors and latency percentiles (ms)."""
+
+    def __init__(self, window: int = _LATENCY_WINDOW) -> None:
+        self._window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+
+    def observe(self, route: str, seconds: float, error: bool = False) -> None:
+        self._samples.setdefault(route, deque(maxlen=self._window)).append(seconds * 1000.0)
+        self._counts[route] = self._counts.get(route, 0) + 1
+        if error:
+            self._errors[route] = self._errors.get(route, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for route, samples in self._samples.items():
+            ordered = sorted(samples)
+            n = len(ordered)
+            out[route] = {
+                "count": self._counts[route],
+                "errors": self._errors.get(route, 0),
+                "mean_ms": round(sum(ordered) / n, 3),
+                "p50_ms": round(ordered[n // 2], 3),
+                "p95_ms": round(ordered[min(n - 1, int(n * 0.95))], 3),
+                "max_ms": round(ordered[-1], 3),
+            }
+        return out
+
+
+class QueryService:
+    """
+    Cached, coalescing access to core.py lookups for one Web3 instance.
+
+    Results are cached only when their block is at least finality_depth blocks
+    below the current head, so reorgs cannot serve stale data.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        finality_depth: int = DEFAULT_FINALITY_DEPTH,
+        workers: int = DEFAULT_WORKERS,
+    ) -> None:
+        self.w3 = w3
+        self.finality = FinalityTracker(finality_depth)
+        self.cache = LRUCache(cache_size)
+        self.metrics = LatencyMetrics()
+        self.counters = {"upstream": 0, "cache_hits": 0, "coalesced": 0}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eth-tx-explorer")
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(self.w3, *args))
+
+    async def _is_final(self, block_number: Optional[int]) -> bool:
+        if block_number is None or block_number <= self.finality.final_through:
+            return block_number is not None
+        # May fetch the head: off the event loop.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.finality.is_final, block_number, lambda: self.w3.eth.block_number
+        )
+
+    async def cached(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        block_of: Callable[[Any], Optional[int]],
+    ) -> Any:
+        """
+        Return the cached value for key, or fetch it once for all concurrent callers.
+        block_of(result) gives the block the result belongs to (finality check).
+        """
+        if key in self.cache:
+            self.counters["cache_hits"] += 1
+            return self.cache.get(key)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(pending)
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self.counters["upstream"] += 1
+            result = await fetch()
+            if await self._is_final(block_of(result)):
+                self.cache.put(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so waiter-less failures are not logged as unhandled.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def block_info(self, block_number: int) -> Dict[str, Any]:
+        return await self.cached(
+            ("block", block_number),
+            lambda: self._run(fetch_block_info, block_number),
+            lambda r: r["number"],
+        )
+
+    async def block_transfers(self, block_number: int, internal: bool = False) -> list:
+        async def fetch() -> list:
+            records = await self._run(
+                lambda w3, n: process_block_transfers(w3, n, internal=internal), block_number
+            )
+            return [transfer_record_to_json(r) for r in records]
+
+        return await self.cached(
+            ("transfers", block_number, internal), fetch, lambda r: block_number
+        )
+
+    async def tx_info(self, tx_hash: str) -> Dict[str, Any]:
+        return await self.cached(
+            ("tx", tx_hash.lower()),
+            lambda: self._run(fetch_tx_info, tx_hash),
+            lambda r: r["block_number"],
+        )
+
+    async def tx_logs(self, tx_hash: str) -> Dict[str, Any]:
+        return await self.cached(
+            ("logs", tx_hash.lower()),
+            lambda: self._run(fetch_tx_logs, tx_hash),
+            lambda r: r["block_number"],
+        )
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        return {
+            "routes": self.metrics.snapshot(),
+            "cache_entries": len(self.cache),
+            "inflight": len(self._inflight),
+            **self.counters,
+        }
+
+
+class InvalidParameter(Exception):
+    """Malformed request parameter: reported as HTTP 400 (upstream errors are 502)."""
+
+
+def _json_response(data: Any, status: int = 200) -> web.Response:
+    return web.Response(
+        text=json.dumps(data, default=str), status=status, content_type="application/json"
+    )
+
+
+def _block_number_param(request: web.Request) -> int:
+    raw = request.match_info["number"]
+    try:
+        number = int(raw, 0)
+    except ValueError:
+        raise InvalidParameter(f"Invalid block number: {raw!r}")
+    if number < 0:
+        raise InvalidParameter(f"Invalid block number: {raw!r}")
+    return number
+
+
+def _tx_hash_param(request: web.Request) -> str:
+    tx_hash = request.match_info["tx_hash"]
+    if not (tx_hash.startswith("0x") and len(tx_hash) == 66):
+        raise InvalidParameter(f"Invalid transaction hash: {tx_hash!r}")
+    return tx_hash
+
+
+def create_app(service: QueryService) -> web.Application:
+    """Build the aiohttp application; every route reports latency to service.metrics."""
+
+    def route(name: str, handler: Callable[[web.Request], Awaitable[Any]]):
+        async def wrapped(request: web.Request) -> web.Response:
+            started = time.perf_counter()
+            error = True
+            try:
+                data = await handler(request)
+                error = False
+                return _json_response(data)
+            except InvalidParameter as e:
+                return _json_response({"error": str(e)}, status=400)
+            except (BlockNotFound, TransactionNotFound) as e:
+                return _json_response({"error": str(e)}, status=404)
+            except Exception as e:
+                return _json_response({"error": f"Upstream error: {e}"}, status=502)
+            finally:
+                service.metrics.observe(name, time.perf_counter() - started, error)
+
+        return wrapped
+
+    async def block_info(request: web.Request) -> Any:
+        return await service.block_info(_block_number_param(request))
+
+    async def block_transfers(request: web.Request) -> Any:
+        internal = request.query.get("internal", "").lower() in ("1", "true", "yes")
+        return await service.block_transfers(_block_number_param(request), internal)
+
+    async def tx_info(request: web.Request) -> Any:
+        return await service.tx_info(_tx_hash_param(request))
+
+    async def tx_logs(request: web.Request) -> Any:
+        return await service.tx_logs(_tx_hash_param(request))
+
+    async def metrics(request: web.Request) -> web.Response:
+        return _json_response(service.metrics_snapshot())
+
+    async def on_cleanup(app: web.Application) -> None:
+        service.close()
+
+    app = web.Application()
+    app.router.add_get("/blocks/{number}", route("block_info", block_info))
+    app.router.add_get("/blocks/{number}/transfers", route("block_transfers", block_transfers))
+    app.router.add_get("/tx/{tx_hash}", route("tx_info", tx_info))
+    app.router.add_get("/tx/{tx_hash}/logs", route("tx_logs", tx_logs))
+    app.router.add_get("/metrics", metrics)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def run_server(service: QueryService, host: str, port: int) -> None:
+    """Serve until interrupted."""
+    web.run_app(create_app(service), host=host, port=port, print=None)
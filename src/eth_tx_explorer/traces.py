@@ -0,0 +1,292 @@
+"""Block-level call traces (internal ETH movements).
+
+Traces are requested once per block via ``debug_traceBlockByNumber`` (geth
+``callTracer``) or ``trace_block`` (Erigon / OpenEthereum "parity" traces).
+Busy blocks can produce trace payloads of hundreds of MB, so the response is
+parsed incrementally: each element of the ``result`` array is decoded on its
+own and the full payload is never held in memory. HTTP(S) bodies are read in
+chunks; WebSocket / IPC providers from transports.py stream the response on a
+second connection (PipelinedProvider.stream_request).
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from web3 import Web3
+
+
+CALL_TRACER = "callTracer"
+PARITY_TRACER = "parity"
+TRACERS = (CALL_TRACER, PARITY_TRACER)
+
+# callTracer frame types that move ETH to another account.
+# DELEGATECALL / STATICCALL never transfer; CALLCODE only sends value to itself.
+_VALUE_FRAME_TYPES = frozenset({"CALL", "CREATE", "CREATE2", "SELFDESTRUCT"})
+
+_CHUNK_SIZE = 1 << 16
+_JSON_SPECIAL = re.compile(r'[\[\]{}",\\]')
+
+
+class JSONResultStream:
+    """
+    Incremental splitter for a JSON-RPC response whose ``result`` is an array.
+
+    feed() text chunks as they arrive; each call returns the array elements
+    completed so far, already decoded. complete turns True once the whole
+    response value has been read (for transports without an end-of-body
+    marker). close() checks the envelope and raises ValueError for an RPC
+    error. Only one element is buffered at a time.
+    """
+
+    def __init__(self) -> None:
+        self.complete = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._in_items = False
+        self._item: List[str] = []
+        self._head: List[str] = []
+
+    def feed(self, text: str) -> List[Any]:
+        items: List[Any] = []
+        mark = 0
+        skip = 0 if self._escape else -1
+        self._escape = False
+        stack = self._stack
+        for m in _JSON_SPECIAL.finditer(text):
+            i = m.start()
+            if i == skip:
+                continue
+            ch = m.group()
+            if self._in_string:
+                if ch == "\\":
+                    skip = i + 1
+                    if skip == len(text):
+                        self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                stack.append(ch)
+                if ch == "[" and len(stack) == 2 and stack[0] == "{":
+                    self._head.append(text[mark:i + 1])
+                    mark = i + 1
+                    self._in_items = True
+            elif ch in "}]":
+                if self._in_items and len(stack) == 2:
+                    self._item.append(text[mark:i])
+                    self._emit(items)
+                    mark = i
+                    self._in_items = False
+                if stack:
+                    stack.pop()
+                    if not stack:
+                        self.complete = True
+            elif ch == "," and self._in_items and len(stack) == 2:
+                self._item.append(text[mark:i])
+                self._emit(items)
+                mark = i + 1
+        (self._item if self._in_items else self._head).append(text[mark:])
+        return items
+
+    def _emit(self, items: List[Any]) -> None:
+        raw = "".join(self._item)
+        self._item = []
+        if raw.strip():
+            items.append(json.loads(raw))
+
+    def close(self) -> None:
+        """Validate the response envelope (everything outside the result array)."""
+        if self._in_items or self._stack:
+            raise ValueError("Truncated JSON-RPC response")
+        envelope = json.loads("".join(self._head) or "{}")
+        if isinstance(envelope, dict) and envelope.get("error"):
+            raise ValueError(f"RPC error: {envelope['error']}")
+
+
+def iter_json_result(chunks: Iterable[str]) -> Iterator[Any]:
+    """Yield the elements of a JSON-RPC ``result`` array from text chunks."""
+    stream = JSONResultStream()
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    stream.close()
+
+
+def _iter_http_chunks(w3: Web3, payload: bytes) -> Iterator[str]:
+    """POST payload to the provider endpoint and yield the decoded body in chunks."""
+    import requests
+
+    provider = w3.provider
+    kwargs = dict(provider.get_request_kwargs()) if hasattr(provider, "get_request_kwargs") else {}
+    headers = dict(kwargs.pop("headers", None) or {})
+    headers.setdefault("Content-Type", "application/json")
+    kwargs.pop("stream", None)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with requests.post(
+        str(provider.endpoint_uri), data=payload, headers=headers, stream=True, **kwargs
+    ) as resp:
+        resp.raise_for_status()
+        for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+def stream_rpc_result(w3: Web3, method: str, params: List[Any]) -> Iterator[Any]:
+    """
+    Yield elements of an array-valued RPC result.
+
+    HTTP(S) endpoints and providers with stream_request() (the WebSocket / IPC
+    providers) are streamed and parsed incrementally. Other providers (e.g.
+    the offline archive provider) fall back to a regular request, which loads
+    the whole result.
+    """
+    provider = w3.provider
+    uri = str(getattr(provider, "endpoint_uri", None) or "")
+    if uri.startswith(("http://", "https://")):
+        payload = json.dumps(
+            {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        ).encode()
+        yield from iter_json_result(_iter_http_chunks(w3, payload))
+        return
+    stream_request = getattr(provider, "stream_request", None)
+    if stream_request is not None:
+        yield from stream_request(method, params)
+        return
+    response = w3.provider.make_request(method, params)
+    if response.get("error"):
+        raise ValueError(f"RPC error: {response['error']}")
+    yield from response.get("result") or []
+
+
+def _to_int(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    return int(value, 16) if value.startswith("0x") else int(value)
+
+
+def iter_call_frame_transfers(frame: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Value-bearing internal frames of one callTracer tree, in execution order.
+
+    The root frame is the transaction itself (tx.value) and is skipped.
+    Frames that reverted are skipped together with their subcalls.
+    """
+    if frame.get("error"):
+        return
+    stack = [(c, 1) for c in reversed(frame.get("calls") or [])]
+    while stack:
+        f, depth = stack.pop()
+        if f.get("error"):
+            continue
+        value = _to_int(f.get("value"))
+        if value and f.get("type", "").upper() in _VALUE_FRAME_TYPES and f.get("to"):
+            yield {
+                "from": f.get("from"),
+                "to": f.get("to"),
+                "value": value,
+                "call_type": f.get("type", "").upper(),
+                "depth": depth,
+            }
+        stack.extend((c, depth + 1) for c in reversed(f.get("calls") or []))
+
+
+def iter_parity_trace_transfers(traces: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Value-bearing internal traces from a trace_block result, with tx position.
+
+    Top-level traces (empty traceAddress) and block rewards are skipped, as are
+    reverted traces and everything beneath them.
+    """
+    failed: Dict[Any, List[List[int]]] = {}
+    for t in traces:
+        tx_pos = t.get("transactionPosition")
+        if tx_pos is None:
+            continue
+        address = list(t.get("traceAddress") or [])
+        failed_prefixes = failed.setdefault(tx_pos, [])
+        if any(address[:len(p)] == p for p in failed_prefixes):
+            continue
+        if t.get("error"):
+            failed_prefixes.append(address)
+            continue
+        if not address:
+            continue
+        action = t.get("action") or {}
+        kind = t.get("type")
+        if kind == "call":
+            if (action.get("callType") or "call") != "call":
+                continue
+            src, dst, value = action.get("from"), action.get("to"), action.get("value")
+            call_type = "CALL"
+        elif kind == "create":
+            src, dst, value = action.get("from"), (t.get("result") or {}).get("address"), action.get("value")
+            call_type = "CREATE"
+        elif kind == "suicide":
+            src, dst, value = action.get("address"), action.get("refundAddress"), action.get("balance")
+            call_type = "SELFDESTRUCT"
+        else:
+            continue
+        value = _to_int(value)
+        if not value or not dst:
+            continue
+        yield {
+            "from": src,
+            "to": dst,
+            "value": value,
+            "call_type": call_type,
+            "depth": len(address),
+            "transaction_position": tx_pos,
+            "tx_hash": t.get("transactionHash"),
+        }
+
+
+def fetch_internal_transfers(
+    w3: Web3,
+    block_number: int,
+    tx_hashes: List[str],
+    tracer: str = CALL_TRACER,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Trace a whole block once and group internal ETH transfers by tx hash.
+
+    tx_hashes are the block's canonical tx hashes in block order; they map
+    callTracer results that do not carry a txHash back to their transaction.
+    """
+    if tracer not in TRACERS:
+        raise ValueError(f"Unknown tracer {tracer!r}; expected one of {', '.join(TRACERS)}")
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    if tracer == CALL_TRACER:
+        results = stream_rpc_result(
+            w3, "debug_traceBlockByNumber", [hex(block_number), {"tracer": CALL_TRACER}]
+        )
+        for pos, item in enumerate(results):
+            tx_hash: Optional[str] = item.get("txHash") if isinstance(item, dict) else None
+            if tx_hash is None and pos < len(tx_hashes):
+                tx_hash = tx_hashes[pos]
+            frame = item.get("result") if isinstance(item, dict) and "result" in item else item
+            if not tx_hash or not isinstance(frame, dict):
+                continue
+            transfers = list(iter_call_frame_transfers(frame))
+            if transfers:
+                out.setdefault(tx_hash.lower(), []).extend(transfers)
+        return out
+
+    for t in iter_parity_trace_transfers(stream_rpc_result(w3, "trace_block", [hex(block_number)])):
+        tx_hash = t.pop("tx_hash", None)
+        pos = t.pop("transaction_position")
+        if tx_hash is None and pos < len(tx_hashes):
+            tx_hash = tx_hashes[pos]
+        if tx_hash:
+            out.setdefault(tx_hash.lower(), []).append(t)
+    return out
+
@@ -0,0 +1,436 @@
+"""RPC transports: provider selection by URL scheme, plus pipelined socket providers.
+
+``provider_for_url`` maps ETH_RPC_URL to a sync web3 provider:
+
+- ``http://`` / ``https://``  -> Web3.HTTPProvider (pooled requests.Session)
+- ``ws://`` / ``wss://``      -> PipelinedWebSocketProvider
+- ``ipc://PATH`` or a path     -> PipelinedIPCProvider (Unix socket)
+
+web3 >= 7 only ships async WebSocket providers, and its sync IPCProvider holds
+a lock for the whole request/response round trip. The providers here keep one
+persistent connection and let any number of threads have requests in flight
+on it at once: writes are serialized, and whichever waiting thread holds the
+reader role routes each response to its caller by JSON-RPC id. With a local
+node this removes both the HTTP framing cost and the one-request-at-a-time
+latency floor.
+"""
+
+import codecs
+import json
+import os
+import select
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from itertools import count
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from web3 import Web3
+from web3._utils.encoding import Web3JsonEncoder
+from web3.providers.base import JSONBaseProvider
+
+from eth_tx_explorer.traces import JSONResultStream
+
+
+# Max concurrent requests a caller should keep in flight on one connection.
+PIPELINE_DEPTH = 32
+# Seconds a request may wait for its response (web3's IPCProvider default).
+DEFAULT_TIMEOUT = 30.0
+
+_IPC_READ_SIZE = 1 << 16
+
+
+class PipelinedProvider(JSONBaseProvider, ABC):
+    """
+    Base for providers multiplexing requests over one persistent connection.
+
+    Subclasses implement _connect(), _disconnect(), _send(bytes) and
+    _receive(timeout), which blocks until at least one full JSON-RPC message
+    arrives and returns the decoded messages (batch replies are flattened),
+    or raises TimeoutError.
+
+    Every request must be answered within timeout seconds. When one is not,
+    it fails with TimeoutError and the connection is reset: requests still
+    waiting on it fail with ConnectionError and the next request reconnects.
+    Locks are always taken in the order _send_lock, then _state.
+
+    stream_request() runs large array-valued requests (block traces) on a
+    second connection, one at a time, parsing the response as it arrives;
+    subclasses implement _open_stream(), _close_stream(conn) and
+    _stream_text(conn, data, timeout, complete) for it.
+    """
+
+    supports_pipelining = True
+
+    def __init__(self, timeout: Optional[float] = DEFAULT_TIMEOUT, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.timeout = timeout
+        self._ids = count(1)
+        self._send_lock = threading.Lock()
+        self._state = threading.Condition()
+        self._responses: Dict[Any, Dict[str, Any]] = {}
+        # Request ids with a caller waiting; other responses are dropped.
+        self._pending: Set[int] = set()
+        self._reading = False
+        self._connected = False
+        # Bumped on every reset; a request fails if it changes while it waits.
+        self._generation = 0
+        self._stream_lock = threading.Lock()
+        self._stream_conn: Any = None
+
+    @abstractmethod
+    def _connect(self) -> None:
+        """Open the connection."""
+
+    @abstractmethod
+    def _disconnect(self) -> None:
+        """Close the connection (may be called while another thread is receiving)."""
+
+    @abstractmethod
+    def _send(self, data: bytes) -> None:
+        """Write one encoded request."""
+
+    @abstractmethod
+    def _receive(self, timeout: Optional[float]) -> List[Dict[str, Any]]:
+        """Block until at least one message arrives (TimeoutError after timeout seconds)."""
+
+    @abstractmethod
+    def _open_stream(self) -> Any:
+        """Open a connection for stream_request()."""
+
+    @abstractmethod
+    def _close_stream(self, conn: Any) -> None:
+        """Close a stream_request() connection."""
+
+    @abstractmethod
+    def _stream_text(
+        self, conn: Any, data: bytes, timeout: Optional[float], complete: Callable[[], bool]
+    ) -> Iterator[str]:
+        """
+        Send one request on conn and yield its response text in chunks, as
+        received, up to the end of the response (complete() turns True once
+        the JSON value has been read, for streams without message framing).
+        TimeoutError when nothing arrives for timeout seconds.
+        """
+
+    def _encode(self, method: str, params: Any) -> Tuple[int, bytes]:
+        request_id = next(self._ids)
+        payload = {"jsonrpc": "2.0", "method": method, "params": params or [], "id": request_id}
+        return request_id, json.dumps(payload, cls=Web3JsonEncoder, separators=(",", ":")).encode()
+
+    def _deadline(self) -> Optional[float]:
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def _submit(self, request_id: int, data: bytes) -> int:
+        """Send a request, connecting first if needed; returns the connection generation."""
+        with self._send_lock:
+            with self._state:
+                self._pending.add(request_id)
+            if not self._connected:
+                self._connect()
+                self._connected = True
+            generation = self._generation
+            try:
+                self._send(data)
+            except Exception:
+                self._reset_locked(generation)
+                with self._state:
+                    self._pending.discard(request_id)
+                raise
+            return generation
+
+    def _reset_locked(self, generation: int) -> None:
+        """Drop the connection of generation (if still current); caller holds _send_lock."""
+        with self._state:
+            if generation != self._generation:
+                return
+            self._generation += 1
+            self._responses.clear()
+            # Every pending request was sent on this connection.
+            self._pending.clear()
+            self._state.notify_all()
+        if self._connected:
+            self._connected = False
+            try:
+                self._disconnect()
+            except Exception:
+                pass
+
+    def _reset(self, generation: int) -> None:
+        with self._send_lock:
+            self._reset_locked(generation)
+
+    def _wait(self, request_id: int, generation: int, deadline: Optional[float]) -> Dict[str, Any]:
+        failure: Optional[BaseException] = None
+        with self._state:
+            try:
+                while True:
+                    if request_id in self._responses:
+                        return self._responses.pop(request_id)
+                    if generation != self._generation:
+                        raise ConnectionError(f"{self} was reset before request {request_id} was answered")
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        failure = TimeoutError(f"{self}: no response to request {request_id} within {self.timeout}s")
+                        break
+                    if self._reading:
+                        self._state.wait(remaining)
+                        continue
+                    self._reading = True
+                    self._state.release()
+                    error: Optional[BaseException] = None
+                    messages = []
+                    try:
+                        messages = self._receive(remaining)
+                    except TimeoutError:
+                        # Our deadline passed; the loop reports it.
+                        pass
+                    except BaseException as e:
+                        error = e
+                    finally:
+                        self._state.acquire()
+                        self._reading = False
+                        self._state.notify_all()
+                    if error is not None:
+                        if generation != self._generation:
+                            # Another waiter reset the connection under us.
+                            continue
+                        failure = error
+                        break
+                    for message in messages:
+                        if message.get("id") in self._pending:
+                            self._responses[message.get("id")] = message
+            finally:
+                self._pending.discard(request_id)
+        # Reset outside _state: the lock order is _send_lock, then _state.
+        self._reset(generation)
+        raise failure
+
+    def make_request(self, method: Any, params: Any) -> Any:
+        request_id, data = self._encode(method, params)
+        deadline = self._deadline()
+        return self._wait(request_id, self._submit(request_id, data), deadline)
+
+    def make_batch_request(self, requests: List[Tuple[Any, Any]]) -> List[Any]:
+        """Pipelined batch: every request is written before any response is awaited."""
+        deadline = self._deadline()
+        sent = []
+        for method, params in requests:
+            request_id, data = self._encode(method, params)
+            sent.append((request_id, self._submit(request_id, data)))
+        return [self._wait(request_id, generation, deadline) for request_id, generation in sent]
+
+    def stream_request(self, method: str, params: Any) -> Iterator[Any]:
+        """
+        Yield the elements of an array-valued result as they are parsed
+        (see traces.JSONResultStream), so the full payload is never decoded
+        at once. Raises ValueError for an RPC error.
+        """
+        _, data = self._encode(method, params)
+        with self._stream_lock:
+            conn, self._stream_conn = self._stream_conn, None
+            if conn is None:
+                conn = self._open_stream()
+            stream = JSONResultStream()
+            chunks = self._stream_text(conn, data, self.timeout, lambda: stream.complete)
+            try:
+                for text in chunks:
+                    yield from stream.feed(text)
+                stream.close()
+            except BaseException:
+                # Unread response data may follow: the connection is unusable.
+                chunks.close()
+                self._close_stream(conn)
+                raise
+            self._stream_conn = conn
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        try:
+            response = self.make_request("web3_clientVersion", [])
+        except (OSError, ConnectionError):
+            if show_traceback:
+                raise
+            return False
+        return "result" in response
+
+    def disconnect(self) -> None:
+        self._reset(self._generation)
+        with self._stream_lock:
+            conn, self._stream_conn = self._stream_conn, None
+        if conn is not None:
+            self._close_stream(conn)
+
+
+class PipelinedWebSocketProvider(PipelinedProvider):
+    """Sync WebSocket provider (one text frame per request / response)."""
+
+    def __init__(
+        self,
+        endpoint_uri: str,
+        open_timeout: float = 10.0,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(timeout=timeout, **kwargs)
+        self.endpoint_uri = endpoint_uri
+        self.open_timeout = open_timeout
+        self._ws: Any = None
+
+    def __str__(self) -> str:
+        return f"WS connection {self.endpoint_uri}"
+
+    def _open_stream(self) -> Any:
+        from websockets.sync.client import connect
+
+        # No message size limit: block traces can be tens of megabytes. The
+        # connection outlives any `with` block, so enter it explicitly
+        # (websockets >= 17.1 warns when connect() is used bare).
+        return connect(self.endpoint_uri, open_timeout=self.open_timeout, max_size=None).__enter__()
+
+    def _close_stream(self, conn: Any) -> None:
+        conn.close()
+
+    def _connect(self) -> None:
+        self._ws = self._open_stream()
+
+    def _disconnect(self) -> None:
+        self._ws.close()
+
+    def _send(self, data: bytes) -> None:
+        self._ws.send(data.decode())
+
+    def _receive(self, timeout: Optional[float]) -> List[Dict[str, Any]]:
+        message = json.loads(self._ws.recv(timeout))
+        return message if isinstance(message, list) else [message]
+
+    def _stream_text(
+        self, conn: Any, data: bytes, timeout: Optional[float], complete: Callable[[], bool]
+    ) -> Iterator[str]:
+        conn.send(data.decode())
+        # Nodes send big messages as many frames. recv_streaming() has no
+        # timeout, so a watchdog closes the connection once it goes quiet.
+        last_frame = [time.monotonic()]
+        done = threading.Event()
+        expired = threading.Event()
+
+        def watchdog() -> None:
+            while not done.wait(timeout):
+                if time.monotonic() - last_frame[0] >= timeout:
+                    expired.set()
+                    conn.close()
+                    return
+
+        if timeout is not None:
+            threading.Thread(target=watchdog, daemon=True).start()
+        try:
+            # The message ends the response; reading it to the end keeps the
+            # connection usable.
+            for frame in conn.recv_streaming(decode=True):
+                last_frame[0] = time.monotonic()
+                if frame:
+                    yield frame
+        except Exception:
+            if expired.is_set():
+                raise TimeoutError(f"{self}: response stalled for {timeout}s")
+            raise
+        finally:
+            done.set()
+
+
+class PipelinedIPCProvider(PipelinedProvider):
+    """Unix socket IPC provider; responses are a stream of concatenated JSON values."""
+
+    def __init__(self, ipc_path: str, timeout: Optional[float] = DEFAULT_TIMEOUT, **kwargs: Any) -> None:
+        super().__init__(timeout=timeout, **kwargs)
+        self.ipc_path = ipc_path
+        self._sock: Optional[socket.socket] = None
+        self._buffer = ""
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+
+    def __str__(self) -> str:
+        return f"IPC connection {self.ipc_path}"
+
+    def _open_stream(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.ipc_path)
+        # Blocking from here on; reads wait for input with select().
+        sock.settimeout(None)
+        return sock
+
+    def _close_stream(self, conn: socket.socket) -> None:
+        conn.close()
+
+    def _connect(self) -> None:
+        self._sock = self._open_stream()
+        self._buffer = ""
+        self._text = codecs.getincrementaldecoder("utf-8")()
+
+    def _disconnect(self) -> None:
+        self._sock.close()
+
+    def _send(self, data: bytes) -> None:
+        self._sock.sendall(data)
+
+    def _receive(self, timeout: Optional[float]) -> List[Dict[str, Any]]:
+        messages: List[Dict[str, Any]] = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not messages:
+            if deadline is not None:
+                # Partial input stays buffered for the next reader.
+                ready, _, _ = select.select([self._sock], [], [], max(deadline - time.monotonic(), 0))
+                if not ready:
+                    raise TimeoutError(f"{self}: no data within {timeout}s")
+            chunk = self._sock.recv(_IPC_READ_SIZE)
+            if not chunk:
+                raise ConnectionError(f"IPC socket {self.ipc_path} closed")
+            self._buffer += self._text.decode(chunk)
+            # Only try to parse once the stream could end a value: re-scanning a
+            # multi-megabyte trace response on every chunk would be quadratic.
+            if not self._buffer.rstrip().endswith(("}", "]")):
+                continue
+            pos = 0
+            while True:
+                while pos < len(self._buffer) and self._buffer[pos].isspace():
+                    pos += 1
+                try:
+                    value, pos = self._decoder.raw_decode(self._buffer, pos)
+                except ValueError:
+                    break
+                messages.extend(value if isinstance(value, list) else [value])
+            self._buffer = self._buffer[pos:]
+        return messages
+
+    def _stream_text(
+        self, conn: socket.socket, data: bytes, timeout: Optional[float], complete: Callable[[], bool]
+    ) -> Iterator[str]:
+        conn.sendall(data)
+        text = codecs.getincrementaldecoder("utf-8")()
+        # No framing on IPC: the response ends where its JSON value does.
+        while not complete():
+            ready, _, _ = select.select([conn], [], [], timeout)
+            if not ready:
+                raise TimeoutError(f"{self}: response stalled for {timeout}s")
+            chunk = conn.recv(_IPC_READ_SIZE)
+            if not chunk:
+                raise ConnectionError(f"IPC socket {self.ipc_path} closed")
+            decoded = text.decode(chunk)
+            if decoded:
+                yield decoded
+
+
+def provider_for_url(url: str, session: Optional[Any] = None) -> Any:
+    """Sync web3 provider for an RPC URL (http(s)://, ws(s)://, ipc://PATH or a socket path)."""
+    scheme = urlparse(url).scheme.lower()
+    if scheme in ("http", "https"):
+        return Web3.HTTPProvider(url, session=session)
+    if scheme in ("ws", "wss"):
+        return PipelinedWebSocketProvider(url)
+    if scheme == "ipc":
+        return PipelinedIPCProvider(url[len("ipc://"):])
+    if not scheme and (url.endswith(".ipc") or os.path.isabs(url)):
+        return PipelinedIPCProvider(url)
+    raise ValueError(f"Unsupported RPC URL {url!r}: expected http(s)://, ws(s)://, ipc:// or a socket path")
@@ -0,0 +1,121 @@
+"""Address / token watchlist with a precompiled matcher.
+
+Addresses are kept as a frozenset of raw 20-byte keys, so matching a log topic
+or a tx address is a slice plus a set lookup: no hex decoding of topics and no
+checksum (keccak) work per record. Scales to 100k+ watched addresses.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from web3 import Web3
+
+
+# Above this size, address/topic OR-lists are not pushed into eth_getLogs
+# (nodes reject or slow down on very large filters); logs are matched locally.
+MAX_PUSHDOWN_ADDRESSES = 500
+
+AddressLike = Union[str, bytes]
+
+
+def address_key(address: AddressLike) -> bytes:
+    """Raw 20-byte key for a hex address string or address bytes."""
+    if isinstance(address, (bytes, bytearray)):
+        raw = bytes(address)
+    else:
+        text = address[2:] if address[:2] in ("0x", "0X") else address
+        try:
+            raw = bytes.fromhex(text)
+        except ValueError:
+            raise ValueError(f"Invalid address: {address!r}")
+    if len(raw) != 20:
+        raise ValueError(f"Invalid address: {address!r}")
+    return raw
+
+
+class Watchlist:
+    """
+    Compiled matcher over a set of addresses (EOAs, contracts and tokens alike).
+
+    A transfer matches when its sender, recipient or token contract is watched.
+    """
+
+    def __init__(self, addresses: Iterable[AddressLike]) -> None:
+        self._keys = frozenset(address_key(a) for a in addresses)
+        self._checksums: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def keys(self) -> frozenset:
+        """The raw 20-byte keys."""
+        return self._keys
+
+    def __contains__(self, address: Any) -> bool:
+        return self.contains_address(address)
+
+    def contains_address(self, address: Optional[AddressLike]) -> bool:
+        """True if a hex string / 20-byte address is watched (None never matches)."""
+        if not address:
+            return False
+        if isinstance(address, (bytes, bytearray)):
+            return bytes(address[-20:]) in self._keys
+        try:
+            return bytes.fromhex(address[-40:]) in self._keys
+        except ValueError:
+            return False
+
+    def contains_topic(self, topic: bytes) -> bool:
+        """True if a 32-byte indexed address topic holds a watched address."""
+        return topic[12:] in self._keys
+
+    def matches_log(self, log: Any) -> bool:
+        """True if a Transfer log's token contract, from or to topic is watched."""
+        topics = log.topics
+        if len(topics) >= 3 and (self.contains_topic(topics[1]) or self.contains_topic(topics[2])):
+            return True
+        return self.contains_address(log.address)
+
+    @property
+    def checksum_addresses(self) -> List[str]:
+        """Checksummed addresses, computed once (only needed for RPC filters)."""
+        if self._checksums is None:
+            self._checksums = sorted(Web3.to_checksum_address(k) for k in self._keys)
+        return self._checksums
+
+    def log_filters(self, block_number: int, topic0: bytes) -> List[Dict[str, Any]]:
+        """
+        eth_getLogs filters selecting topic0 logs that may involve the watchlist.
+
+        Small watchlists are pushed down as address / from-topic / to-topic
+        filters; large ones fall back to a single topic0-only filter.
+        """
+        base = {"fromBlock": block_number, "toBlock": block_number}
+        sig = Web3.to_hex(topic0)
+        if len(self._keys) > MAX_PUSHDOWN_ADDRESSES:
+            return [{**base, "topics": [sig]}]
+        padded = ["0x" + "00" * 12 + k.hex() for k in sorted(self._keys)]
+        return [
+            {**base, "address": self.checksum_addresses, "topics": [sig]},
+            {**base, "topics": [sig, padded]},
+            {**base, "topics": [sig, None, padded]},
+        ]
+
+
+def load_watchlist(path: Union[str, Path]) -> Watchlist:
+    """
+    Load a watchlist file: one address per line; blank lines and
+    ``#`` comments (full-line or trailing) are ignored.
+    """
+    addresses: List[str] = []
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            entry = line.split("#", 1)[0].strip()
+            if not entry:
+                continue
+            try:
+                address_key(entry)
+            except ValueError:
+                raise ValueError(f"{path}:{lineno}: invalid address {entry!r}")
+            addresses.append(entry)
+    return Watchlist(addresses)
@@ -1 +1,114 @@
 """Pytest configuration and shared fixtures for eth-tx-explorer tests."""
+
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import pytest
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+from eth_tx_explorer.core import TRANSFER_SIG
+
+# Runtime code returned by FakeEth.get_code for contract addresses.
+CONTRACT_CODE = HexBytes(b"\x60\x80\x60\x40")
+
+
+def _topic(addr: str) -> HexBytes:
+    return HexBytes(b"\x00" * 12 + bytes.fromhex(addr[2:]))
+
+
+def _transfer_log(
+    token: str,
+    src: str,
+    dst: str,
+    amount: int = 1,
+    tx_hash: Optional[HexBytes] = None,
+    log_index: int = 0,
+) -> AttributeDict:
+    return AttributeDict({
+        "address": token,
+        "topics": [TRANSFER_SIG, _topic(src), _topic(dst)],
+        "data": HexBytes(amount.to_bytes(32, "big")),
+        "logIndex": log_index,
+        "transactionHash": tx_hash,
+    })
+
+
+class FakeEth:
+    """
+    In-memory stand-in for w3.eth; every call is recorded in calls.
+
+    blocks is one block served for any number, a mapping number -> block, or
+    a callable(block_identifier, full_transactions). receipts maps tx hash ->
+    receipt (a defaultdict answers every hash). Addresses in contracts have
+    code. When gate is set, get_block waits on it before answering.
+    """
+
+    def __init__(
+        self,
+        blocks: Union[Any, Mapping, Callable[[Any, bool], Any]] = None,
+        receipts: Optional[Mapping] = None,
+        logs: Iterable[Any] = (),
+        contracts: Iterable[str] = (),
+        head: Optional[int] = None,
+        gate: Optional[threading.Event] = None,
+    ) -> None:
+        self.blocks = blocks
+        self.receipts = receipts if receipts is not None else {}
+        self.logs = list(logs)
+        self.contracts = {c.lower() for c in contracts}
+        self.block_number = head
+        self.gate = gate
+        self.calls: List[tuple] = []
+
+    def _calls_to(self, name: str) -> List[Any]:
+        return [c[1] for c in self.calls if c[0] == name]
+
+    @property
+    def block_calls(self) -> List[Any]:
+        return self._calls_to("get_block")
+
+    @property
+    def receipt_calls(self) -> List[Any]:
+        return self._calls_to("receipt")
+
+    def get_block(self, block_identifier, full_transactions=False):
+        self.calls.append(("get_block", block_identifier, full_transactions))
+        if self.gate is not None:
+            assert self.gate.wait(timeout=10), "gate never opened"
+        if callable(self.blocks):
+            return self.blocks(block_identifier, full_transactions)
+        if isinstance(self.blocks, Mapping):
+            return self.blocks[block_identifier]
+        return self.blocks
+
+    def get_transaction_receipt(self, tx_hash):
+        self.calls.append(("receipt", tx_hash))
+        return self.receipts[tx_hash]
+
+    def get_logs(self, log_filter: Dict[str, Any]):
+        self.calls.append(("get_logs", log_filter))
+        return self.logs
+
+    def get_code(self, address, block_identifier=None):
+        self.calls.append(("code", address))
+        return CONTRACT_CODE if address.lower() in self.contracts else HexBytes(b"")
+
+
+@pytest.fixture
+def fake_eth():
+    """The FakeEth class, to build stub nodes: fake_eth(blocks, receipts, ...)."""
+    return FakeEth
+
+
+@pytest.fixture
+def topic():
+    """topic(address) -> the address left-padded to a 32-byte log topic."""
+    return _topic
+
+
+@pytest.fixture
+def transfer_log():
+    """transfer_log(token, src, dst, amount=1, tx_hash=None, log_index=0) -> ERC-20 Transfer log."""
+    return _transfer_log
@@ -0,0 +1,80 @@
+"""Tests for address interning and its use in record building and contract caching."""
+
+from types import SimpleNamespace
+
+import pytest
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+from eth_tx_explorer.addresses import AddressTable
+from eth_tx_explorer.core import TRANSFER_SIG, is_contract, process_block_transfers
+
+ROUTER = Web3.to_checksum_address("0x" + "5e" * 20)
+ALICE = Web3.to_checksum_address("0x" + "a1" * 20)
+TOKEN = Web3.to_checksum_address("0x" + "d4" * 20)
+
+
+def test_intern_is_stable_across_representations(topic):
+    table = AddressTable()
+    i = table.intern(ROUTER)
+    assert table.intern(ROUTER.lower()) == i
+    assert table.intern(bytes.fromhex(ROUTER[2:])) == i
+    assert table.intern_topic(topic(ROUTER)) == i
+    assert table.intern_topic(Web3.to_hex(topic(ROUTER))) == i
+    assert table.intern(ALICE) == i + 1
+    assert len(table) == 2 and ROUTER.lower() in table and TOKEN not in table
+
+
+def test_renderings_are_memoized():
+    table = AddressTable()
+    i = table.intern(ROUTER.lower())
+    assert table.checksum(i) == ROUTER
+    assert table.checksum(i) is table.checksum(table.intern(ROUTER))
+    assert table.lower(i) == ROUTER.lower()
+    assert table.raw(i) == bytes.fromhex(ROUTER[2:])
+    with pytest.raises(ValueError):
+        table.intern("0x1234")
+
+
+def test_is_contract_cache_keyed_by_id():
+    calls = []
+
+    def get_code(address, block_identifier):
+        calls.append(address)
+        return HexBytes(b"\x60\x80\x60\x40")
+
+    w3 = SimpleNamespace(eth=SimpleNamespace(get_code=get_code))
+    table, cache = AddressTable(), {}
+    assert is_contract(w3, ROUTER.lower(), cache, 5, table)
+    assert is_contract(w3, ROUTER, cache, 5, table)
+    assert calls == [ROUTER] and cache == {table.intern(ROUTER): True}
+
+
+def test_records_share_interned_strings_across_blocks(fake_eth, topic):
+    hashes = [HexBytes(bytes([i]) * 32) for i in range(1, 4)]
+    txs = [
+        AttributeDict({"hash": h, "from": ALICE, "to": ROUTER.lower(), "value": 1, "type": 0,
+                       "gas": 90000, "gasPrice": 1})
+        for h in hashes
+    ]
+    receipts = {
+        Web3.to_hex(h): SimpleNamespace(gasUsed=50000, effectiveGasPrice=1, logs=[SimpleNamespace(
+            address=TOKEN, topics=[TRANSFER_SIG, topic(ROUTER), topic(ALICE)],
+            data=HexBytes((3).to_bytes(32, "big")),
+        )])
+        for h in hashes
+    }
+    block = SimpleNamespace(number=9, timestamp=0, transactions=txs)
+    w3 = SimpleNamespace(eth=fake_eth(block, receipts, contracts=[ROUTER]))
+    table = AddressTable()
+    first = process_block_transfers(w3, 9, addresses=table)
+    second = process_block_transfers(w3, 9, addresses=table)
+    assert len(table) == 3
+    eth = [r for r in first + second if r["transfer_type"] == "ETH_CALL_WITH_VALUE"]
+    erc20 = [r for r in first + second if r["transfer_type"] == "ERC20_TRANSFER"]
+    assert len(eth) == len(erc20) == 6
+    assert eth[0]["to_addr"] == ROUTER and erc20[0]["from_addr"] == ROUTER.lower()
+    assert all(r["to_addr"] is eth[0]["to_addr"] for r in eth)
+    assert all(r["from_addr"] is erc20[0]["from_addr"] for r in erc20)
+    assert all(r["token_contract"] is erc20[0]["token_contract"] for r in erc20)
@@ -0,0 +1,132 @@
+"""Tests for the binary block archive: online and offline extraction must agree."""
+
+from types import SimpleNamespace
+
+import pytest
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+from eth_tx_explorer.archive import ArchiveWeb3, ArchiveWriter, BlockArchive, archive_block
+from eth_tx_explorer.bloom import bloom_for_logs
+from eth_tx_explorer.core import TRANSFER_SIG, process_block_transfers
+
+ALICE = Web3.to_checksum_address("0x" + "a1" * 20)
+BOB = Web3.to_checksum_address("0x" + "b2" * 20)
+ROUTER = Web3.to_checksum_address("0x" + "c3" * 20)
+TOKEN = Web3.to_checksum_address("0x" + "d4" * 20)
+
+
+def _chain(topic):
+    """Two blocks: EIP-1559 value call to a contract with a Transfer log, legacy send, creation."""
+    h = [HexBytes(bytes([i]) * 32) for i in range(1, 5)]
+    txs = {
+        100: [
+            AttributeDict({"hash": h[0], "from": ALICE, "to": ROUTER, "value": 10**18, "type": 2,
+                           "gas": 200000, "maxFeePerGas": 3 * 10**10, "maxPriorityFeePerGas": 10**9}),
+            AttributeDict({"hash": h[1], "from": BOB, "to": ALICE, "value": 5, "type": 0,
+                           "gas": 21000, "gasPrice": 2 * 10**10}),
+        ],
+        101: [
+            AttributeDict({"hash": h[2], "from": BOB, "to": None, "value": 7, "type": 1,
+                           "gas": 500000, "gasPrice": 10**10}),
+            AttributeDict({"hash": h[3], "from": ALICE, "to": TOKEN, "value": 0, "type": 0,
+                           "gas": 60000, "gasPrice": 10**10}),
+        ],
+    }
+    transfer = AttributeDict({
+        "address": TOKEN, "logIndex": 0, "transactionHash": h[0],
+        "topics": [TRANSFER_SIG, topic(ROUTER), topic(BOB)],
+        "data": HexBytes((12345).to_bytes(32, "big")),
+    })
+    other = AttributeDict({
+        "address": TOKEN, "logIndex": 1, "transactionHash": h[3],
+        "topics": [HexBytes(b"\x99" * 32)], "data": HexBytes(b""),
+    })
+    receipts = {}
+    for n, block_txs in txs.items():
+        for i, tx in enumerate(block_txs):
+            logs = [transfer] if tx["hash"] == h[0] else [other] if tx["hash"] == h[3] else []
+            receipts[Web3.to_hex(tx["hash"])] = AttributeDict({
+                "transactionHash": tx["hash"], "transactionIndex": i, "blockNumber": n,
+                "status": 1, "gasUsed": 21000 + i, "effectiveGasPrice": 10**10 + i, "logs": logs,
+            })
+    blocks = {
+        n: AttributeDict({
+            "number": n, "timestamp": 1_700_000_000 + n, "hash": HexBytes(bytes([n]) * 32),
+            "logsBloom": HexBytes(bloom_for_logs(
+                log for r in receipts.values() if r["blockNumber"] == n for log in r["logs"]
+            )),
+            "transactions": block_txs,
+        })
+        for n, block_txs in txs.items()
+    }
+    return blocks, receipts
+
+
+@pytest.fixture
+def w3(fake_eth, topic):
+    blocks, receipts = _chain(topic)
+    return SimpleNamespace(eth=fake_eth(blocks, receipts, contracts=[ROUTER]))
+
+
+def test_archive_roundtrip_matches_online_extraction(tmp_path, w3):
+    path = str(tmp_path / "blocks.etxa")
+    with ArchiveWriter(path) as writer:
+        assert archive_block(w3, writer, 100)
+        assert archive_block(w3, writer, 101)
+        assert not archive_block(w3, writer, 100)
+
+    with BlockArchive(path) as archive:
+        assert len(archive) == 2 and 101 in archive and 102 not in archive
+        offline = ArchiveWeb3(archive)
+        for n in (100, 101):
+            assert process_block_transfers(offline, n) == process_block_transfers(w3, n)
+        assert [r["transfer_type"] for r in process_block_transfers(offline, 100)] == [
+            "ETH_CALL_WITH_VALUE", "ERC20_TRANSFER", "ETH_SIMPLE_TRANSFER"
+        ]
+        block = archive.block(100)
+        assert block.timestamp == 1_700_000_100
+        assert block.hash == HexBytes(bytes([100]) * 32)
+        offline.eth.get_block(100)
+        receipt = offline.eth.get_transaction_receipt(Web3.to_hex(HexBytes(b"\x01" * 32)))
+        assert receipt.status == 1 and receipt.logs[0].data == HexBytes((12345).to_bytes(32, "big"))
+
+
+def test_archive_append_reopen_and_missing_block(tmp_path, w3):
+    path = str(tmp_path / "blocks.etxa")
+    with ArchiveWriter(path) as writer:
+        archive_block(w3, writer, 101)
+    with ArchiveWriter(path) as writer:
+        archive_block(w3, writer, 100)
+    with BlockArchive(path) as archive:
+        assert list(archive.block_numbers()) == [100, 101]
+        assert [len(archive.block(n).transactions) for n in (100, 101)] == [2, 2]
+        with pytest.raises(ValueError):
+            archive.block(5)
+
+
+def test_archive_get_logs_single_block(tmp_path, w3, topic):
+    path = str(tmp_path / "blocks.etxa")
+    with ArchiveWriter(path) as writer:
+        archive_block(w3, writer, 100)
+    with BlockArchive(path) as archive:
+        eth = ArchiveWeb3(archive).eth
+        sig = Web3.to_hex(TRANSFER_SIG)
+        assert len(eth.get_logs({"fromBlock": 100, "toBlock": 100, "topics": [sig]})) == 1
+        assert len(eth.get_logs({"fromBlock": 100, "toBlock": 100, "topics": [sig, None, [Web3.to_hex(topic(ALICE))]]})) == 0
+        assert len(eth.get_logs({"fromBlock": 100, "toBlock": 100, "address": [TOKEN], "topics": [sig]})) == 1
+
+
+def test_not_an_archive(tmp_path):
+    path = tmp_path / "junk"
+    path.write_bytes(b"not an archive at all")
+    with pytest.raises(ValueError):
+        BlockArchive(str(path))
+    with pytest.raises(ValueError):
+        ArchiveWriter(str(path))
+    assert path.read_bytes() == b"not an archive at all"
+    empty = tmp_path / "empty"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError, match="not an eth-tx-explorer archive"):
+        BlockArchive(str(empty))
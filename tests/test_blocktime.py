@@ -0,0 +1,101 @@
+"""Tests for timestamp -> block resolution and the persistent header index."""
+
+import random
+from bisect import bisect_left
+from types import SimpleNamespace
+
+import pytest
+
+from eth_tx_explorer.blocktime import BlockTimeResolver, FinalityTracker, HeaderIndex, parse_timestamp
+
+GENESIS_TIME = 1_600_000_000
+
+
+def _timestamps(n_pow: int = 20_000, n_pos: int = 80_000, seed: int = 3):
+    """Irregular PoW-era block times followed by 12 s slots with some missed slots."""
+    rng = random.Random(seed)
+    ts = [GENESIS_TIME]
+    for i in range(1, n_pow + n_pos):
+        if i < n_pow:
+            ts.append(ts[-1] + max(1, int(rng.expovariate(1 / 13.0))))
+        else:
+            ts.append(ts[-1] + (24 if rng.random() < 0.02 else 12))
+    return ts
+
+
+def _node(fake_eth, ts):
+    """Stub node whose block n has timestamp ts[n]; the head is the last one."""
+
+    def block(block_identifier, full_transactions):
+        n = len(ts) - 1 if block_identifier == "latest" else block_identifier
+        return SimpleNamespace(number=n, timestamp=ts[n])
+
+    return fake_eth(block)
+
+
+TS = _timestamps()
+
+
+def test_block_at_or_after_matches_brute_force(fake_eth):
+    rng = random.Random(11)
+    w3 = SimpleNamespace(eth=_node(fake_eth, TS))
+    for _ in range(100):
+        t = rng.randint(TS[0] - 10, TS[-1])
+        resolver = BlockTimeResolver(w3)
+        assert resolver.block_at_or_after(t) == bisect_left(TS, t)
+        # head + genesis + a handful of probes, far below a ~17-step bisection
+        assert resolver.rpc_calls <= 16
+    assert BlockTimeResolver(w3).block_at_or_after(TS[-1] + 1) is None
+
+
+def test_block_range_is_half_open(fake_eth):
+    w3 = SimpleNamespace(eth=_node(fake_eth, TS))
+    resolver = BlockTimeResolver(w3)
+    start, end = resolver.block_range(TS[50_000], TS[50_300])
+    assert (start, end) == (50_000, 50_299)
+    assert resolver.block_range(TS[-5])[1] == len(TS) - 1
+    with pytest.raises(ValueError):
+        resolver.block_range(TS[10], TS[10])
+    with pytest.raises(ValueError):
+        resolver.block_range(TS[-1] + 100)
+
+
+def test_header_index_persists_only_final_headers(tmp_path, fake_eth):
+    path = tmp_path / "headers.bin"
+    eth = _node(fake_eth, TS)
+    w3 = SimpleNamespace(eth=eth)
+    target = TS[60_000] - 5
+    resolver = BlockTimeResolver(w3, HeaderIndex(path), finality_depth=64)
+    assert resolver.block_at_or_after(target) == 60_000
+    assert resolver.block_at_or_after(TS[-3]) == len(TS) - 3
+    resolver.save()
+
+    reloaded = HeaderIndex(path)
+    assert len(reloaded) > 0
+    assert reloaded.last_number <= len(TS) - 1 - 64
+    eth.calls.clear()
+    again = BlockTimeResolver(w3, reloaded)
+    assert again.block_at_or_after(target) == 60_000
+    assert eth.calls == []
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("1700000000") == 1_700_000_000
+    assert parse_timestamp("2024-03-01T09:00") == 1_709_283_600
+    assert parse_timestamp("2024-03-01 09:00:00Z") == 1_709_283_600
+    assert parse_timestamp("2024-03-01T11:00:00+02:00") == 1_709_283_600
+    with pytest.raises(ValueError):
+        parse_timestamp("yesterday")
+
+
+def test_finality_tracker_reuses_the_head():
+    heads = []
+
+    def fetch_head():
+        heads.append(None)
+        return 100
+
+    tracker = FinalityTracker(finality_depth=10, ttl=3600)
+    assert tracker.is_final(90, fetch_head) and not tracker.is_final(91, fetch_head)
+    assert tracker.is_final(5, fetch_head) and not tracker.is_final(None, fetch_head)
+    assert len(heads) == 1
@@ -0,0 +1,81 @@
+"""Tests for logsBloom pre-filtering."""
+
+from collections import defaultdict
+from types import SimpleNamespace
+
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+from eth_tx_explorer.bloom import BLOOM_BYTES, LogBloomFilter, bloom_for_logs, bloom_mask
+from eth_tx_explorer.core import TRANSFER_SIG, print_erc20_logs, process_block_transfers
+from eth_tx_explorer.watchlist import Watchlist
+
+TOKEN = "0x" + "d4" * 20
+ALICE = "0x" + "a1" * 20
+BOB = "0x" + "b2" * 20
+CAROL = "0x" + "c3" * 20
+
+
+def test_bloom_mask_sets_three_bits_at_most():
+    mask = bloom_mask(bytes(TRANSFER_SIG))
+    assert 1 <= bin(mask).count("1") <= 3
+    assert mask < 1 << (8 * BLOOM_BYTES)
+
+
+def test_filter_topic_and_addresses(transfer_log):
+    bloom = bloom_for_logs([transfer_log(TOKEN, ALICE, BOB)])
+    assert LogBloomFilter(TRANSFER_SIG).may_match(bloom)
+    assert not LogBloomFilter(HexBytes(b"\x42" * 32)).may_match(bloom)
+    assert LogBloomFilter(TRANSFER_SIG, Watchlist([BOB])).may_match(bloom)
+    assert LogBloomFilter(TRANSFER_SIG, Watchlist([TOKEN])).may_match(bloom)
+    assert not LogBloomFilter(TRANSFER_SIG, Watchlist([CAROL])).may_match(bloom)
+    assert not LogBloomFilter(TRANSFER_SIG).may_match(b"\x00" * BLOOM_BYTES)
+    assert LogBloomFilter(TRANSFER_SIG).may_match("0x" + "ff" * BLOOM_BYTES)
+    # Unknown / missing bloom can never be used to skip.
+    assert LogBloomFilter(TRANSFER_SIG).may_match(None)
+
+
+def _node(fake_eth, block):
+    """Stub node serving block; every receipt is an empty one."""
+    receipt = AttributeDict({"logs": [], "gasUsed": 21000, "effectiveGasPrice": 1})
+    return fake_eth(block, defaultdict(lambda: receipt))
+
+
+def _txs():
+    return [
+        AttributeDict({"hash": HexBytes(bytes([i]) * 32), "from": ALICE, "to": BOB, "value": value,
+                       "type": 0, "gas": 21000, "gasPrice": 1})
+        for i, value in ((1, 0), (2, 5), (3, 0))
+    ]
+
+
+def test_process_block_transfers_skips_receipts_without_transfer_bloom(fake_eth):
+    block = SimpleNamespace(number=1, timestamp=0, transactions=_txs(), logsBloom=HexBytes(b"\x00" * 256))
+    eth = _node(fake_eth, block)
+    bloom_filter = LogBloomFilter(TRANSFER_SIG)
+    records = process_block_transfers(SimpleNamespace(eth=eth), 1, bloom_filter=bloom_filter)
+    # Only the value-carrying tx needs its receipt (for the ETH record's gas fields).
+    assert len(eth.receipt_calls) == 1
+    assert [r["eth_value_wei"] for r in records] == [5]
+    assert bloom_filter.stats.blocks_skipped == 1
+    assert bloom_filter.stats.receipts_skipped == 2
+
+
+def test_print_erc20_logs_skip_and_false_positive_stats(capsys, fake_eth, transfer_log):
+    hashes = [HexBytes(bytes([i]) * 32) for i in range(3)]
+    bloom_filter = LogBloomFilter(TRANSFER_SIG)
+
+    skipped = _node(fake_eth, SimpleNamespace(transactions=hashes, logsBloom=b"\x00" * 256))
+    print_erc20_logs(SimpleNamespace(eth=skipped), 1, bloom_filter)
+    assert skipped.receipt_calls == []
+
+    # Bloom says "maybe" but no receipt has a Transfer log: a false positive.
+    maybe = _node(fake_eth, SimpleNamespace(transactions=hashes, logsBloom=bloom_for_logs([transfer_log(TOKEN, ALICE, BOB)])))
+    print_erc20_logs(SimpleNamespace(eth=maybe), 2, bloom_filter)
+    assert len(maybe.receipt_calls) == 3
+
+    stats = bloom_filter.stats
+    assert (stats.blocks_checked, stats.blocks_skipped, stats.false_positives) == (2, 1, 1)
+    assert stats.skip_rate == 0.5 and stats.false_positive_rate == 1.0
+    assert "1/2 block(s) skipped" in stats.summary()
+    assert capsys.readouterr().out == ""
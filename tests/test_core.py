@@ -70,3 +70,27 @@ def test_get_transaction_index_block_overrides_receipt():
     tx_hash_to_index = {tx_hash: 1}
     idx = get_transaction_index(Tx(), Receipt(), tx_hash_to_index, tx_hash)
     assert idx == 1
+
+
+def test_is_contract_falls_back_to_latest_without_historical_state():
+    """A node without state for the pinned block is asked at "latest" from then on."""
+    from web3.exceptions import Web3RPCError
+
+    from eth_tx_explorer.core import is_contract
+
+    calls = []
+
+    class Eth:
+        def get_code(self, address, block_identifier):
+            calls.append(block_identifier)
+            if block_identifier != "latest":
+                raise Web3RPCError("missing trie node")
+            return b"\x60\x01\x00"
+
+    class W3:
+        eth = Eth()
+
+    w3 = W3()
+    assert is_contract(w3, "0x" + "ab" * 20, {}, 100)
+    assert is_contract(w3, "0x" + "cd" * 20, {}, 101)
+    assert calls == [100, "latest", "latest"]
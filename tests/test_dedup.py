@@ -0,0 +1,206 @@
+"""Tests for RPC request deduplication."""
+
+import threading
+from itertools import count
+
+import pytest
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from eth_tx_explorer.dedup import (
+    CONSTANT,
+    HASH_KEYED,
+    RequestDeduplicator,
+    install_dedup,
+    request_block,
+)
+
+
+def _rpc(result):
+    return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+
+def _node(head, handler):
+    """make_request answering eth_blockNumber with head and everything else with handler."""
+    calls = []
+
+    def make_request(method, params):
+        if method == "eth_blockNumber":
+            return _rpc(hex(head))
+        calls.append((method, params))
+        return handler(method, params)
+
+    return make_request, calls
+
+
+def test_request_block():
+    assert request_block("eth_getBlockByNumber", ["0x10", True]) == 16
+    assert request_block("eth_getBlockByNumber", ["earliest", False]) == 0
+    assert request_block("eth_getBlockByNumber", ["latest", True]) is None
+    assert request_block("eth_getBlockByNumber", ["pending", False]) is None
+    assert request_block("eth_getCode", ["0xabc", "0x10"]) == 16
+    assert request_block("eth_getCode", ["0xabc", "latest"]) is None
+    assert request_block("eth_getCode", ["0xabc"]) is None
+    assert request_block("eth_getCode", ["0xabc", {"blockHash": "0x" + "11" * 32}]) is None
+    assert request_block("eth_getTransactionReceipt", ["0x01"]) == HASH_KEYED
+    assert request_block("eth_chainId", []) == CONSTANT
+    assert request_block("eth_getLogs", [{"fromBlock": "0x1", "toBlock": "0x2"}]) == 2
+    assert request_block("eth_getLogs", [{"fromBlock": "0x1", "toBlock": "latest"}]) is None
+    assert request_block("eth_getLogs", [{"blockHash": "0x01"}]) is None
+    assert request_block("debug_traceBlockByNumber", ["0x1", {"tracer": "callTracer"}]) is None
+    assert request_block("trace_block", ["0x1"]) is None
+    assert request_block("eth_blockNumber", []) is None
+    assert request_block("eth_sendRawTransaction", ["0x00"]) is None
+
+
+def test_only_final_blocks_are_stored():
+    make_request, calls = _node(100, lambda method, params: _rpc({"number": params[0]}))
+    fetch = RequestDeduplicator(finality_depth=10).wrap(make_request)
+    for _ in range(2):
+        fetch("eth_getBlockByNumber", ["0x5a", False])  # 90: final
+        fetch("eth_getBlockByNumber", ["0x5b", False])  # 91: 9 deep, can still reorg
+    assert [c[1][0] for c in calls] == ["0x5a", "0x5b", "0x5b"]
+
+
+def test_reorged_near_head_block_is_refetched():
+    hashes = count()
+
+    class Node(BaseProvider):
+        def __init__(self):
+            super().__init__()
+            self.block_calls = 0
+
+        def make_request(self, method, params):
+            if method == "eth_blockNumber":
+                return _rpc("0x64")
+            if method == "eth_chainId":
+                return _rpc("0x1")
+            self.block_calls += 1
+            # Every fetch sees a different block at this height, as after a reorg.
+            return _rpc({"number": params[0], "hash": "0x%064x" % next(hashes), "transactions": []})
+
+        def is_connected(self, show_traceback=False):
+            return True
+
+    node = Node()
+    w3 = Web3(node)
+    install_dedup(w3, finality_depth=64)
+    near_head = [w3.eth.get_block(90).hash for _ in range(2)]
+    assert near_head[0] != near_head[1]
+    final = [w3.eth.get_block(30).hash for _ in range(2)]
+    assert final[0] == final[1]
+    assert node.block_calls == 3
+
+
+def test_hash_lookups_stored_once_their_block_is_final():
+    receipts = {"0x01": {"blockNumber": "0x14"}, "0x02": {"blockNumber": "0x60"}, "0x03": None}
+    make_request, calls = _node(100, lambda method, params: _rpc(receipts[params[0]]))
+    fetch = RequestDeduplicator(finality_depth=64).wrap(make_request)
+    for _ in range(2):
+        for tx_hash in receipts:
+            fetch("eth_getTransactionReceipt", [tx_hash])
+    assert [c[1][0] for c in calls] == ["0x01", "0x02", "0x03", "0x02", "0x03"]
+
+
+def test_null_and_error_responses_not_cached():
+    responses = iter([
+        _rpc(None),
+        {"jsonrpc": "2.0", "id": 1, "error": {"code": -1, "message": "busy"}},
+        _rpc({"blockNumber": "0x1"}),
+    ])
+    make_request, calls = _node(100, lambda method, params: next(responses))
+    dedup = RequestDeduplicator()
+    fetch = dedup.wrap(make_request)
+    for _ in range(4):
+        fetch("eth_getTransactionReceipt", ["0x01"])
+    assert len(calls) == 3
+    assert dedup.stats["hits"] == 1
+
+
+def test_cache_bounded_by_result_bytes():
+    make_request, calls = _node(10_000, lambda method, params: _rpc("0x" + "00" * 500))
+    dedup = RequestDeduplicator(max_bytes=8 * 1024)
+    fetch = dedup.wrap(make_request)
+    for n in range(50):
+        fetch("eth_getCode", ["0xabc", hex(n)])
+    assert 0 < dedup.nbytes <= dedup.max_bytes
+    assert len(dedup._cache) < 10
+    # Oldest entries were evicted, the latest is still served from the cache.
+    fetch("eth_getCode", ["0xabc", hex(49)])
+    fetch("eth_getCode", ["0xabc", hex(0)])
+    assert len(calls) == 51
+
+
+@pytest.mark.parametrize("block, stored", [("0x5", True), ("0x60", False)])
+def test_concurrent_identical_calls_share_one_request(block, stored):
+    # 0x60 is 4 blocks below the head: shared while in flight, but not stored.
+    gate = threading.Event()
+
+    def handler(method, params):
+        gate.wait()
+        return _rpc("0x6001")
+
+    make_request, calls = _node(100, handler)
+    dedup = RequestDeduplicator()
+    arrived = threading.Semaphore(0)
+
+    class Inflight(dict):
+        # Signals each caller that found the request already in flight.
+        def get(self, key, default=None):
+            found = super().get(key, default)
+            if found is not None:
+                arrived.release()
+            return found
+
+    dedup._inflight = Inflight()
+    fetch = dedup.wrap(make_request)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(fetch("eth_getCode", ["0xabc", block])))
+        for _ in range(6)
+    ]
+    for t in threads:
+        t.start()
+    for _ in range(5):
+        assert arrived.acquire(timeout=10)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert dedup.stats["shared"] == 5
+    assert len(results) == 6 and all(r["result"] == "0x6001" for r in results)
+    fetch("eth_getCode", ["0xabc", block])
+    assert len(calls) == (1 if stored else 2)
+
+
+class _CountingProvider(BaseProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def make_request(self, method, params):
+        self.calls.append((method, params))
+        if method == "eth_chainId":
+            return _rpc("0x1")
+        if method == "eth_getCode":
+            return _rpc("0x6001")
+        return _rpc("0x100")
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+
+def test_install_dedup_on_web3():
+    provider = _CountingProvider()
+    w3 = Web3(provider)
+    dedup = install_dedup(w3)
+    addr = Web3.to_checksum_address("0x" + "ab" * 20)
+    assert w3.eth.get_code(addr, 5) == w3.eth.get_code(addr, 5)
+    w3.eth.get_code(addr, "latest")
+    w3.eth.get_code(addr, "latest")
+    code_calls = [c for c in provider.calls if c[0] == "eth_getCode"]
+    assert len(code_calls) == 3
+    assert dedup.stats["hits"] == 1
+    # The provider itself is untouched: direct calls bypass the middleware.
+    assert provider.make_request("eth_getCode", [addr, "0x5"])["result"] == "0x6001"
+    assert len([c for c in provider.calls if c[0] == "eth_getCode"]) == 4
@@ -0,0 +1,121 @@
+"""Tests for the event decoder registry."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from eth_abi import encode
+from hexbytes import HexBytes
+
+from eth_tx_explorer.core import TRANSFER_SIG
+from eth_tx_explorer.events import BUILTIN_EVENTS, EventDecoder, EventRegistry
+
+A = "0x" + "a1" * 20
+B = "0x" + "b2" * 20
+OP = "0x" + "c3" * 20
+TOKEN = "0x" + "d4" * 20
+
+
+def _log(topics, data=b"", index=0):
+    return SimpleNamespace(address=TOKEN, topics=[HexBytes(t) for t in topics], data=HexBytes(data), logIndex=index)
+
+
+def test_signature_parsing_and_topic0():
+    d = EventDecoder.from_signature("Transfer(address indexed from, address indexed to, uint value)")
+    assert d.signature == "Transfer(address,address,uint256)"
+    assert d.topic0 == bytes(TRANSFER_SIG)
+    assert d.topic_count == 3
+    with pytest.raises(ValueError):
+        EventDecoder.from_signature("not a signature")
+
+
+def test_erc20_and_erc721_transfer_share_topic0(topic):
+    reg = EventRegistry.with_builtins()
+    erc20 = reg.decode_log(_log([TRANSFER_SIG, topic(A), topic(B)], (10**18).to_bytes(32, "big")))
+    erc721 = reg.decode_log(_log([TRANSFER_SIG, topic(A), topic(B), (7).to_bytes(32, "big")]))
+    assert erc20["args"] == {"from": A, "to": B, "value": 10**18}
+    assert erc721["args"] == {"from": A, "to": B, "tokenId": 7}
+
+
+def test_builtin_weth_and_erc1155(topic):
+    reg = EventRegistry.with_builtins()
+    deposit = EventDecoder.from_signature("Deposit(address indexed dst, uint256 wad)")
+    ev = reg.decode_log(_log([deposit.topic0, topic(A)], (5).to_bytes(32, "big")))
+    assert ev["event"] == "Deposit" and ev["args"] == {"dst": A, "wad": 5}
+
+    batch = reg.lookup([EventDecoder.from_signature(
+        "TransferBatch(address indexed operator, address indexed from, address indexed to, uint256[] ids, uint256[] values)"
+    ).topic0, b"", b"", b""])
+    data = encode(["uint256[]", "uint256[]"], [[1, 2, 3], [10, 20, 30]])
+    ev = reg.decode_log(_log([batch.topic0, topic(OP), topic(A), topic(B)], data))
+    assert ev["args"] == {"operator": OP, "from": A, "to": B, "ids": [1, 2, 3], "values": [10, 20, 30]}
+
+    approval_all = EventDecoder.from_signature("ApprovalForAll(address indexed owner, address indexed operator, bool approved)")
+    ev = reg.decode_log(_log([approval_all.topic0, topic(A), topic(OP)], (1).to_bytes(32, "big")))
+    assert ev["args"]["approved"] is True
+
+
+def test_native_decoding_matches_eth_abi():
+    d = EventDecoder.from_signature(
+        "Mixed(int256 delta, bytes4 selector, string memo, bytes blob, address[] path, bool ok)"
+    )
+    values = [-12345, b"\xde\xad\xbe\xef", "héllo", b"\x01\x02", [A, B], True]
+    data = encode(["int256", "bytes4", "string", "bytes", "address[]", "bool"], values)
+    assert d.decode([d.topic0], data) == {
+        "delta": -12345, "selector": "0xdeadbeef", "memo": "héllo", "blob": "0x0102",
+        "path": [A, B], "ok": True,
+    }
+
+
+def test_user_abi_with_tuple_falls_back_to_eth_abi(tmp_path, topic):
+    abi = [
+        {"type": "function", "name": "swap", "inputs": []},
+        {"type": "event", "name": "Swap", "anonymous": False, "inputs": [
+            {"name": "sender", "type": "address", "indexed": True},
+            {"name": "info", "type": "tuple", "indexed": False, "components": [
+                {"name": "amount", "type": "uint256"}, {"name": "fee", "type": "uint24"}]},
+            {"name": "note", "type": "string", "indexed": True},
+        ]},
+        {"type": "event", "name": "Anon", "anonymous": True, "inputs": []},
+    ]
+    path = tmp_path / "abi.json"
+    path.write_text(json.dumps(abi))
+    reg = EventRegistry()
+    assert reg.register_abi(path) == 1
+    swap = reg.lookup([EventDecoder.from_abi(abi[1]).topic0, b"", b""])
+    assert swap.signature == "Swap(address,(uint256,uint24),string)"
+    note_hash = b"\x11" * 32
+    ev = reg.decode_log(_log([swap.topic0, topic(A), note_hash], encode(["(uint256,uint24)"], [(99, 3000)])))
+    assert ev["args"] == {"sender": A, "info": (99, 3000), "note": "0x" + "11" * 32}
+
+
+def test_decode_receipts_batch_skips_unknown(topic):
+    reg = EventRegistry.with_builtins()
+    receipts = [
+        SimpleNamespace(transactionHash=HexBytes(b"\x01" * 32), logs=[
+            _log([TRANSFER_SIG, topic(A), topic(B)], (1).to_bytes(32, "big"), 0),
+            _log([b"\x99" * 32], b"", 1),
+            _log([], b"", 2),
+        ]),
+        SimpleNamespace(transactionHash=HexBytes(b"\x02" * 32), logs=[
+            _log([TRANSFER_SIG, topic(B), topic(A)], (2).to_bytes(32, "big"), 3),
+        ]),
+    ]
+    out = reg.decode_receipts(receipts)
+    assert [(e["tx_hash"][:4], e["log_index"], e["args"]["value"]) for e in out] == [
+        ("0x01", 0, 1), ("0x02", 3, 2)
+    ]
+
+
+def test_truncated_logs_decode_to_none(topic):
+    reg = EventRegistry.with_builtins()
+    value = (10**18).to_bytes(32, "big")
+    assert reg.decode_log(_log([TRANSFER_SIG, topic(A), topic(B)], value))["args"]["value"] == 10**18
+    # Data cut short, a topic cut short, and an out-of-range dynamic array.
+    assert reg.decode_log(_log([TRANSFER_SIG, topic(A), topic(B)], value[:16])) is None
+    assert reg.decode_log(_log([TRANSFER_SIG, topic(A), topic(B)[:20]], value)) is None
+    batch = EventDecoder.from_signature(BUILTIN_EVENTS[-1])
+    data = encode(["uint256[]", "uint256[]"], [[1, 2], [3, 4]])
+    topics = [batch.topic0, topic(A), topic(A), topic(B)]
+    assert reg.decode_log(_log(topics, data))["args"]["values"] == [3, 4]
+    assert reg.decode_log(_log(topics, data[:-32])) is None
@@ -3,7 +3,14 @@ from datetime import datetime
 
 import pytest
 
-from eth_tx_explorer.formatters import format_tx_info, format_transfer_summary
+from web3 import Web3
+
+from eth_tx_explorer.formatters import (
+    TransferRenderer,
+    format_transfer_summary,
+    format_tx_info,
+    format_units,
+)
 
 
 def make_good_tx() -> dict:
@@ -237,3 +244,64 @@ def test_format_transfer_summary_contract_creation():
     assert "CONTRACT_CREATION_WITH_VALUE" in out
     assert "To: (contract creation)" in out
     assert "0.05" in out and "ETH" in out
+
+
+@pytest.mark.parametrize(
+    "wei",
+    [1, 999_999, 10**11, 10**12, 10**12 + 1, 123_456_789, 10**18, 15 * 10**17, 10**19, 2**256 - 1],
+)
+def test_format_units_matches_from_wei(wei):
+    assert format_units(wei, 18) == str(Web3.from_wei(wei, "ether"))
+    assert format_units(wei, 9) == str(Web3.from_wei(wei, "gwei"))
+
+
+def test_format_units_zero_and_out_of_range():
+    assert format_units(0, 18) == "0"
+    with pytest.raises(ValueError):
+        format_units(-1, 18)
+
+
+def _legacy_echo_output(w3, block_number, records):
+    """What block-transfers printed with one click.echo per line block."""
+    out = [f"Block {block_number} — {len(records)} transfer(s) found\n", "=" * 60 + "\n"]
+    for r in records:
+        out.append(format_transfer_summary(w3, r) + "\n")
+        out.append("-" * 60 + "\n")
+    return "".join(out)
+
+
+def _records():
+    base = {
+        "transaction_index": 0, "envelope_type": "EIP-1559", "token_contract": None, "token_value": None,
+        "gas": 21000, "gasUsed": 21000, "gasPrice": None, "maxFeePerGas": 30_000_000_001,
+        "maxPriorityFeePerGas": 1, "effectiveGasPrice": 25_000_000_000, "tx_type": 2,
+    }
+    return [
+        {**base, "transfer_type": "ETH_SIMPLE_TRANSFER", "tx_hash": "0xa1", "from_addr": "0xAlice",
+         "to_addr": "0xBob", "eth_value_wei": 7},
+        {**base, "transfer_type": "CONTRACT_CREATION_WITH_VALUE", "tx_hash": "0xa2", "from_addr": "0xAlice",
+         "to_addr": None, "eth_value_wei": 10**18, "tx_type": 0, "gasPrice": 10**9 + 5},
+        {**base, "transfer_type": "ERC20_TRANSFER", "tx_hash": "0xa3", "from_addr": "0xBob",
+         "to_addr": "0xAlice", "eth_value_wei": None, "token_contract": "0xToken", "token_value": 42},
+    ]
+
+
+def test_renderer_blocks_layout_is_byte_identical():
+    records = _records()
+    rendered = TransferRenderer().render_block(19_000_000, records)
+    assert rendered == _legacy_echo_output(_FakeW3(), 19_000_000, records)
+    assert "Value: 7E-18 ETH" in rendered
+    assert "Max Priority: 1E-9 gwei" in rendered
+
+
+def test_renderer_table_layout():
+    rendered = TransferRenderer("table").render_block(5, _records())
+    lines = rendered.splitlines()
+    assert lines[0] == "Block 5 — 3 transfer(s) found"
+    assert lines[2].split() == ["IDX", "TYPE", "FROM", "TO", "GAS", "USED", "AMOUNT"]
+    assert len(lines) == 6
+    assert lines[4].split()[1:4] == ["CONTRACT_CREATION_WITH_VALUE", "0xAlice", "(contract"]
+    assert lines[4].endswith("1 ETH")
+    assert lines[5].endswith("42 0xToken")
+    with pytest.raises(ValueError):
+        TransferRenderer("grid")
@@ -0,0 +1,109 @@
+"""Tests for the CSR transfer graph."""
+
+import random
+
+import pytest
+from web3 import Web3
+
+from eth_tx_explorer.graph import ETH, TransferGraph
+
+
+def _addr(i: int) -> str:
+    return Web3.to_checksum_address(f"0x{i:040x}")
+
+
+TOKEN = _addr(0xD4)
+A, B, C, D, E = (_addr(i) for i in range(1, 6))
+
+
+def _chain_graph():
+    g = TransferGraph()
+    g.add_transfer(A, B, TOKEN, 100, 10)
+    g.add_transfer(B, C, TOKEN, 60, 12)
+    g.add_transfer(C, D, TOKEN, 60, 11)   # before C was funded: not causal
+    g.add_transfer(B, D, None, 5 * 10**18, 13)
+    g.add_transfer(D, E, TOKEN, 1, 20)
+    return g
+
+
+def test_reach_respects_hops_direction_token_and_order():
+    g = _chain_graph()
+    ids = {a: g.addresses.intern(a) for a in (A, B, C, D, E)}
+    reached = g.reach(A, hops=3)
+    assert {n: v[0] for n, v in reached.items()} == {ids[A]: 0, ids[B]: 1, ids[C]: 2, ids[D]: 2, ids[E]: 3}
+    assert reached[ids[D]][1] == 13
+    # Token-only: D is reachable only through C -> D, which happens before C is funded.
+    token_only = g.reach(A, hops=3, token=TOKEN)
+    assert ids[D] not in token_only and ids[C] in token_only
+    assert ids[D] in g.reach(A, hops=3, token=TOKEN, causal=False)
+    assert set(g.reach(A, hops=1)) == {ids[A], ids[B]}
+    # Backwards, C -> D (block 11) precedes D -> E (block 20), so C is a source too.
+    assert set(g.reach(E, hops=3, direction="in")) == {ids[E], ids[D], ids[C], ids[B], ids[A]}
+    assert set(g.reach(E, hops=3, direction="in", start_block=12)) == {ids[E], ids[D], ids[B]}
+    assert set(g.reach(A, hops=3, end_block=12)) == {ids[A], ids[B], ids[C]}
+
+
+def test_causal_reach_uses_earliest_arrival():
+    g = TransferGraph()
+    g.add_transfer(A, B, None, 1, 50)
+    g.add_transfer(A, C, None, 1, 10)
+    g.add_transfer(C, B, None, 1, 11)   # B reached again, earlier, at hop 2
+    g.add_transfer(B, D, None, 1, 20)   # only valid after the earlier arrival
+    reached = g.reach(A, hops=3)
+    b = g.addresses.intern(B)
+    # Hops, block and via edge all describe the earlier path A -> C -> B.
+    assert reached[b] == (2, 11, 2)
+    assert reached[g.addresses.intern(D)] == (3, 20, 3)
+    for node, (hops, block, via) in reached.items():
+        if via >= 0:
+            assert g.edge(via)["block"] == block and g.endpoints(via)[1] == node
+
+
+def test_appends_after_index_and_rebuild_match_fresh_graph():
+    rng = random.Random(4)
+    edges = [(_addr(rng.randrange(1, 300)), _addr(rng.randrange(1, 300)), rng.choice([None, TOKEN]),
+              rng.getrandbits(200), 100 + i // 10) for i in range(20_000)]
+    g = TransferGraph()
+    for i, e in enumerate(edges):
+        g.add_transfer(*e)
+        if i in (50, 5_000, 5_300, 19_000):
+            g.reach(A, hops=2)
+            g.top_flows(A, direction="in")
+    fresh = TransferGraph()
+    for e in edges:
+        fresh.add_transfer(*e)
+    def by_address(graph, result):
+        # Node IDs depend on interning order; compare by address.
+        return {graph.addresses.checksum(n): v for n, v in result.items()}
+
+    for address in (A, B, _addr(17)):
+        for direction in ("out", "in"):
+            assert by_address(g, g.reach(address, hops=3, direction=direction)) == by_address(
+                fresh, fresh.reach(address, hops=3, direction=direction)
+            )
+            assert [(g.addresses.checksum(n), total) for n, _, total, _ in g.top_flows(address, direction)] == [
+                (fresh.addresses.checksum(n), total) for n, _, total, _ in fresh.top_flows(address, direction)
+            ]
+    assert g.edge(7)["value"] == edges[7][3]
+
+
+def test_top_flows_and_records():
+    g = TransferGraph()
+    records = [
+        {"transfer_type": "ERC20_TRANSFER", "from_addr": A.lower(), "to_addr": B.lower(),
+         "token_contract": TOKEN, "token_value": 2**200, "eth_value_wei": None},
+        {"transfer_type": "ERC20_TRANSFER", "from_addr": A.lower(), "to_addr": B.lower(),
+         "token_contract": TOKEN, "token_value": 5, "eth_value_wei": None},
+        {"transfer_type": "ETH_SIMPLE_TRANSFER", "from_addr": A, "to_addr": C,
+         "token_contract": None, "token_value": None, "eth_value_wei": 7},
+        {"transfer_type": "CONTRACT_CREATION_WITH_VALUE", "from_addr": A, "to_addr": "(contract creation)",
+         "token_contract": None, "token_value": None, "eth_value_wei": 1},
+    ]
+    assert g.add_records(records, 19_000_000) == 3
+    b, c = g.addresses.intern(B), g.addresses.intern(C)
+    token = g.addresses.intern(TOKEN)
+    assert g.top_flows(A) == [(b, token, 2**200 + 5, 2), (c, ETH, 7, 1)]
+    assert g.top_flows(A, token="ETH") == [(c, ETH, 7, 1)]
+    assert g.edge(2) == {"from": A, "to": C, "token": "ETH", "value": 7, "block": 19_000_000}
+    with pytest.raises(ValueError):
+        g.reach(A, direction="sideways")
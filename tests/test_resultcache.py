@@ -0,0 +1,116 @@
+"""Tests for the derived-result cache of processed block transfers."""
+
+import json
+from collections import defaultdict
+
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+from eth_tx_explorer import resultcache
+from eth_tx_explorer.addresses import AddressTable
+from eth_tx_explorer.core import process_block_transfers
+from eth_tx_explorer.resultcache import (
+    TransferCache,
+    cached_block_transfers,
+    decode_records,
+    encode_records,
+)
+from eth_tx_explorer.watchlist import Watchlist
+
+ALICE = Web3.to_checksum_address("0x" + "a1" * 20)
+BOB = Web3.to_checksum_address("0x" + "b2" * 20)
+
+
+def _w3(fake_eth, block_hashes=None):
+    """Blocks 100..109 with two value transfers each; change block_hashes to simulate a reorg."""
+    if block_hashes is None:
+        block_hashes = _block_hashes()
+
+    def block(number, full_transactions):
+        txs = [
+            AttributeDict({"hash": HexBytes(bytes([i, number % 256]) * 16), "from": ALICE, "to": BOB,
+                           "value": 10**18 * i, "type": 2, "gas": 21000, "maxFeePerGas": 30,
+                           "maxPriorityFeePerGas": 2})
+            for i in (1, 2)
+        ]
+        return AttributeDict({"number": number, "hash": block_hashes[number], "timestamp": 1,
+                              "logsBloom": HexBytes(b"\x00" * 256), "transactions": txs})
+
+    receipt = AttributeDict({"logs": [], "gasUsed": 21000, "effectiveGasPrice": 12})
+    return AttributeDict({"eth": fake_eth(block, defaultdict(lambda: receipt))})
+
+
+def _block_hashes():
+    return {n: HexBytes(bytes([n % 256]) * 32) for n in range(100, 110)}
+
+
+def test_encode_decode_round_trip():
+    records = [
+        {"transfer_type": "ERC20_TRANSFER", "tx_hash": "0x" + "ab" * 32, "from_addr": ALICE.lower(),
+         "to_addr": BOB.lower(), "token_contract": ALICE, "token_value": 2**256 - 1, "eth_value_wei": None},
+        {"transfer_type": "CONTRACT_CREATION_WITH_VALUE", "tx_hash": "0x" + "ab" * 32, "from_addr": BOB,
+         "to_addr": "(contract creation)", "token_value": -5, "eth_value_wei": 0},
+    ]
+    addresses = AddressTable()
+    data = encode_records(records, addresses)
+    decoded = decode_records(data, addresses)
+    assert decoded == records
+    # Shared strings with the table: no re-rendering of known addresses.
+    assert decoded[0]["token_contract"] is addresses.checksum(addresses.intern(ALICE))
+    assert len(data) < len(json.dumps(records))
+    assert decode_records(encode_records([])) == []
+
+
+def test_finalized_repeat_is_one_cache_read(tmp_path, fake_eth):
+    w3 = _w3(fake_eth)
+    path = tmp_path / "transfers.sqlite"
+    with TransferCache(path, final_through=105) as cache:
+        first = cached_block_transfers(w3, 101, cache)
+        assert first == process_block_transfers(_w3(fake_eth), 101)
+        assert cache.misses == 1
+    w3.eth.calls.clear()
+    with TransferCache(path, final_through=105) as cache:
+        assert cached_block_transfers(w3, 101, cache) == first
+        assert cache.hits == 1
+    assert w3.eth.calls == []
+
+
+def test_recent_block_checks_hash_and_misses_after_reorg(fake_eth):
+    block_hashes = _block_hashes()
+    w3 = _w3(fake_eth, block_hashes)
+    cache = TransferCache(final_through=100)
+    first = cached_block_transfers(w3, 107, cache)
+    w3.eth.calls.clear()
+    assert cached_block_transfers(w3, 107, cache) == first
+    assert w3.eth.calls == [("get_block", 107, False)]
+    block_hashes[107] = HexBytes(b"\xee" * 32)
+    cached_block_transfers(w3, 107, cache)
+    assert cache.hits == 1 and cache.misses == 2
+    assert ("get_block", 107, True) in w3.eth.calls
+
+
+def test_options_and_extractor_version_are_part_of_the_key(tmp_path, monkeypatch, fake_eth):
+    w3 = _w3(fake_eth)
+    path = tmp_path / "transfers.sqlite"
+    with TransferCache(path, final_through=105) as cache:
+        cached_block_transfers(w3, 102, cache)
+        assert cached_block_transfers(w3, 102, cache, watchlist=Watchlist([BOB])) is not None
+        assert cache.misses == 2
+    monkeypatch.setattr(resultcache, "extractor_version", lambda: b"\x01" * 16)
+    with TransferCache(path, final_through=105) as cache:
+        # Opening under a new version deletes nothing up front.
+        assert cache._db.execute("SELECT COUNT(*) FROM transfers").fetchone()[0] == 2
+        cached_block_transfers(w3, 102, cache)
+        assert (cache.hits, cache.misses) == (0, 1)
+    # The closing commit pruned the old version's rows.
+    with TransferCache(path, final_through=105) as cache:
+        assert cache._db.execute("SELECT COUNT(*) FROM transfers").fetchone()[0] == 1
+        assert not cache._stale
+
+
+def test_extractor_version_covers_the_whole_extraction_path():
+    modules = resultcache.extractor_modules()
+    for name in ("core", "rpc", "transports", "dedup", "events", "traces", "addresses"):
+        assert name in modules
+    assert "cli" not in modules and "resultcache" not in modules
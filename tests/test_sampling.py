@@ -0,0 +1,110 @@
+"""Tests for stratified block sampling and range estimates."""
+
+import math
+import random
+
+import pytest
+
+from eth_tx_explorer.sampling import (
+    StratifiedSample,
+    estimate_range,
+    parse_sample_spec,
+    sample_size,
+    transfer_metrics,
+)
+
+START, END = 19_000_000, 19_049_999
+
+
+def _activity(seed: int = 5):
+    """Per-block transfer counts with a daily cycle, a trend and noise."""
+    rng = random.Random(seed)
+    return {
+        b: max(0, round(200 + 80 * math.sin(2 * math.pi * (b - START) / 7200) + (b - START) / 1000
+                        + rng.gauss(0, 40)))
+        for b in range(START, END + 1)
+    }
+
+
+ACTIVITY = _activity()
+TRUE_MEAN = sum(ACTIVITY.values()) / len(ACTIVITY)
+
+
+def _measure(calls):
+    def measure(b):
+        calls.append(b)
+        return {"transfers": ACTIVITY[b]}
+    return measure
+
+
+def test_parse_sample_spec():
+    assert parse_sample_spec("500") == 500
+    assert parse_sample_spec("0.01") == 0.01
+    assert parse_sample_spec("2.5%") == 0.025
+    for bad in ("0", "1.5", "0%", "lots"):
+        with pytest.raises(ValueError):
+            parse_sample_spec(bad)
+    assert sample_size(0.01, 50_000) == 500
+    assert sample_size(1, 50_000) == 2
+    assert sample_size(1000, 300) == 300
+
+
+def test_grow_draws_without_replacement_within_strata():
+    sample = StratifiedSample(START, START + 999, strata=10, seed=1)
+    first = sample.grow(40)
+    more = sample.grow(100)
+    blocks = [b for _, b in first + more]
+    assert len(blocks) == len(set(blocks)) == 100
+    for h, b in first + more:
+        lo, hi = sample.strata[h]
+        assert lo <= b < hi
+    # Proportional allocation over equal strata.
+    per_stratum = [sum(1 for h, _ in first + more if h == i) for i in range(10)]
+    assert per_stratum == [10] * 10
+
+
+def test_interval_covers_true_mean():
+    covered = 0
+    for seed in range(100):
+        result = estimate_range(START, END, _measure([]), 200, metrics=("transfers",), seed=seed)
+        e = result.estimates["transfers"]
+        covered += abs(e.mean - TRUE_MEAN) <= e.half_width
+        assert e.total == pytest.approx(e.mean * 50_000)
+    assert covered >= 88
+
+
+def test_adaptive_growth_reaches_target_error():
+    calls = []
+    result = estimate_range(START, END, _measure(calls), 20, metrics=("transfers",),
+                            target_error=0.01, seed=7)
+    e = result.estimates["transfers"]
+    assert result.rounds > 1 and e.relative_error <= 0.01
+    assert len(calls) == len(set(calls)) == result.sampled < 50_000
+
+
+def test_full_range_is_exact():
+    result = estimate_range(START, START + 99, _measure([]), 1.0, metrics=("transfers",))
+    e = result.estimates["transfers"]
+    assert result.exact and e.half_width == 0
+    assert e.mean == pytest.approx(sum(ACTIVITY[b] for b in range(START, START + 100)) / 100)
+
+
+def test_transfer_metrics():
+    records = [
+        {"transfer_type": "ERC20_TRANSFER", "eth_value_wei": None},
+        {"transfer_type": "ETH_SIMPLE_TRANSFER", "eth_value_wei": 10**18},
+    ]
+    m = transfer_metrics(records)
+    assert m["transfers"] == 2 and m["ERC20_TRANSFER"] == 1 and m["eth_value_wei"] == 10**18
+    assert m["ETH_INTERNAL_TRANSFER"] == 0
+    big = transfer_metrics([{"transfer_type": "ETH_SIMPLE_TRANSFER", "eth_value_wei": v} for v in (2**53, 1)])
+    assert big["eth_value_wei"] == 2**53 + 1
+
+
+def test_wei_spread_survives_large_values():
+    # Deviations of a few wei on 10**22 vanish in float arithmetic.
+    measure = lambda b: {"eth_value_wei": 10**22 + b % 3}
+    result = estimate_range(START, START + 999, measure, 60, metrics=("eth_value_wei",),
+                            primary="eth_value_wei", seed=1)
+    e = result.estimates["eth_value_wei"]
+    assert e.half_width > 0 and e.mean == pytest.approx(10**22)
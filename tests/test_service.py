@@ -0,0 +1,103 @@
+"""Tests for the HTTP query service against a local stub node (no network)."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestClient, TestServer
+from web3.exceptions import BlockNotFound
+
+from eth_tx_explorer.service import LRUCache, QueryService, create_app
+
+
+def _chain(fake_eth, head, gate=None):
+    """Stub node with blocks 0..head, three txs each."""
+
+    def block(number, full_transactions):
+        if number > head:
+            raise BlockNotFound(f"Block {number} not found")
+        if number == 7:
+            # An upstream failure that web3 / traces.py surface as ValueError.
+            raise ValueError("RPC error: the method debug_traceBlockByNumber does not exist")
+        return SimpleNamespace(number=number, timestamp=1_700_000_000 + number * 12, transactions=[b"\x01"] * 3)
+
+    return fake_eth(block, head=head, gate=gate)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _with_client(service, fn):
+    async with TestClient(TestServer(create_app(service))) as client:
+        return await fn(client)
+
+
+def test_lru_cache_evicts_least_recent():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+
+
+def test_concurrent_identical_requests_coalesce(fake_eth):
+    # The upstream call is held until all seven followers have joined it.
+    gate = threading.Event()
+    eth = _chain(fake_eth, head=1000, gate=gate)
+    service = QueryService(SimpleNamespace(eth=eth), finality_depth=10)
+
+    class Counters(dict):
+        def __setitem__(self, key, value):
+            super().__setitem__(key, value)
+            if key == "coalesced" and value == 7:
+                gate.set()
+
+    service.counters = Counters(service.counters)
+
+    async def fn(client):
+        responses = await asyncio.gather(*(client.get("/blocks/100") for _ in range(8)))
+        bodies = [await r.json() for r in responses]
+        return [r.status for r in responses], bodies
+
+    statuses, bodies = _run(_with_client(service, fn))
+    assert statuses == [200] * 8
+    assert all(b == bodies[0] for b in bodies)
+    assert bodies[0]["number"] == 100 and bodies[0]["tx_count"] == 3
+    assert eth.block_calls == [100]
+    assert service.counters["upstream"] == 1
+    assert service.counters["coalesced"] == 7
+
+
+def test_finalized_results_cached_recent_not(fake_eth):
+    eth = _chain(fake_eth, head=1000)
+    service = QueryService(SimpleNamespace(eth=eth), finality_depth=10)
+
+    async def fn(client):
+        for _ in range(3):
+            assert (await client.get("/blocks/500")).status == 200
+            assert (await client.get("/blocks/995")).status == 200
+        return await (await client.get("/metrics")).json()
+
+    metrics = _run(_with_client(service, fn))
+    assert eth.block_calls.count(500) == 1
+    assert eth.block_calls.count(995) == 3
+    assert metrics["cache_hits"] == 2
+    assert metrics["routes"]["block_info"]["count"] == 6
+    assert metrics["routes"]["block_info"]["p95_ms"] >= 0
+
+
+def test_error_statuses(fake_eth):
+    service = QueryService(SimpleNamespace(eth=_chain(fake_eth, head=10)))
+
+    async def fn(client):
+        return [
+            (await client.get("/blocks/abc")).status,
+            (await client.get("/blocks/-1")).status,
+            (await client.get("/tx/0x1234")).status,
+            (await client.get("/blocks/99")).status,
+            (await client.get("/blocks/7")).status,
+        ]
+
+    assert _run(_with_client(service, fn)) == [400, 400, 400, 404, 502]
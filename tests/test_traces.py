@@ -0,0 +1,96 @@
+"""Tests for block trace parsing (streaming splitter + internal transfer extraction)."""
+
+import json
+
+import pytest
+
+from eth_tx_explorer.traces import (
+    JSONResultStream,
+    iter_call_frame_transfers,
+    iter_json_result,
+    iter_parity_trace_transfers,
+)
+
+
+def _chunks(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_iter_json_result_small_chunks():
+    """Elements are reassembled correctly whatever the chunk boundaries."""
+    result = [
+        {"txHash": "0x01", "result": {"type": "CALL", "calls": [{"input": "a]b,\"c\\\\"}]}},
+        {"txHash": "0x02", "result": {"type": "CALL", "output": "[{,}]"}},
+        [1, 2, {"x": "\\\""}],
+        "plain \"string\"",
+    ]
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "result": result})
+    for size in (1, 2, 3, 7, 64, len(body)):
+        assert list(iter_json_result(_chunks(body, size))) == result
+
+
+def test_iter_json_result_error_envelope():
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "error": {"code": -32601, "message": "nope"}})
+    with pytest.raises(ValueError) as exc_info:
+        list(iter_json_result(_chunks(body, 5)))
+    assert "nope" in str(exc_info.value)
+
+
+def test_json_result_stream_truncated():
+    stream = JSONResultStream()
+    stream.feed('{"result": [{"a": 1}, {"b"')
+    with pytest.raises(ValueError):
+        stream.close()
+
+
+def test_call_frame_transfers_skips_root_reverts_and_delegatecall():
+    frame = {
+        "type": "CALL", "from": "0xa", "to": "0xb", "value": "0x5",
+        "calls": [
+            {"type": "CALL", "from": "0xb", "to": "0xc", "value": "0x10",
+             "calls": [{"type": "CALL", "from": "0xc", "to": "0xd", "value": "0x1"}]},
+            {"type": "DELEGATECALL", "from": "0xb", "to": "0xe", "value": "0x10"},
+            {"type": "CALL", "from": "0xb", "to": "0xf", "value": "0x7", "error": "execution reverted",
+             "calls": [{"type": "CALL", "from": "0xf", "to": "0xa", "value": "0x3"}]},
+            {"type": "STATICCALL", "from": "0xb", "to": "0xc"},
+            {"type": "CREATE2", "from": "0xb", "to": "0x9", "value": "0x2"},
+        ],
+    }
+    out = list(iter_call_frame_transfers(frame))
+    assert [(t["from"], t["to"], t["value"], t["depth"]) for t in out] == [
+        ("0xb", "0xc", 16, 1),
+        ("0xc", "0xd", 1, 2),
+        ("0xb", "0x9", 2, 1),
+    ]
+
+
+def test_call_frame_transfers_reverted_tx():
+    frame = {"type": "CALL", "error": "out of gas",
+             "calls": [{"type": "CALL", "from": "0xb", "to": "0xc", "value": "0x1"}]}
+    assert list(iter_call_frame_transfers(frame)) == []
+
+
+def test_parity_trace_transfers():
+    traces = [
+        {"type": "call", "traceAddress": [], "transactionPosition": 0,
+         "action": {"callType": "call", "from": "0xa", "to": "0xb", "value": "0x5"}},
+        {"type": "call", "traceAddress": [0], "transactionPosition": 0,
+         "action": {"callType": "call", "from": "0xb", "to": "0xc", "value": "0x10"}},
+        {"type": "call", "traceAddress": [1], "transactionPosition": 0, "error": "Reverted",
+         "action": {"callType": "call", "from": "0xb", "to": "0xd", "value": "0x1"}},
+        {"type": "call", "traceAddress": [1, 0], "transactionPosition": 0,
+         "action": {"callType": "call", "from": "0xd", "to": "0xe", "value": "0x1"}},
+        {"type": "call", "traceAddress": [2], "transactionPosition": 0,
+         "action": {"callType": "delegatecall", "from": "0xb", "to": "0xe", "value": "0x1"}},
+        {"type": "create", "traceAddress": [0], "transactionPosition": 1,
+         "action": {"from": "0xa", "value": "0x3"}, "result": {"address": "0x9"}},
+        {"type": "suicide", "traceAddress": [1], "transactionPosition": 1,
+         "action": {"address": "0x9", "refundAddress": "0xa", "balance": "0x3"}},
+        {"type": "reward", "traceAddress": [], "action": {"author": "0xm", "value": "0x1"}},
+    ]
+    out = list(iter_parity_trace_transfers(traces))
+    assert [(t["transaction_position"], t["from"], t["to"], t["value"], t["call_type"]) for t in out] == [
+        (0, "0xb", "0xc", 16, "CALL"),
+        (1, "0xa", "0x9", 3, "CREATE"),
+        (1, "0x9", "0xa", 3, "SELFDESTRUCT"),
+    ]
@@ -0,0 +1,207 @@
+"""Tests for URL-based provider selection and the pipelined WebSocket / IPC providers."""
+
+import json
+import socket
+import threading
+
+import pytest
+from web3 import Web3
+
+from eth_tx_explorer.core import fetch_transfer_receipts
+from eth_tx_explorer.traces import fetch_internal_transfers
+from eth_tx_explorer.transports import (
+    PipelinedIPCProvider,
+    PipelinedWebSocketProvider,
+    provider_for_url,
+)
+
+
+_TRACE = [
+    {"txHash": f"0x{i:064x}", "result": {"type": "CALL", "from": "0xa", "to": "0xb", "value": "0x0",
+                                         "calls": [{"type": "CALL", "from": "0xb", "to": "0xc", "value": hex(i + 1)}]}}
+    for i in range(50)
+]
+
+
+def _answer(request):
+    method, params = request["method"], request["params"]
+    if method == "eth_blockNumber":
+        result = "0x10"
+    elif method == "debug_traceBlockByNumber":
+        result = _TRACE
+    elif method == "eth_getTransactionReceipt":
+        result = {"transactionHash": params[0], "blockNumber": "0x10", "status": "0x1", "logs": [],
+                  "gasUsed": "0x5208", "transactionIndex": "0x0"}
+    else:
+        result = "stand-in/1.0"
+    return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+
+class _HoldingServer:
+    """Buffers `hold` requests, then answers them in reverse order (proves id routing)."""
+
+    def __init__(self, hold):
+        self.hold = hold
+        self.connections = 0
+        self.pending = []
+        self.max_buffered = 0
+        self.lock = threading.Lock()
+
+    def on_request(self, request, send):
+        if request["method"] == "eth_syncing":
+            return  # never answered: a lost response
+        with self.lock:
+            self.pending.append(request)
+            self.max_buffered = max(self.max_buffered, len(self.pending))
+            if len(self.pending) < self.hold:
+                return
+            batch, self.pending = self.pending, []
+        for r in reversed(batch):
+            send(json.dumps(_answer(r)))
+
+
+@pytest.fixture
+def ipc_server(tmp_path):
+    path = str(tmp_path / "node.ipc")
+    server = _HoldingServer(hold=4)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            server.connections += 1
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    def handle(conn):
+        decoder, buf = json.JSONDecoder(), ""
+        send_lock = threading.Lock()
+
+        def send(text):
+            with send_lock:
+                conn.sendall(text.encode() + b"\n")
+
+        while True:
+            try:
+                chunk = conn.recv(65536)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk.decode()
+            while buf.strip():
+                try:
+                    request, end = decoder.raw_decode(buf.lstrip())
+                except ValueError:
+                    break
+                buf = buf.lstrip()[end:]
+                server.on_request(request, send)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield path, server
+    listener.close()
+
+
+def test_provider_for_url_dispatch(tmp_path):
+    assert isinstance(provider_for_url("http://localhost:8545"), Web3.HTTPProvider)
+    assert isinstance(provider_for_url("wss://node.example/ws"), PipelinedWebSocketProvider)
+    assert provider_for_url("ipc:///tmp/geth.ipc").ipc_path == "/tmp/geth.ipc"
+    assert isinstance(provider_for_url(str(tmp_path / "geth.ipc")), PipelinedIPCProvider)
+    with pytest.raises(ValueError):
+        provider_for_url("ftp://node")
+
+
+def test_ipc_batch_is_pipelined_and_routed_by_id(ipc_server):
+    path, server = ipc_server
+    provider = PipelinedIPCProvider(path, timeout=5)
+    responses = provider.make_batch_request([
+        ("eth_getTransactionReceipt", [f"0x{i:064x}"]) for i in range(4)
+    ])
+    assert server.max_buffered == 4
+    assert [r["result"]["transactionHash"] for r in responses] == [f"0x{i:064x}" for i in range(4)]
+
+
+def test_lost_response_times_out_and_reconnects(ipc_server):
+    path, server = ipc_server
+    server.hold = 1
+    provider = PipelinedIPCProvider(path, timeout=0.2)
+    with pytest.raises(TimeoutError):
+        provider.make_request("eth_syncing", [])
+    assert provider.make_request("eth_blockNumber", [])["result"] == "0x10"
+    assert server.connections == 2
+
+
+def test_ipc_trace_streamed_on_reused_connection(ipc_server):
+    path, server = ipc_server
+    server.hold = 1
+    w3 = Web3(PipelinedIPCProvider(path, timeout=5))
+    for _ in range(2):
+        out = fetch_internal_transfers(w3, 16, [])
+        assert len(out) == 50
+        assert out[f"0x{49:064x}"][0]["value"] == 50
+    # Both traces went over the one streaming connection.
+    assert server.connections == 1
+
+
+def test_core_receipts_pipelined_through_web3(ipc_server):
+    path, server = ipc_server
+    w3 = Web3(PipelinedIPCProvider(path, timeout=5))
+    txs = [{"hash": bytes([i]) * 32} for i in range(1, 5)]
+    pairs = fetch_transfer_receipts(w3, txs)
+    # All four receipt requests were on the wire before the first reply.
+    assert server.max_buffered == 4
+    assert [r.transactionHash for _, r in pairs] == [bytes([i]) * 32 for i in range(1, 5)]
+    assert pairs[0][1].gasUsed == 21000
+
+
+def test_websocket_concurrent_requests_share_connection():
+    from websockets.sync.server import serve
+
+    server = _HoldingServer(hold=3)
+
+    def handler(ws):
+        for message in ws:
+            server.on_request(json.loads(message), ws.send)
+
+    with serve(handler, "127.0.0.1", 0) as ws_server:
+        threading.Thread(target=ws_server.serve_forever, daemon=True).start()
+        port = ws_server.socket.getsockname()[1]
+        w3 = Web3(PipelinedWebSocketProvider(f"ws://127.0.0.1:{port}"))
+        results = [None] * 3
+
+        def call(i):
+            results[i] = w3.eth.block_number
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        w3.provider.disconnect()
+        ws_server.shutdown()
+    assert results == [16, 16, 16]
+    assert server.max_buffered == 3
+
+
+def test_websocket_fragmented_trace_is_streamed():
+    from websockets.sync.server import serve
+
+    def handler(ws):
+        for message in ws:
+            body = json.dumps(_answer(json.loads(message)))
+            # One message in many frames, as nodes send large responses.
+            ws.send([body[i:i + 100] for i in range(0, len(body), 100)])
+
+    with serve(handler, "127.0.0.1", 0) as ws_server:
+        threading.Thread(target=ws_server.serve_forever, daemon=True).start()
+        port = ws_server.socket.getsockname()[1]
+        provider = PipelinedWebSocketProvider(f"ws://127.0.0.1:{port}", timeout=5)
+        first = list(provider.stream_request("debug_traceBlockByNumber", ["0x10", {}]))
+        second = list(provider.stream_request("debug_traceBlockByNumber", ["0x10", {}]))
+        provider.disconnect()
+        ws_server.shutdown()
+    assert first == second == _TRACE
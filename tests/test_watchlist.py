@@ -0,0 +1,90 @@
+"""Tests for the watchlist matcher and its use in process_block_transfers."""
+
+from types import SimpleNamespace
+
+import pytest
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+from eth_tx_explorer.core import TRANSFER_SIG, process_block_transfers
+from eth_tx_explorer.watchlist import (
+    MAX_PUSHDOWN_ADDRESSES,
+    Watchlist,
+    address_key,
+    load_watchlist,
+)
+
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+CAROL = "0x" + "cc" * 20
+TOKEN = "0x" + "dd" * 20
+
+
+def test_address_key_accepts_hex_and_bytes():
+    assert address_key(ALICE) == b"\xaa" * 20
+    assert address_key(ALICE.upper().replace("0X", "0x")) == b"\xaa" * 20
+    assert address_key(b"\xaa" * 20) == b"\xaa" * 20
+    with pytest.raises(ValueError):
+        address_key("0x1234")
+    with pytest.raises(ValueError):
+        address_key("0x" + "zz" * 20)
+
+
+def test_matches_log_on_raw_topics_and_token(transfer_log):
+    wl = Watchlist([BOB])
+    assert wl.matches_log(transfer_log(TOKEN, ALICE, BOB, 1, HexBytes("01" * 32)))
+    assert wl.matches_log(transfer_log(TOKEN, BOB, ALICE, 1, HexBytes("01" * 32)))
+    assert not wl.matches_log(transfer_log(TOKEN, ALICE, CAROL, 1, HexBytes("01" * 32)))
+    assert Watchlist([TOKEN]).matches_log(transfer_log(TOKEN, ALICE, CAROL, 1, HexBytes("01" * 32)))
+    assert BOB in wl and ALICE not in wl and None not in wl
+
+
+def test_log_filters_pushdown_and_fallback():
+    filters = Watchlist([ALICE, BOB]).log_filters(7, TRANSFER_SIG)
+    assert len(filters) == 3
+    assert filters[0]["topics"] == [Web3.to_hex(TRANSFER_SIG)]
+    assert len(filters[0]["address"]) == 2
+    assert filters[1]["topics"][1] == ["0x" + "00" * 12 + "aa" * 20, "0x" + "00" * 12 + "bb" * 20]
+    assert filters[2]["topics"][1] is None
+    assert all(f["fromBlock"] == f["toBlock"] == 7 for f in filters)
+
+    big = Watchlist(i.to_bytes(20, "big") for i in range(MAX_PUSHDOWN_ADDRESSES + 1))
+    assert big.log_filters(7, TRANSFER_SIG) == [
+        {"fromBlock": 7, "toBlock": 7, "topics": [Web3.to_hex(TRANSFER_SIG)]}
+    ]
+
+
+def test_load_watchlist(tmp_path):
+    path = tmp_path / "watch.txt"
+    path.write_text(f"# routers\n{ALICE}\n\n{BOB}  # bob\n")
+    wl = load_watchlist(path)
+    assert len(wl) == 2 and ALICE in wl and BOB in wl
+
+    path.write_text(f"{ALICE}\nnot-an-address\n")
+    with pytest.raises(ValueError) as exc_info:
+        load_watchlist(path)
+    assert ":2:" in str(exc_info.value)
+
+
+def test_process_block_transfers_watchlist_skips_irrelevant_receipts(fake_eth, transfer_log):
+    h1, h2, h3 = HexBytes("11" * 32), HexBytes("22" * 32), HexBytes("33" * 32)
+    txs = [
+        AttributeDict({"hash": h1, "from": ALICE, "to": CAROL, "value": 5, "type": 0, "gas": 21000, "gasPrice": 1}),
+        AttributeDict({"hash": h2, "from": CAROL, "to": TOKEN, "value": 0, "type": 0, "gas": 60000, "gasPrice": 1}),
+        AttributeDict({"hash": h3, "from": CAROL, "to": TOKEN, "value": 0, "type": 0, "gas": 60000, "gasPrice": 1}),
+    ]
+    watched_log = transfer_log(TOKEN, CAROL, BOB, 9, h2)
+    other_log = transfer_log(TOKEN, CAROL, ALICE, 3, h3)
+    receipts = {
+        Web3.to_hex(h): SimpleNamespace(logs=logs, gasUsed=21000, effectiveGasPrice=1)
+        for h, logs in ((h1, []), (h2, [watched_log]), (h3, [other_log]))
+    }
+    eth = fake_eth(SimpleNamespace(number=7, timestamp=0, transactions=txs), receipts, [watched_log, other_log])
+    w3 = SimpleNamespace(eth=eth)
+
+    records = process_block_transfers(w3, 7, watchlist=Watchlist([BOB]))
+    assert eth.receipt_calls == [Web3.to_hex(h2)]
+    assert [(r["transfer_type"], r["to_addr"], r["token_value"]) for r in records] == [
+        ("ERC20_TRANSFER", BOB, 9)
+    ]